@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+계정 일별 지표 로컬 시계열 저장소
+- 지표별 float64 배열 파일 하나 (<root>/<metric>.f64), 인덱스 i = 시작일 + i일, 값이 없는 날은 NaN
+- 새 날짜는 파일 끝에 append, 이미 있는 날짜(최근 며칠 재조회분)만 제자리 덮어쓰기
+- 시작일보다 이전 날짜가 들어오면 그때만 앞쪽에 NaN을 채워 파일을 다시 씀 (드문 백필 경로)
+- 구간 합/월별 합/특정일 값은 numpy 슬라이스로 한 번에 계산
+- 동기화 구간은 메트릭 그룹별로 기록 (한 그룹의 실패가 다른 그룹의 동기화 지점을 막지 않음)
+"""
+
+import os
+import json
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SERIES_DTYPE = np.dtype('<f8')
+
+class DailySeriesStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.meta_path = os.path.join(root, 'meta.json')
+        self.start: Optional[date] = None
+        self.synced_until: Optional[date] = None      # 그룹별 기록 이전 형식 (모든 그룹 공통 동기화 지점)
+        self.synced: Dict[str, Tuple[date, date]] = {}  # 그룹 키 → 연속으로 동기화된 [시작, 끝]
+        self._cache: Dict[str, np.ndarray] = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            self.start = date.fromisoformat(meta['start']) if meta.get('start') else None
+            self.synced_until = date.fromisoformat(meta['synced_until']) if meta.get('synced_until') else None
+            self.synced = {key: (date.fromisoformat(first), date.fromisoformat(last))
+                           for key, (first, last) in meta.get('synced', {}).items()}
+
+    def _path(self, metric: str) -> str:
+        return os.path.join(self.root, f"{metric}.f64")
+
+    def _save_meta(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'start': self.start.isoformat() if self.start else None,
+                'synced_until': self.synced_until.isoformat() if self.synced_until else None,
+                'synced': {key: [first.isoformat(), last.isoformat()] for key, (first, last) in self.synced.items()},
+            }, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def synced_range(self, key: str) -> Tuple[Optional[date], Optional[date]]:
+        """그룹의 동기화 구간 (그룹별 기록이 없으면 이전 형식의 공통 구간)"""
+        if key in self.synced:
+            return self.synced[key]
+        if self.start is not None and self.synced_until is not None:
+            return self.start, self.synced_until
+        return None, None
+
+    def mark_synced(self, key: str, first: date, last: date):
+        """그룹의 동기화 구간에 [first, last]를 합침 (기존 구간과 떨어져 있으면 합치지 않음)"""
+        synced_first, synced_last = self.synced_range(key)
+        if synced_first is not None:
+            if first > synced_last + timedelta(days=1) or last < synced_first - timedelta(days=1):
+                return
+            first, last = min(first, synced_first), max(last, synced_last)
+        if self.synced.get(key) != (first, last):
+            self.synced[key] = (first, last)
+            self._save_meta()
+
+    def load(self, metric: str) -> np.ndarray:
+        if metric not in self._cache:
+            path = self._path(metric)
+            self._cache[metric] = np.fromfile(path, dtype=SERIES_DTYPE) if os.path.exists(path) else np.empty(0, SERIES_DTYPE)
+        return self._cache[metric]
+
+    def metrics(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith('.f64'))
+
+    def write(self, metric: str, daily: Dict[date, float]):
+        """일별 값 반영 (끝에 append + 기존 구간 덮어쓰기)"""
+        if not daily:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        first = min(daily)
+        if self.start is None:
+            self.start = first
+            self._save_meta()
+        elif first < self.start:
+            self._rebase(first)
+
+        arr = self.load(metric)
+        size = len(arr)
+        end = max((day - self.start).days for day in daily) + 1
+        tail = np.full(max(0, end - size), np.nan, dtype=SERIES_DTYPE)
+        overwrites = []
+        for day, value in daily.items():
+            i = (day - self.start).days
+            if i < size:
+                overwrites.append((i, value))
+            else:
+                tail[i - size] = value
+
+        path = self._path(metric)
+        if overwrites:
+            with open(path, 'r+b') as f:
+                for i, value in overwrites:
+                    f.seek(i * SERIES_DTYPE.itemsize)
+                    f.write(np.array([value], dtype=SERIES_DTYPE).tobytes())
+                    arr[i] = value
+        if len(tail):
+            with open(path, 'ab') as f:
+                tail.tofile(f)
+            arr = np.concatenate([arr, tail])
+        self._cache[metric] = arr
+
+    def _rebase(self, new_start: date):
+        """시작일을 앞당김 (모든 지표 앞쪽을 NaN으로 채워 다시 씀)"""
+        shift = (self.start - new_start).days
+        for metric in self.metrics():
+            arr = np.concatenate([np.full(shift, np.nan, dtype=SERIES_DTYPE), self.load(metric)])
+            tmp_path = f"{self._path(metric)}.tmp"
+            arr.tofile(tmp_path)
+            os.replace(tmp_path, self._path(metric))
+            self._cache[metric] = arr
+        self.start = new_start
+        self._save_meta()
+
+    def values(self, metric: str, first: date, last: date) -> np.ndarray:
+        """[first, last] 구간 일별 값 (저장 범위 밖은 NaN)"""
+        length = (last - first).days + 1
+        out = np.full(max(0, length), np.nan, dtype=SERIES_DTYPE)
+        if self.start is None or length <= 0:
+            return out
+        arr = self.load(metric)
+        lo = (first - self.start).days
+        src_lo, src_hi = max(lo, 0), min(lo + length, len(arr))
+        if src_lo < src_hi:
+            out[src_lo - lo:src_hi - lo] = arr[src_lo:src_hi]
+        return out
+
+    def value_on(self, metric: str, day: date) -> float:
+        return float(self.values(metric, day, day)[0])
+
+    def window_sum(self, metric: str, first: date, last: date) -> Tuple[float, int]:
+        """구간 합계와 값이 있는 날 수"""
+        window = self.values(metric, first, last)
+        present = ~np.isnan(window)
+        return float(window[present].sum()), int(present.sum())
+
+    def latest(self, metric: str) -> Tuple[Optional[date], float]:
+        """값이 있는 마지막 날짜와 그 값"""
+        arr = self.load(metric)
+        present = np.flatnonzero(~np.isnan(arr))
+        if self.start is None or not len(present):
+            return None, float('nan')
+        i = int(present[-1])
+        return self.start + timedelta(days=i), float(arr[i])
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+API 응답 크기 실행 메트릭 + requests 세션 셰이핑
+- googleapiclient를 import하지 않음 (graph_client 등 가벼운 경로에서 사용)
+- googleapiclient 쪽 셰이핑은 request_shaping.ShapedHttpRequest 참고
+"""
+
+import re
+import logging
+import threading
+import urllib.parse
+from collections import defaultdict
+
+GZIP_USER_AGENT = "youtube-analytics-automation (gzip)"
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 실행 메트릭
+# ──────────────────────────────────────────────────────────────────────────────
+
+class ApiPayloadStats:
+    """메서드별 호출 수/응답 바이트 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.decoded_bytes = defaultdict(int)   # 압축 해제 후 본문 크기
+        self.wire_bytes = defaultdict(int)      # 전송 크기 (Content-Length를 알 수 있을 때만)
+        self.gzip_responses = defaultdict(int)
+        self.unmasked_bytes = {}                # 감사 모드: 메서드별 마스크 없는 응답 1회 크기
+        self.masked_sample = {}                 # 감사 모드: 같은 호출의 마스크 적용 크기
+
+    def record(self, method: str, decoded: int, wire: int = None, gzipped: bool = False):
+        with self._lock:
+            self.calls[method] += 1
+            self.decoded_bytes[method] += decoded
+            if wire is not None:
+                self.wire_bytes[method] += wire
+            if gzipped:
+                self.gzip_responses[method] += 1
+
+    def record_audit(self, method: str, masked: int, unmasked: int):
+        with self._lock:
+            self.masked_sample[method] = masked
+            self.unmasked_bytes[method] = unmasked
+
+    def needs_audit(self, method: str) -> bool:
+        with self._lock:
+            return method not in self.unmasked_bytes
+
+    def summary_lines(self) -> list:
+        lines = []
+        for method in sorted(self.calls):
+            calls, decoded = self.calls[method], self.decoded_bytes[method]
+            line = f"{method}: {calls}회, 본문 {decoded / 1024:.1f}KiB, gzip {self.gzip_responses[method]}/{calls}"
+            if self.wire_bytes.get(method):
+                line += f", 전송 {self.wire_bytes[method] / 1024:.1f}KiB"
+            if method in self.unmasked_bytes and self.unmasked_bytes[method]:
+                ratio = 1 - self.masked_sample[method] / self.unmasked_bytes[method]
+                line += f", fields 마스크 절감 ≈{ratio:.0%}"
+            lines.append(line)
+        return lines
+
+    def log_summary(self):
+        if not self.calls:
+            return
+        logging.info("📦 API 응답 크기 요약")
+        for line in self.summary_lines():
+            logging.info(f"  {line}")
+
+API_STATS = ApiPayloadStats()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# requests 세션 (gspread / Graph API)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def shape_requests_session(session, label: str):
+    """requests.Session에 gzip 헤더와 응답 크기 기록 훅을 설치"""
+    session.headers["Accept-Encoding"] = "gzip"
+    user_agent = session.headers.get("User-Agent", "")
+    if "gzip" not in user_agent:
+        session.headers["User-Agent"] = f"{user_agent} {GZIP_USER_AGENT}".strip()
+
+    def record_response(resp, *args, **kwargs):
+        wire = resp.headers.get("Content-Length")
+        API_STATS.record(
+            f"{label} {resp.request.method} {re.sub(r'/[0-9]+', '/:id', urllib.parse.urlsplit(resp.url).path)}",
+            decoded=len(resp.content or b""),
+            wire=int(wire) if wire and wire.isdigit() else None,
+            gzipped=resp.headers.get("Content-Encoding") == "gzip",
+        )
+
+    session.hooks.setdefault("response", []).append(record_response)
+    return session
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+graph_client vs facebook_business SDK 벤치마크
+1) 콜드 스타트 import 시간 (새 인터프리터에서 import만 수행, N회 중앙값)
+2) 미디어 1건당 처리 오버헤드 (같은 JSON 페이지를 디코딩 → 필드 읽기까지)
+   - SDK 경로: Cursor가 하는 것처럼 IGMedia 객체 생성 + _set_data + export_all_data
+   - graph_client 경로: 디코딩된 dict를 그대로 사용
+SDK가 설치되어 있지 않으면 SDK 측정은 건너뜀.
+
+사용:
+    python benchmarks/bench_graph_client.py --media 20000 --runs 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SDK_IMPORT = ("from facebook_business.api import FacebookAdsApi; "
+              "from facebook_business.adobjects.iguser import IGUser; "
+              "from facebook_business.adobjects.igmedia import IGMedia")
+CLIENT_IMPORT = "from graph_client import GraphClient"
+
+def import_time(stmt: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", stmt], cwd=ROOT, check=True)
+        samples.append(time.perf_counter() - started)
+    baseline = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT, check=True)
+        baseline.append(time.perf_counter() - started)
+    return statistics.median(samples) - statistics.median(baseline)
+
+def media_page(n: int) -> bytes:
+    return json.dumps({"data": [
+        {"id": str(17900000000000000 + i), "media_type": "VIDEO" if i % 3 == 0 else "IMAGE",
+         "permalink": f"https://www.instagram.com/p/{i:011d}/", "timestamp": "2025-08-01T12:34:56+0000",
+         "like_count": i % 500, "comments_count": i % 40, "caption": "캡션 " * 20}
+        for i in range(n)
+    ]}).encode()
+
+def per_media_client(raw: bytes) -> float:
+    started = time.perf_counter()
+    total = 0
+    for media in json.loads(raw)["data"]:
+        total += media.get("like_count", 0)
+    return time.perf_counter() - started
+
+def per_media_sdk(raw: bytes) -> float:
+    from facebook_business.api import FacebookAdsApi
+    from facebook_business.adobjects.igmedia import IGMedia
+    api = FacebookAdsApi.init("app", "secret", "token")
+    started = time.perf_counter()
+    total = 0
+    for item in json.loads(raw)["data"]:
+        obj = IGMedia(api=api)
+        obj._set_data(item)
+        total += obj.export_all_data().get("like_count", 0)
+    return time.perf_counter() - started
+
+def sdk_available() -> bool:
+    try:
+        import facebook_business  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--media", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    has_sdk = sdk_available()
+    raw = media_page(args.media)
+
+    print("== 콜드 스타트 import (인터프리터 기동 시간 제외, 중앙값) ==")
+    print(f"graph_client      : {import_time(CLIENT_IMPORT, args.runs) * 1000:8.1f} ms")
+    if has_sdk:
+        print(f"facebook_business : {import_time(SDK_IMPORT, args.runs) * 1000:8.1f} ms")
+
+    print(f"== 미디어 {args.media}건 처리 (디코딩 + 필드 읽기, 최소값) ==")
+    client = min(per_media_client(raw) for _ in range(args.runs))
+    print(f"graph_client      : {client / args.media * 1e6:8.2f} µs/건")
+    if has_sdk:
+        sdk = min(per_media_sdk(raw) for _ in range(args.runs))
+        print(f"facebook_business : {sdk / args.media * 1e6:8.2f} µs/건  ({sdk / client:.1f}x)")
+    else:
+        print("facebook_business 미설치 → SDK 측정 생략 (pip install facebook-business)")
+
+if __name__ == "__main__":
+    main()
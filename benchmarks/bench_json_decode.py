@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 응답 디코딩 마이크로 벤치마크 (표준 json → dict 순회 vs orjson → dict 순회 vs msgspec 스키마 디코딩)
+- 대상: videos.list, playlistItems.list, Analytics reports.query, Graph /media 페이지 (fast_json 디코더와 같은 변환)
+- 기록된 응답 폴더(--recorded-dir)가 있으면 파일명 접두어(videos, playlistItems, reports, media)로 분류해 사용,
+  없으면 합성 응답 생성 (fields 마스크 응답 + 마스크 없이 받은 큰 응답 두 가지)
+- 시간: 페이지 전체 디코딩 최솟값 (--runs회)
+- 할당: 페이지 하나를 디코딩하는 동안의 tracemalloc 피크(중간 dict 포함) / 전체 결과 보유 메모리
+
+사용:
+    python benchmarks/bench_json_decode.py --pages 200
+    python benchmarks/bench_json_decode.py --recorded-dir recorded/
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+KINDS = ("videos", "playlistItems", "reports", "media")
+
+def synthetic_pages(kind: str, pages: int, unmasked: bool) -> list:
+    out = []
+    for p in range(pages):
+        if kind == "videos":
+            items = []
+            for i in range(p * 50, p * 50 + 50):
+                item = {
+                    "id": f"v{i:010d}",
+                    "snippet": {"title": f"영상 제목 {i}", "publishedAt": f"2024-{i % 12 + 1:02d}-01T00:00:00Z"},
+                    "statistics": {"viewCount": str(i * 7919 % 1000003), "likeCount": str(i % 997),
+                                   "commentCount": str(i % 101)},
+                    "contentDetails": {"duration": "PT45S" if i % 3 else "PT12M3S"},
+                }
+                if unmasked:
+                    item["snippet"].update({
+                        "description": "설명 " * 200, "channelId": "UCbench", "channelTitle": "벤치 채널",
+                        "tags": [f"태그{t}" for t in range(15)], "categoryId": "22", "liveBroadcastContent": "none",
+                        "thumbnails": {size: {"url": f"https://i.ytimg.com/vi/{i}/{size}.jpg", "width": 480, "height": 360}
+                                       for size in ("default", "medium", "high", "standard", "maxres")},
+                        "localized": {"title": f"영상 제목 {i}", "description": "설명 " * 200},
+                    })
+                    item["statistics"]["favoriteCount"] = "0"
+                    item["contentDetails"].update({"dimension": "2d", "definition": "hd", "caption": "false",
+                                                   "licensedContent": True, "projection": "rectangular"})
+                    item.update({"kind": "youtube#video", "etag": f"etag{i}"})
+                items.append(item)
+            body = {"items": items}
+        elif kind == "playlistItems":
+            items = []
+            for i in range(p * 50, p * 50 + 50):
+                item = {"contentDetails": {"videoId": f"v{i:010d}", "videoPublishedAt": "2024-01-01T00:00:00Z"}}
+                if unmasked:
+                    item.update({"kind": "youtube#playlistItem", "etag": f"etag{i}", "id": f"pl{i}",
+                                 "snippet": {"title": f"영상 제목 {i}", "description": "설명 " * 200,
+                                             "position": i, "resourceId": {"videoId": f"v{i:010d}"}}})
+                items.append(item)
+            body = {"etag": f"page{p}", "nextPageToken": f"token{p + 1}", "items": items}
+        elif kind == "reports":
+            headers = [{"name": "video", "columnType": "DIMENSION", "dataType": "STRING"}] + [
+                {"name": m, "columnType": "METRIC", "dataType": "INTEGER"}
+                for m in ("views", "averageViewDuration", "averageViewPercentage")
+            ]
+            body = {"kind": "youtubeAnalytics#resultTable", "columnHeaders": headers,
+                    "rows": [[f"v{i:010d}", i * 31 % 9973, i % 600, round(i % 100 * 0.7, 2)]
+                             for i in range(p * 200, p * 200 + 200)]}
+        else:
+            data = []
+            for i in range(p * 100, p * 100 + 100):
+                media = {"id": f"{17800000000000000 + i}", "timestamp": "2025-01-01T00:00:00+0000",
+                         "media_type": "VIDEO" if i % 4 == 0 else "IMAGE", "permalink": f"https://instagram.com/p/{i}",
+                         "like_count": i % 500, "comments_count": i % 40, "caption": f"캡션 {i} " * 10}
+                if unmasked:
+                    media.update({"media_url": f"https://cdn.example/{i}.jpg", "thumbnail_url": f"https://cdn.example/{i}_t.jpg",
+                                  "username": "bench", "shortcode": f"sc{i}", "is_comment_enabled": True,
+                                  "media_product_type": "FEED", "owner": {"id": "1784"}})
+                data.append(media)
+            body = {"data": data, "paging": {"cursors": {"before": "b", "after": "a"}, "next": f"https://graph/next{p}"}}
+        out.append(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+    return out
+
+def recorded_pages(recorded_dir: str) -> dict:
+    pages = {}
+    for kind in KINDS:
+        files = sorted(glob.glob(os.path.join(recorded_dir, f"{kind}*.json")))
+        if files:
+            pages[kind] = [open(path, "rb").read() for path in files]
+    return pages
+
+def decoders() -> dict:
+    from yt_video_analysis_fixed import PLAYLIST_PAGE, VIDEO_LIST
+    from yt_analytics_query import REPORT_ROWS
+    from instagram_analytics import MEDIA_PAGE
+    return {"videos": VIDEO_LIST, "playlistItems": PLAYLIST_PAGE, "reports": REPORT_ROWS, "media": MEDIA_PAGE}
+
+def strategies(decoder) -> dict:
+    out = {"json": lambda body: decoder.from_dict(json.loads(body))}
+    try:
+        import orjson
+        out["orjson"] = lambda body: decoder.from_dict(orjson.loads(body))
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        if decoder.schema is not None:
+            out["msgspec"] = lambda body: decoder.from_struct(msgspec.json.decode(body, type=decoder.schema))
+    except ImportError:
+        pass
+    return out
+
+def measure(decode, pages: list, runs: int) -> dict:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        for body in pages:
+            decode(body)
+        best = min(best, time.perf_counter() - started)
+    # 페이지마다 디코딩 중 임시 할당 피크(중간 dict 등)와 변환 결과로 남는 메모리를 따로 측정
+    tracemalloc.start()
+    results, transient = [], 0
+    for body in pages:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        results.append(decode(body))
+        _, peak = tracemalloc.get_traced_memory()
+        transient = max(transient, peak - before)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return {"seconds": best, "page_peak_kib": transient / 2**10, "retained_mib": retained / 2**20}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--recorded-dir", default=None)
+    args = parser.parse_args()
+
+    by_kind = decoders()
+    if args.recorded_dir:
+        variants = {"recorded": recorded_pages(args.recorded_dir)}
+    else:
+        variants = {label: {kind: synthetic_pages(kind, args.pages, unmasked) for kind in KINDS}
+                    for label, unmasked in (("fields 마스크", False), ("마스크 없음", True))}
+
+    for label, pages_by_kind in variants.items():
+        print(f"== {label} ==")
+        print(f"{'응답':14} {'크기':>9} {'방식':8} {'시간':>10} {'페이지 할당 피크':>14} {'결과 보유':>11} {'json 대비':>9}")
+        for kind, pages in pages_by_kind.items():
+            size = sum(len(body) for body in pages) / 2**20
+            rows = {name: measure(decode, pages, args.runs) for name, decode in strategies(by_kind[kind]).items()}
+            base = rows["json"]
+            for name, r in rows.items():
+                print(f"{kind:14} {size:6.1f}MiB {name:8} {r['seconds'] * 1000:7.1f} ms {r['page_peak_kib']:10.0f} KiB "
+                      f"{r['retained_mib']:7.1f} MiB {base['seconds'] / r['seconds']:8.2f}x")
+        print()
+
+if __name__ == "__main__":
+    main()
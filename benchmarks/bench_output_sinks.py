@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+출력 sink 처리량 벤치마크 (SQLite / CSV / Parquet, Sheets는 네트워크 없이 값 준비만)
+- yt_video_analysis_fixed의 카탈로그 전체 표(CATALOGUE_TABLE)와 같은 열 구성의 합성 행을 제너레이터로 공급
+- sink마다: 기록 시간 최솟값(--runs회), 행/초, 파일 크기, 기록 중 tracemalloc 피크 (청크 크기 SINK_CHUNK_ROWS)
+- sheets: 가짜 클라이언트로 update 직전까지 (실제 Sheets 지연/셀 한도 제외, 행 수가 한도를 넘으면 오류 표시)
+
+사용:
+    python benchmarks/bench_output_sinks.py --rows 200000
+    SINK_CHUNK_ROWS=20000 python benchmarks/bench_output_sinks.py --sinks sqlite,parquet
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def synthetic_rows(n: int):
+    for i in range(n):
+        yield [f"v{i:010d}", f"영상 제목 {i}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", i * 7919 % 1000003, i % 997,
+               i % 101, 45 if i % 3 else 723, int(bool(i % 3)),
+               i % 500, i % 3500, '' if i % 7 == 0 else i % 15000, round(i % 500 / 7, 1), '' if i % 5 == 0 else i % 40 - 20]
+
+class FakeWorksheet:
+    def clear(self):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+class FakeSheets:
+    def open_by_key(self, key):
+        return self
+
+    def worksheet(self, name):
+        return FakeWorksheet()
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def measure(name: str, table, rows: int, runs: int) -> dict:
+    from output_sinks import build_sinks
+    best = float("inf")
+    for _ in range(runs):
+        root = tempfile.mkdtemp(prefix=f"bench-sink-{name}-")
+        sinks = build_sinks([name], "bench", sheets_client=FakeSheets, spreadsheet_id="bench", root=root)
+        started = time.perf_counter()
+        sinks.write_table(table, synthetic_rows(rows))
+        best = min(best, time.perf_counter() - started)
+    size = directory_size(root)
+    tracemalloc.start()
+    sinks.write_table(table, synthetic_rows(rows))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "rows_per_sec": rows / best, "size_mib": size / 2**20, "peak_mib": peak / 2**20}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sinks", default="sheets,sqlite,csv,parquet")
+    args = parser.parse_args()
+
+    from dataclasses import replace
+    from output_sinks import SINK_CHUNK_ROWS, pa, parse_sink_names
+    from yt_video_analysis_fixed import CATALOGUE_TABLE
+    # sheets도 같은 표로 비교하기 위해 bulk 표시를 끔
+    table = replace(CATALOGUE_TABLE, bulk=False)
+
+    print(f"행 {args.rows:,}개 × 열 {len(table.columns)}개, 청크 {SINK_CHUNK_ROWS:,}행")
+    print(f"{'sink':8} {'시간':>10} {'행/초':>12} {'파일 크기':>10} {'메모리 피크':>11}")
+    for name in parse_sink_names(args.sinks):
+        if name == "parquet" and pa is None:
+            print(f"{name:8} (pyarrow 없음, 건너뜀)")
+            continue
+        try:
+            r = measure(name, table, args.rows, args.runs)
+        except ValueError as e:
+            print(f"{name:8} {e}")
+            continue
+        size = f"{r['size_mib']:7.1f}MiB" if name != "sheets" else f"{'-':>10}"
+        print(f"{name:8} {r['seconds'] * 1000:7.0f} ms {r['rows_per_sec']:12,.0f} {size} {r['peak_mib']:8.1f}MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+영상 레코드 메모리 벤치마크 (dict 레코드 vs VideoRecord)
+- 합성 카탈로그를 videos.list 응답처럼 50개 배치로 만들어 파싱 → 조회수 정렬 → TOP 20 행 렌더링
+- 모드별로 새 인터프리터에서 실행해 피크 RSS(ru_maxrss)와 카탈로그 보유 메모리(tracemalloc)를 비교
+- dict 모드는 VideoRecord 도입 전 fetch_videos_meta의 레코드 구성을 그대로 재현
+
+사용:
+    python benchmarks/bench_video_records.py --videos 100000
+"""
+
+import os
+import sys
+import json
+import argparse
+import resource
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def synthetic_batches(n_videos: int):
+    for p in range(0, n_videos, 50):
+        yield {"items": [
+            {
+                "id": f"v{i:010d}",
+                "snippet": {"title": f"영상 제목 {i}", "publishedAt": f"2024-{i % 12 + 1:02d}-01T00:00:00Z"},
+                "statistics": {"viewCount": str((i * 7919) % 1000003), "likeCount": str(i % 997),
+                               "commentCount": str(i % 101)},
+                "contentDetails": {"duration": "PT45S" if i % 3 else "PT12M3S"},
+            }
+            for i in range(p, min(p + 50, n_videos))
+        ]}
+
+def parse_dicts(n_videos: int) -> list:
+    from yt_video_analysis_fixed import parse_duration_to_seconds
+    out = []
+    for resp in synthetic_batches(n_videos):
+        for v in resp["items"]:
+            sn, st, cd = v["snippet"], v["statistics"], v["contentDetails"]
+            dur = cd.get("duration", "PT0S")
+            sec = parse_duration_to_seconds(dur)
+            out.append({
+                "id": v["id"], "title": sn.get("title", ""), "upload_date": sn.get("publishedAt", "")[:10],
+                "views": int(st.get("viewCount", 0)), "likes": int(st.get("likeCount", 0)),
+                "comments": int(st.get("commentCount", 0)), "duration": dur, "duration_seconds": sec,
+                "is_short": sec <= 60, "url": f"https://www.youtube.com/watch?v={v['id']}",
+            })
+    return out
+
+def render_dicts(videos: list) -> list:
+    top = sorted(videos, key=lambda x: x["views"], reverse=True)[:20]
+    return [[i, v["id"], v["title"], v["views"], v["url"]] for i, v in enumerate(top, 1)]
+
+def parse_records(n_videos: int) -> list:
+    from yt_video_analysis_fixed import fetch_videos_meta
+
+    class Youtube:
+        """fetch_videos_meta가 호출하는 videos().list().execute()만 흉내"""
+        def __init__(self):
+            self.batches = synthetic_batches(n_videos)
+        def videos(self):
+            return self
+        def list(self, **kwargs):
+            return self
+        def execute(self):
+            return next(self.batches)
+
+    return fetch_videos_meta(Youtube(), [""] * n_videos)
+
+def render_records(videos: list) -> list:
+    from yt_video_analysis_fixed import build_sheet_rows
+    top = sorted(videos, key=lambda x: x.views, reverse=True)[:20]
+    return build_sheet_rows(top)
+
+def run_mode(mode: str, n_videos: int):
+    import yt_video_analysis_fixed  # noqa: F401 (import 비용은 두 모드 공통이므로 측정 전에 로드)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    videos = parse_dicts(n_videos) if mode == "dict" else parse_records(n_videos)
+    retained, _ = tracemalloc.get_traced_memory()
+    rows = render_dicts(videos) if mode == "dict" else render_records(videos)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({
+        "mode": mode, "videos": len(videos), "rows": len(rows),
+        "retained_mib": retained / 2**20, "traced_peak_mib": peak / 2**20,
+        "rss_peak_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_growth_mib": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss) / 1024,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=100000)
+    parser.add_argument("--mode", choices=["dict", "record"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.videos)
+        return
+
+    results = {}
+    for mode in ("dict", "record"):
+        out = subprocess.run([sys.executable, __file__, "--mode", mode, "--videos", str(args.videos)],
+                             cwd=ROOT, check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"== 영상 {args.videos}개 (파싱 → 정렬 → TOP 20 렌더링) ==")
+    print(f"{'':8} {'카탈로그 보유':>14} {'tracemalloc 피크':>16} {'피크 RSS':>10} {'RSS 증가':>10}")
+    for mode, r in results.items():
+        print(f"{mode:8} {r['retained_mib']:11.1f} MiB {r['traced_peak_mib']:13.1f} MiB "
+              f"{r['rss_peak_mib']:7.1f} MiB {r['rss_growth_mib']:7.1f} MiB")
+    d, r = results["dict"], results["record"]
+    print(f"피크 RSS 증가분 {d['rss_growth_mib'] - r['rss_growth_mib']:.1f} MiB 감소 "
+          f"(카탈로그 보유 메모리 {d['retained_mib'] / max(r['retained_mib'], 1e-9):.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+yt_video_analysis_fixed.main 을 대용량 카탈로그 재생(replay)으로 프로파일링
+- 네트워크/토큰 없이 YouTube Data API 응답을 HttpMockSequence로 재생
+- 기록된 응답 폴더(--replay-dir, 파일명 순서대로 재생)가 없으면 합성 카탈로그 생성
+- Sheets 대신 로컬 sink(VIDEO_ANALYSIS_SINKS, 기본 sqlite)에 기록, 결과는 PROFILE_DIR에 저장
+  (스냅샷 등 상태 파일은 임시 STATE_DIR, 출력은 임시 OUTPUT_DIR)
+
+사용:
+    python benchmarks/profile_replay.py --videos 20000
+    python benchmarks/profile_replay.py --replay-dir recorded/
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def synthetic_responses(n_videos: int) -> list:
+    """channels.list → playlistItems.list 페이지들 → videos.list 배치들 순서의 응답"""
+    ids = [f"v{i:010d}" for i in range(n_videos)]
+    responses = [{"items": [{"id": "UCreplay", "contentDetails": {"relatedPlaylists": {"uploads": "UUreplay"}}}]}]
+    for p in range(0, n_videos, 50):
+        page = {"items": [{"contentDetails": {"videoId": v}} for v in ids[p:p + 50]]}
+        if p + 50 < n_videos:
+            page["nextPageToken"] = f"page{p + 50}"
+        responses.append(page)
+    for p in range(0, n_videos, 50):
+        responses.append({"items": [
+            {
+                "id": v,
+                "snippet": {"title": f"영상 {i}", "publishedAt": f"2024-{i % 12 + 1:02d}-01T00:00:00Z",
+                            "description": "설명 " * 200},
+                "statistics": {"viewCount": str((i * 7919) % 1000003), "likeCount": str(i % 997),
+                               "commentCount": str(i % 101)},
+                "contentDetails": {"duration": "PT45S" if i % 3 else "PT12M3S"},
+            }
+            for i, v in enumerate(ids[p:p + 50], p)
+        ]})
+    return responses
+
+def recorded_responses(replay_dir: str) -> list:
+    out = []
+    for path in sorted(glob.glob(os.path.join(replay_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            out.append(json.load(f))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--replay-dir", default=None)
+    args = parser.parse_args()
+
+    # 모듈 import 전에 설정해야 반영됨
+    os.environ.setdefault("PROFILE", "true")
+    os.environ["MAX_VIDEOS"] = str(args.videos)
+    os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="replay-state-"))
+    # Sheets 대신 로컬 sink로 기록 (시트 지연 없이 기록 단계까지 프로파일)
+    os.environ.setdefault("VIDEO_ANALYSIS_SINKS", "sqlite")
+    os.environ.setdefault("OUTPUT_DIR", tempfile.mkdtemp(prefix="replay-output-"))
+
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpMockSequence
+    import yt_video_analysis_fixed as job
+    from profiling import run_profiled
+    from request_shaping import ShapedHttpRequest
+
+    responses = recorded_responses(args.replay_dir) if args.replay_dir else synthetic_responses(args.videos)
+    http = HttpMockSequence([({"status": "200"}, json.dumps(r)) for r in responses])
+    youtube = build("youtube", "v3", http=http, developerKey="replay", static_discovery=True,
+                    requestBuilder=ShapedHttpRequest)
+
+    job.get_youtube_client = lambda: (youtube, None)
+    job.USE_YT_ANALYTICS = False
+
+    run_profiled(job.main, "yt_video_analysis_fixed-replay")
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,14 @@ TIMEZONE="${TIMEZONE:-Asia/Seoul}"
 USE_DUAL_TOKENS="${USE_DUAL_TOKENS:-false}"       # true면 YouTube/Sheets 토큰 분리
 RUN_TEST_NOW="${RUN_TEST_NOW:-true}"              # 배포 직후 1회 즉시 실행
 
+# 샤딩: 태스크 수가 2 이상이면 달 목록을 태스크별로 나눠 수집 (샤드 결과는 Cloud Storage 볼륨으로 공유)
+TASKS="${TASKS:-1}"
+SHARD_BUCKET="${SHARD_BUCKET:-}"                  # TASKS>1일 때 필수 (예: $PROJECT_ID-yt-shards)
+
+# 태스크 제한 시간과 잡 시간 예산 (예산이 먼저 끝나야 강제 종료 전에 끝난 달까지 기록)
+TASK_TIMEOUT="${TASK_TIMEOUT:-1800}"
+JOB_TIME_BUDGET_SECONDS="${JOB_TIME_BUDGET_SECONDS:-$((TASK_TIMEOUT - 120))}"
+
 # (옵션) 환경변수로 채널/시트 지정 가능
 CHANNEL_ID="${CHANNEL_ID:-}"
 SPREADSHEET_ID="${SPREADSHEET_ID:-}"
@@ -67,6 +75,7 @@ echo "📌 Region  : $REGION"
 echo "📌 Job     : $JOB_NAME"
 echo "📌 Cron    : $CRON ($TIMEZONE)"
 echo "📌 Dual    : $USE_DUAL_TOKENS"
+echo "📌 Tasks   : $TASKS"
 echo
 
 # ==========================
@@ -130,6 +139,19 @@ else
     --member="serviceAccount:$SA" --role="roles/secretmanager.secretAccessor" >/dev/null
 fi
 
+# 샤드 결과 공유 버킷 (태스크끼리 같은 파일시스템을 공유하지 않으므로 Cloud Storage 볼륨 사용)
+# (bash 3.2의 set -u는 빈 배열 "${arr[@]}"을 unbound로 보므로 아래에서 ${arr[@]+...} 형태로 펼침)
+VOLUME_FLAGS=()
+if (( TASKS > 1 )); then
+  [[ -n "$SHARD_BUCKET" ]] || { echo "❌ TASKS>1이면 SHARD_BUCKET이 필요합니다."; exit 1; }
+  echo "🪣 Ensure shard bucket..."
+  gcloud storage buckets create "gs://$SHARD_BUCKET" --location="$REGION" 2>/dev/null || true
+  gcloud storage buckets add-iam-policy-binding "gs://$SHARD_BUCKET" \
+    --member="serviceAccount:$SA" --role="roles/storage.objectAdmin" >/dev/null
+  VOLUME_FLAGS=(--add-volume "name=shards,type=cloud-storage,bucket=$SHARD_BUCKET"
+                --add-volume-mount "volume=shards,mount-path=/shards")
+fi
+
 # ==========================
 # 빌드 & 푸시
 # ==========================
@@ -140,13 +162,14 @@ gcloud builds submit --tag "$IMAGE" .
 # Cloud Run Job
 # ==========================
 echo "🚀 Create/Update Cloud Run Job..."
-ENV_VARS="ENV=cloud,NON_INTERACTIVE=true,CLIENT_SECRET_FILE=/secrets/client_secret.json"
+ENV_VARS="ENV=cloud,NON_INTERACTIVE=true,CLIENT_SECRET_FILE=/secrets/client_secret.json,JOB_TIME_BUDGET_SECONDS=$JOB_TIME_BUDGET_SECONDS"
 SECRET_MOUNTS="/secrets/client_secret.json=$SECRET_CLIENT:latest"
 
 # 선택적 환경변수 전달
 [[ -n "$CHANNEL_ID"     ]] && ENV_VARS="$ENV_VARS,CHANNEL_ID=$CHANNEL_ID"
 [[ -n "$SPREADSHEET_ID" ]] && ENV_VARS="$ENV_VARS,SPREADSHEET_ID=$SPREADSHEET_ID"
 [[ -n "$SHEET_NAME"     ]] && ENV_VARS="$ENV_VARS,SHEET_NAME=$SHEET_NAME"
+(( TASKS > 1 ))            && ENV_VARS="$ENV_VARS,SHARD_DIR=/shards"
 
 if [[ "$USE_DUAL_TOKENS" == "true" ]]; then
   ENV_VARS="$ENV_VARS,TOKEN_YOUTUBE=/secrets/token_youtube.json,TOKEN_SHEETS=/secrets/token_sheets.json,USE_DUAL_TOKENS=true"
@@ -163,7 +186,8 @@ if gcloud run jobs describe "$JOB_NAME" --region "$REGION" >/dev/null 2>&1; then
     --service-account "$SA" \
     --set-env-vars "$ENV_VARS" \
     --set-secrets "$SECRET_MOUNTS" \
-    --max-retries=1 --tasks=1 --task-timeout=1800s
+    --clear-volumes --clear-volume-mounts ${VOLUME_FLAGS[@]+"${VOLUME_FLAGS[@]}"} \
+    --max-retries=1 --tasks="$TASKS" --parallelism="$TASKS" --task-timeout="${TASK_TIMEOUT}s"
 else
   gcloud run jobs create "$JOB_NAME" \
     --image "$IMAGE" \
@@ -171,7 +195,8 @@ else
     --service-account "$SA" \
     --set-env-vars "$ENV_VARS" \
     --set-secrets "$SECRET_MOUNTS" \
-    --max-retries=1 --tasks=1 --task-timeout=1800s
+    ${VOLUME_FLAGS[@]+"${VOLUME_FLAGS[@]}"} \
+    --max-retries=1 --tasks="$TASKS" --parallelism="$TASKS" --task-timeout="${TASK_TIMEOUT}s"
 fi
 
 # ==========================
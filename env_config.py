@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+모듈 공통 환경 설정
+- STATE_DIR: 실행 간 유지되는 상태 파일 폴더 (캐시, 스냅샷, 체크포인트, 실행 잠금 등, 기본 $BASE_DIR/state)
+- env_bool: 'true'/'1'/'yes'/'y' 형식의 불리언 환경 변수
+"""
+
+import os
+
+STATE_DIR = os.getenv('STATE_DIR', os.path.join(os.getenv('BASE_DIR', os.getcwd()), 'state'))
+
+def env_bool(name: str, default: bool = False) -> bool:
+    return str(os.getenv(name, str(default))).lower() in ("1", "true", "yes", "y")
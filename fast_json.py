@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+빠른 JSON 디코딩 (선택 의존성: msgspec, orjson)
+- msgspec이 있으면 응답 본문을 스키마(Struct)로 바로 디코딩 → 스키마에 없는 필드는 읽고 버림 (중간 dict 없음)
+- orjson만 있으면 dict로 디코딩 (표준 json보다 빠름), 둘 다 없으면 표준 json — 결과는 어느 경로든 같음
+- FAST_JSON=false면 항상 표준 json
+- googleapiclient
+    · build(..., model=FastJsonModel()) (request_shaping): 모든 응답을 loads로 (dict 결과는 그대로)
+    · execute_typed(request, decoder): 요청 하나의 postproc를 교체해 본문을 바로 레코드로 변환
+      (ShapedHttpRequest.decode_with, 다른 요청 객체면 execute() 결과 dict를 같은 변환기로 변환)
+- Graph API(graph_client)도 같은 loads/TypedDecoder 사용 (googleapiclient를 import하지 않음)
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from env_config import env_bool
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON = env_bool("FAST_JSON", True)
+
+DECODE_ERRORS = (ValueError,) + ((msgspec.DecodeError,) if msgspec is not None else ())
+
+def backend() -> str:
+    """dict 디코딩에 쓰는 백엔드 이름"""
+    if FAST_JSON and orjson is not None:
+        return "orjson"
+    if FAST_JSON and msgspec is not None:
+        return "msgspec"
+    return "json"
+
+def loads(content) -> Any:
+    if FAST_JSON and orjson is not None:
+        return orjson.loads(content)
+    if FAST_JSON and msgspec is not None:
+        return msgspec.json.decode(content)
+    return json.loads(content)
+
+class TypedDecoder:
+    """
+    응답 본문 → 레코드 변환기
+    - schema/from_struct가 있고 msgspec을 쓸 수 있으면 Struct로 바로 디코딩
+    - 아니면 loads → from_dict (같은 결과)
+    """
+
+    def __init__(self, from_dict: Callable[[dict], Any], schema: Optional[type] = None,
+                 from_struct: Optional[Callable[[Any], Any]] = None):
+        self.from_dict = from_dict
+        self.schema = schema
+        self.from_struct = from_struct
+        self._warned = False
+
+    @property
+    def typed(self) -> bool:
+        return FAST_JSON and msgspec is not None and self.schema is not None
+
+    def decode(self, content: bytes) -> Any:
+        if self.typed:
+            try:
+                return self.from_struct(msgspec.json.decode(content, type=self.schema))
+            except msgspec.ValidationError as e:
+                # 스키마와 다른 응답(필드 타입 변경 등)은 dict 경로로
+                if not self._warned:
+                    logging.warning(f"⚠️ {self.schema.__name__} 스키마 불일치 → dict 디코딩으로 대체: {e}")
+                    self._warned = True
+        return self.from_dict(loads(content))
+
+def graph_page_from_struct(page) -> Dict[str, Any]:
+    """Graph 엣지 페이지 Struct → {'data': [dict, ...], 'paging': {...}} (GraphClient.iter_pages 호환)"""
+    return {'data': [msgspec.structs.asdict(item) for item in page.data], 'paging': page.paging}
+
+def execute_typed(request, decoder: TypedDecoder) -> Any:
+    """request.execute() 결과를 decoder 레코드로 (ShapedHttpRequest면 dict를 거치지 않음)"""
+    if hasattr(request, "decode_with"):
+        return request.decode_with(decoder.decode).execute()
+    return decoder.from_dict(request.execute())
+
+# ──────────────────────────────────────────────────────────────────────────────
+# msgspec 스키마 (호출부에서 실제로 읽는 필드만, 나머지는 디코딩 중 건너뜀)
+# ──────────────────────────────────────────────────────────────────────────────
+
+if msgspec is not None:
+    class VideoSnippet(msgspec.Struct):
+        title: str = ""
+        publishedAt: str = ""
+
+    class VideoStatistics(msgspec.Struct):
+        viewCount: str = "0"
+        likeCount: str = "0"
+        commentCount: str = "0"
+
+    class VideoContentDetails(msgspec.Struct):
+        duration: str = "PT0S"
+
+    class VideoItem(msgspec.Struct):
+        id: str
+        snippet: VideoSnippet = msgspec.field(default_factory=VideoSnippet)
+        statistics: VideoStatistics = msgspec.field(default_factory=VideoStatistics)
+        contentDetails: VideoContentDetails = msgspec.field(default_factory=VideoContentDetails)
+
+    class VideoListResponse(msgspec.Struct):
+        items: List[VideoItem] = []
+
+    class PlaylistItemDetails(msgspec.Struct):
+        videoId: str
+        videoPublishedAt: str = ""
+
+    class PlaylistItem(msgspec.Struct):
+        contentDetails: PlaylistItemDetails
+
+    class PlaylistItemListResponse(msgspec.Struct):
+        etag: Optional[str] = None
+        nextPageToken: Optional[str] = None
+        items: List[PlaylistItem] = []
+
+    class ReportColumnHeader(msgspec.Struct):
+        name: str
+
+    class ReportResponse(msgspec.Struct):
+        columnHeaders: List[ReportColumnHeader] = []
+        rows: List[List[Any]] = []
+
+    class GraphMedia(msgspec.Struct):
+        id: str
+        timestamp: str
+        media_type: str = ""
+        permalink: str = ""
+        like_count: int = 0
+        comments_count: int = 0
+        caption: str = ""
+
+    class GraphMediaPage(msgspec.Struct):
+        data: List[GraphMedia] = []
+        paging: Dict[str, Any] = {}
+else:
+    VideoListResponse = PlaylistItemListResponse = ReportResponse = GraphMediaPage = None
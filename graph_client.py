@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+경량 Facebook Graph API 클라이언트 (Instagram 수집 핫패스용)
+- keep-alive 커넥션 풀을 가진 requests.Session 하나를 재사용 (토큰별 클라이언트끼리 공유 가능)
+- 응답은 plain dict 그대로 반환 (SDK 객체 래핑/export_all_data 없음)
+- fields 선택, batch 요청(50개 단위), paging.next 커서 순회 지원
+- FACEBOOK_APP_SECRET이 있으면 appsecret_proof 자동 첨부
+- 응답 디코딩은 fast_json.loads (orjson/msgspec 선택), decoder를 주면 스키마로 바로 디코딩
+"""
+
+import os
+import hmac
+import json
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api_metrics import shape_requests_session
+from fast_json import DECODE_ERRORS, TypedDecoder, loads
+
+GRAPH_API_VERSION = os.getenv('GRAPH_API_VERSION', 'v19.0')
+GRAPH_BASE_URL = 'https://graph.facebook.com'
+GRAPH_POOL_SIZE = int(os.getenv('GRAPH_POOL_SIZE', '20'))
+GRAPH_TIMEOUT = float(os.getenv('GRAPH_TIMEOUT', '30'))
+GRAPH_BATCH_LIMIT = 50  # Graph API batch 요청 최대 개수
+
+class GraphAPIError(Exception):
+    """Graph API 오류 응답"""
+
+    def __init__(self, status: int, error: dict):
+        self.status = status
+        self.error = error or {}
+        self.code = self.error.get('code')
+        super().__init__(f"Graph API {status} (code={self.code}): {self.error.get('message', '')}")
+
+def new_graph_session(pool_size: int = GRAPH_POOL_SIZE) -> requests.Session:
+    """keep-alive 풀 + 일시 오류 재시도가 설정된 세션"""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET', 'POST']))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    return shape_requests_session(session, 'graph')
+
+class GraphClient:
+    def __init__(self, access_token: str, app_secret: Optional[str] = None,
+                 version: str = GRAPH_API_VERSION, session: Optional[requests.Session] = None):
+        self.access_token = access_token
+        self.app_secret = app_secret
+        self.base_url = f"{GRAPH_BASE_URL}/{version}"
+        self.session = session or new_graph_session()
+
+    def with_token(self, access_token: str, app_secret: Optional[str] = None) -> 'GraphClient':
+        """같은 커넥션 풀을 공유하는 다른 토큰용 클라이언트"""
+        return GraphClient(access_token, app_secret or self.app_secret,
+                           version=self.base_url.rsplit('/', 1)[-1], session=self.session)
+
+    def _auth_params(self) -> Dict[str, str]:
+        params = {'access_token': self.access_token}
+        if self.app_secret:
+            params['appsecret_proof'] = hmac.new(
+                self.app_secret.encode(), self.access_token.encode(), hashlib.sha256
+            ).hexdigest()
+        return params
+
+    def _handle(self, resp: requests.Response, decoder: Optional[TypedDecoder] = None) -> dict:
+        if decoder is not None and decoder.typed and resp.status_code < 400:
+            try:
+                return decoder.decode(resp.content)
+            except DECODE_ERRORS:
+                pass
+        try:
+            body = loads(resp.content)
+        except DECODE_ERRORS:
+            body = {'error': {'message': resp.text[:200]}}
+        if resp.status_code >= 400 or 'error' in body:
+            raise GraphAPIError(resp.status_code, body.get('error'))
+        return body
+
+    def get(self, path: str, fields: Optional[Iterable[str]] = None, params: Optional[dict] = None,
+            decoder: Optional[TypedDecoder] = None) -> dict:
+        query = dict(params or {})
+        if fields:
+            query['fields'] = ','.join(fields)
+        query.update(self._auth_params())
+        resp = self.session.get(f"{self.base_url}/{path.lstrip('/')}", params=query, timeout=GRAPH_TIMEOUT)
+        return self._handle(resp, decoder)
+
+    def iter_pages(self, path: str, fields: Optional[Iterable[str]] = None,
+                   params: Optional[dict] = None, decoder: Optional[TypedDecoder] = None) -> Iterator[List[dict]]:
+        """엣지 조회 결과를 페이지 단위로 반환 (paging.next 커서를 따라감, decoder는 {'data', 'paging'} 반환)"""
+        body = self.get(path, fields=fields, params=params, decoder=decoder)
+        while True:
+            yield body.get('data', [])
+            next_url = body.get('paging', {}).get('next')
+            if not next_url:
+                return
+            # next URL에는 access_token 등 쿼리가 이미 포함됨
+            body = self._handle(self.session.get(next_url, timeout=GRAPH_TIMEOUT), decoder)
+
+    def paginate(self, path: str, fields: Optional[Iterable[str]] = None,
+                 params: Optional[dict] = None) -> Iterator[dict]:
+        """엣지 조회 결과를 항목 단위로 반환"""
+        for page in self.iter_pages(path, fields=fields, params=params):
+            yield from page
+
+    def batch(self, requests_: List[dict]) -> List[dict]:
+        """
+        batch 요청 ([{'method': 'GET', 'relative_url': '...'}, ...]) → 각 응답 본문 dict 목록
+        - 50개 단위로 나눠 전송, 순서 유지
+        - 개별 실패는 {'error': {...}} 형태로 반환 (전체를 실패시키지 않음)
+        """
+        out = []
+        for i in range(0, len(requests_), GRAPH_BATCH_LIMIT):
+            chunk = requests_[i:i + GRAPH_BATCH_LIMIT]
+            data = dict(self._auth_params(), batch=json.dumps(chunk), include_headers='false')
+            resp = self.session.post(f"{self.base_url}/", data=data, timeout=GRAPH_TIMEOUT)
+            results = self._handle_batch(resp)
+            for item in results:
+                if item is None:
+                    out.append({'error': {'message': 'batch item timed out'}})
+                    continue
+                try:
+                    body = loads(item.get('body') or '{}')
+                except DECODE_ERRORS:
+                    body = {'error': {'message': str(item.get('body'))[:200]}}
+                if item.get('code', 200) >= 400 and 'error' not in body:
+                    body = {'error': {'message': f"HTTP {item.get('code')}"}}
+                out.append(body)
+        return out
+
+    def _handle_batch(self, resp: requests.Response) -> list:
+        try:
+            body = loads(resp.content)
+        except DECODE_ERRORS:
+            raise GraphAPIError(resp.status_code, {'message': resp.text[:200]})
+        if isinstance(body, dict):
+            raise GraphAPIError(resp.status_code, body.get('error'))
+        return body
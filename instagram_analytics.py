@@ -3,19 +3,26 @@
 """
 Instagram 월간 분석 데이터 수집 스크립트
 Facebook Graph API를 통해 Instagram 비즈니스 계정 데이터 수집
+(facebook_business SDK 대신 graph_client의 경량 클라이언트 사용)
 """
 
 import os
 import json
+import time
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from itertools import takewhile
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 
-import requests
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.iguser import IGUser
-from facebook_business.adobjects.igmedia import IGMedia
-from facebook_business.adobjects.page import Page
+import numpy as np
+
+from account_timeseries import DailySeriesStore
+from env_config import STATE_DIR, env_bool
+from fast_json import GraphMediaPage, TypedDecoder, graph_page_from_struct
+from graph_client import GRAPH_BATCH_LIMIT, GraphAPIError, GraphClient
+from media_insights_cache import MediaInsightsCache, media_insights_cache_path
+from profiling import run_profiled
 
 # 로깅 설정
 logging.basicConfig(
@@ -31,15 +38,57 @@ INSTAGRAM_BUSINESS_ACCOUNT_ID = os.getenv('INSTAGRAM_BUSINESS_ACCOUNT_ID')
 SPREADSHEET_ID = os.getenv('SPREADSHEET_ID', '17Z6bewPmkp00RHpBKymyMaFj4CvqD_QjAPzagmlkCP8')
 SHEET_NAME = '인스타그램_2025년_월간분석'
 
+# 계정 인사이트 조회 설정
+# - period=day 조회는 since~until 간격이 30일을 넘으면 거부되므로 창 단위로 분할
+# - 일부 메트릭 조합은 함께 요청하면 오류가 나므로 그룹 단위로 분리 (한 그룹 실패가 전체를 막지 않도록)
+INSIGHTS_MAX_WINDOW_DAYS = 30
+ACCOUNT_INSIGHT_METRIC_GROUPS = [
+    ['impressions', 'reach'],
+    ['profile_views', 'email_contacts', 'phone_call_clicks', 'text_message_clicks',
+     'get_directions_clicks', 'website_clicks'],
+    ['follower_count'],
+]
+INSTAGRAM_MAX_WORKERS = int(os.getenv('INSTAGRAM_MAX_WORKERS', '4'))
+# 로컬 시계열에 이미 있는 최근 며칠은 값이 늦게 확정될 수 있어 매번 다시 조회
+ACCOUNT_SERIES_REFRESH_DAYS = int(os.getenv('ACCOUNT_SERIES_REFRESH_DAYS', '2'))
+# 다시 조회해도 같은 결과인 오류 (code 100: 잘못된 파라미터 — 폐기된 메트릭, 허용 기간 밖 조회 등)
+PERMANENT_INSIGHT_ERROR_CODES = {100}
+
+# 미디어 목록/인사이트 조회 필드 (계산에 쓰는 것만)
+MEDIA_FIELDS = ['id', 'media_type', 'permalink', 'timestamp', 'like_count', 'comments_count', 'caption']
+MEDIA_INSIGHT_METRICS = ['impressions', 'reach', 'video_views', 'saved', 'shares']
+MEDIA_PAGE_LIMIT = 100
+# /media 페이지를 MEDIA_FIELDS 스키마로 바로 디코딩 (msgspec 설치 시, 없으면 dict 그대로)
+MEDIA_PAGE = TypedDecoder(lambda body: body, GraphMediaPage, graph_page_from_struct)
+# true면 캐시 갱신 주기와 관계없이 모든 미디어 인사이트를 다시 조회
+INSTAGRAM_INSIGHTS_FORCE_REFRESH = env_bool('INSTAGRAM_INSIGHTS_FORCE_REFRESH', False)
+
+def is_permanent_insight_error(e: GraphAPIError) -> bool:
+    return e.status == 400 and e.code in PERMANENT_INSIGHT_ERROR_CODES
+
 class InstagramAnalytics:
-    def __init__(self):
-        """Instagram Analytics 클래스 초기화"""
-        if not all([FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_ACCESS_TOKEN, INSTAGRAM_BUSINESS_ACCOUNT_ID]):
-            raise ValueError("필수 환경 변수가 설정되지 않았습니다. FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_ACCESS_TOKEN, INSTAGRAM_BUSINESS_ACCOUNT_ID를 확인하세요.")
+    def __init__(self, force_refresh: bool = INSTAGRAM_INSIGHTS_FORCE_REFRESH,
+                 account_id: Optional[str] = None, graph: Optional[GraphClient] = None):
+        """
+        Instagram Analytics 클래스 초기화
+        - 기본: 환경 변수의 단일 계정
+        - 여러 계정 실행: account_id와 graph(GraphClient.with_token으로 세션 공유)를 주입
+        """
+        if graph is None or account_id is None:
+            if not all([FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_ACCESS_TOKEN, INSTAGRAM_BUSINESS_ACCOUNT_ID]):
+                raise ValueError("필수 환경 변수가 설정되지 않았습니다. FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_ACCESS_TOKEN, INSTAGRAM_BUSINESS_ACCOUNT_ID를 확인하세요.")
+        
+        # Graph API 클라이언트 (keep-alive 풀 세션)
+        self.graph = graph or GraphClient(FACEBOOK_ACCESS_TOKEN, app_secret=FACEBOOK_APP_SECRET)
+        self.account_id = account_id or INSTAGRAM_BUSINESS_ACCOUNT_ID
         
-        # Facebook API 초기화
-        FacebookAdsApi.init(FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_ACCESS_TOKEN)
-        self.ig_user = IGUser(INSTAGRAM_BUSINESS_ACCOUNT_ID)
+        # 미디어 인사이트 영속 캐시 (게시물 나이별 갱신 주기, 계정별 파일)
+        self.insights_cache = MediaInsightsCache(media_insights_cache_path(self.account_id))
+        self.force_refresh = force_refresh
+        
+        # 계정 일별 지표 로컬 시계열 (매 실행 빠진 날짜만 추가 조회)
+        self.series_store = DailySeriesStore(os.path.join(STATE_DIR, 'account_series', self.account_id))
+        self._followers_snapshot_taken = False
         
     def get_month_range(self, year: int, month: int) -> tuple:
         """특정 연월의 시작일과 종료일 반환"""
@@ -61,128 +110,338 @@ class InstagramAnalytics:
             month = today.month - 1
         return self.get_month_range(year, month)
     
-    def fetch_media_data(self, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """지정된 기간의 미디어 데이터 수집"""
+    def iter_media_pages_in_range(self, start_date: datetime, end_date: datetime) -> Iterator[List[Dict]]:
+        """
+        기간 내 미디어를 한 번의 엣지 스캔으로 페이지 단위 반환 (페이지가 도착하는 즉시 기간 내 항목만, 종료일 당일 게시물 포함)
+        - /media 엣지는 최신순이므로 페이지 마지막 항목이 시작일보다 이전이면 스캔 중단
+        """
+        first_day, last_day = start_date.date(), end_date.date()
+        pages = self.graph.iter_pages(
+            f"{self.account_id}/media",
+            fields=MEDIA_FIELDS,
+            params={'limit': MEDIA_PAGE_LIMIT},
+            decoder=MEDIA_PAGE,
+        )
+        for page in pages:
+            oldest_day = None
+            in_range = []
+            for media_dict in page:
+                media_day = self.parse_timestamp(media_dict['timestamp']).date()
+                oldest_day = media_day if oldest_day is None else min(oldest_day, media_day)
+                if first_day <= media_day <= last_day:
+                    in_range.append(self._media_record(media_dict))
+            if in_range:
+                yield in_range
+            if oldest_day is not None and oldest_day < first_day:
+                return
+    
+    def _media_record(self, media_dict: Dict) -> Dict:
+        return {
+            'id': media_dict['id'],
+            'media_type': media_dict.get('media_type', ''),
+            'permalink': media_dict.get('permalink', ''),
+            'timestamp': media_dict['timestamp'],
+            'like_count': media_dict.get('like_count', 0),
+            'comments_count': media_dict.get('comments_count', 0),
+            'caption': media_dict.get('caption', '')
+        }
+    
+    def partition_media_by_month(self, media_data: List[Dict]) -> Dict[Tuple[int, int], List[Dict]]:
+        """미디어 목록을 (연, 월) 단위로 분할 (UTC 기준)"""
+        by_month: Dict[Tuple[int, int], List[Dict]] = {}
+        for media in media_data:
+            posted = self.parse_timestamp(media['timestamp'])
+            by_month.setdefault((posted.year, posted.month), []).append(media)
+        return by_month
+    
+    def parse_timestamp(self, timestamp: str) -> datetime:
+        """Graph API 타임스탬프(2025-08-01T12:34:56+0000) → UTC 기준 naive datetime"""
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    def split_insight_windows(self, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+        """[start_date, end_date] (일 단위, 양끝 포함)를 API 허용 길이의 창으로 분할"""
+        windows = []
+        window_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        last_day = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        while window_start <= last_day:
+            window_end = min(window_start + timedelta(days=INSIGHTS_MAX_WINDOW_DAYS - 1), last_day)
+            windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+        return windows
+
+    def _fetch_insight_chunk(self, metrics: List[str], window_start: datetime, window_end: datetime) -> Dict[str, Dict[str, float]]:
+        """메트릭 그룹 × 기간 창 하나 조회 (paging.next를 따라감)"""
+        insights = self.graph.paginate(f"{self.account_id}/insights", params={
+            'metric': ','.join(metrics),
+            'period': 'day',
+            'since': window_start.strftime('%Y-%m-%d'),
+            # until은 배타적 경계 → 창 마지막 날을 포함하도록 하루 뒤
+            'until': (window_end + timedelta(days=1)).strftime('%Y-%m-%d'),
+        })
+        series = {}
+        for insight_dict in insights:
+            daily = series.setdefault(insight_dict['name'], {})
+            for v in insight_dict.get('values', []):
+                daily[self._insight_value_day(v.get('end_time', ''))] = float(v.get('value', 0) or 0)
+        return series
+
+    def _insight_value_day(self, end_time: str) -> str:
+        """period=day 값의 end_time은 해당 일의 끝(다음날 0시) → 값이 속한 날짜(YYYY-MM-DD)"""
         try:
-            # Instagram 미디어 목록 조회
-            media_list = self.ig_user.get_media(
-                fields=[
-                    'id',
-                    'media_type',
-                    'media_url',
-                    'thumbnail_url',
-                    'permalink',
-                    'timestamp',
-                    'like_count',
-                    'comments_count',
-                    'caption'
-                ]
-            )
-            
-            media_data = []
-            for media in media_list:
-                media_dict = media.export_all_data()
-                media_timestamp = datetime.fromisoformat(media_dict['timestamp'].replace('Z', '+00:00'))
-                
-                # 지정된 기간 내의 미디어만 필터링
-                if start_date <= media_timestamp <= end_date:
-                    media_data.append({
-                        'id': media_dict['id'],
-                        'media_type': media_dict.get('media_type', ''),
-                        'permalink': media_dict.get('permalink', ''),
-                        'timestamp': media_dict['timestamp'],
-                        'like_count': media_dict.get('like_count', 0),
-                        'comments_count': media_dict.get('comments_count', 0),
-                        'caption': media_dict.get('caption', '')
-                    })
-            
-            return media_data
-            
+            return (datetime.fromisoformat(end_time[:10]) - timedelta(days=1)).strftime('%Y-%m-%d')
+        except ValueError:
+            return end_time[:10]
+
+    def _fetch_insight_window(self, metrics: List[str], window_start: datetime, window_end: datetime) -> Dict[str, Dict[str, float]]:
+        """
+        _fetch_insight_chunk + 영구 오류 처리
+        - 그룹 요청이 영구 오류면 메트릭별로 나눠 다시 조회하고, 혼자서도 영구 오류인 메트릭은 로그 후 건너뜀
+          (폐기된 메트릭, 허용 기간 밖의 follower_count 등 → 다시 조회해도 같은 결과)
+        - 일시 오류는 예외 그대로 (해당 창은 다음 실행에서 재조회)
+        """
+        try:
+            return self._fetch_insight_chunk(metrics, window_start, window_end)
+        except GraphAPIError as e:
+            if not is_permanent_insight_error(e):
+                raise
+            if len(metrics) == 1:
+                logging.warning(f"인사이트 메트릭 {metrics[0]} {window_start:%Y-%m-%d}~{window_end:%Y-%m-%d} "
+                                f"영구 오류 → 건너뜀: {e}")
+                return {}
+        series = {}
+        for metric in metrics:
+            series.update(self._fetch_insight_window([metric], window_start, window_end))
+        return series
+
+    def sync_account_series(self, start_date: datetime):
+        """
+        로컬 시계열을 [start_date, 어제]까지 채움 (팔로워 스냅샷 보정에 월말 이후 일별 값도 필요)
+        - 메트릭 그룹마다 이미 동기화된 구간은 다시 조회하지 않음 (최근 ACCOUNT_SERIES_REFRESH_DAYS일만 재조회)
+        - 동기화 구간 이전은 그 구간만 조회해 앞에 붙임
+        - 30일 이하 창 × 메트릭 그룹을 동시 조회, 받은 값은 모두 저장하고 동기화 구간은 그룹별로
+          기존 구간에 이어지는 창까지만 넓힘 (일시 실패한 창부터는 다음 실행에서 다시 조회)
+        """
+        store = self.series_store
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        first, last = start_date.date(), yesterday
+
+        # (메트릭 그룹, 기존 구간에서 멀어지는 순서의 창 목록)
+        plans = []
+        for metrics in ACCOUNT_INSIGHT_METRIC_GROUPS:
+            synced_first, synced_last = store.synced_range(','.join(metrics))
+            if synced_first is None:
+                ranges = [(first, last, True)]
+            else:
+                ranges = []
+                if first < synced_first:
+                    ranges.append((first, synced_first - timedelta(days=1), False))
+                ranges.append((max(first, synced_last + timedelta(days=1 - ACCOUNT_SERIES_REFRESH_DAYS)), last, True))
+            for range_first, range_last, forward in ranges:
+                if range_first > range_last:
+                    continue
+                windows = self.split_insight_windows(datetime.combine(range_first, datetime.min.time()),
+                                                     datetime.combine(range_last, datetime.min.time()))
+                plans.append((metrics, windows if forward else windows[::-1]))
+
+        tasks = [(metrics, ws, we) for metrics, windows in plans for ws, we in windows]
+        results: Dict[Tuple[str, datetime], Optional[Dict[str, Dict[str, float]]]] = {}
+        if tasks:
+            with ThreadPoolExecutor(max_workers=max(1, min(INSTAGRAM_MAX_WORKERS, len(tasks)))) as pool:
+                futures = {pool.submit(self._fetch_insight_window, *task): task for task in tasks}
+                for fut in as_completed(futures):
+                    metrics, ws, we = futures[fut]
+                    try:
+                        results[(','.join(metrics), ws)] = fut.result()
+                    except Exception as e:
+                        logging.warning(f"인사이트 조회 실패 {metrics} {ws:%Y-%m-%d}~{we:%Y-%m-%d}: {e}")
+                        results[(','.join(metrics), ws)] = None
+
+        for metrics, windows in plans:
+            key = ','.join(metrics)
+            # 받은 창은 실패한 창 뒤쪽이라도 모두 저장
+            for ws, _ in windows:
+                for metric_name, daily in (results[(key, ws)] or {}).items():
+                    store.write(metric_name, {date.fromisoformat(day): value for day, value in daily.items()})
+            # 동기화 구간은 기존 구간에 이어지는 창(첫 일시 실패 전까지)만큼만 넓힘
+            done = list(takewhile(lambda window: results[(key, window[0])] is not None, windows))
+            if done:
+                store.mark_synced(key, min(ws for ws, _ in done).date(), max(we for _, we in done).date())
+            logging.info(f"  계정 인사이트 {key} {min(ws for ws, _ in windows):%Y-%m-%d} ~ "
+                         f"{max(we for _, we in windows):%Y-%m-%d} 조회 → 로컬 시계열에 추가"
+                         + (f" (일시 실패로 {len(windows) - len(done)}개 창은 다음 실행에서 재조회)" if len(done) < len(windows) else ""))
+
+        self._record_followers_snapshot()
+
+    def _record_followers_snapshot(self):
+        """
+        현재 팔로워 수(계정 followers_count)를 조회한 날짜로 기록 (실행당 1회)
+        - D일에 조회한 값 = D일 시작 시점 근사 (D일 당일 신규 팔로워는 아직 집계 전)
+        """
+        if self._followers_snapshot_taken:
+            return
+        try:
+            account = self.graph.get(self.account_id, fields=['followers_count'])
+            today = datetime.utcnow().date()
+            self.series_store.write('followers_total', {today: float(account.get('followers_count', 0))})
+            self._followers_snapshot_taken = True
         except Exception as e:
-            logging.error(f"미디어 데이터 수집 오류: {e}")
-            return []
-    
-    def fetch_insights_data(self, start_date: datetime, end_date: datetime) -> Dict:
-        """Instagram 인사이트 데이터 수집"""
+            logging.warning(f"팔로워 수 조회 실패: {e}")
+
+    def followers_on(self, day: date) -> Optional[int]:
+        """
+        특정일 말 기준 팔로워 수 (= 다음 날 시작 시점)
+        - 다음 날 조회한 스냅샷이 있으면 그대로, 없으면 가장 최근 스냅샷에서 사이 기간 일별 follower_count(신규 팔로워)만큼 보정
+        - 보정 구간에 빠진 날이 있으면 None (follower_count는 최근 약 30일만 제공되므로 오래된 달은 대개 None)
+        """
+        store = self.series_store
+        next_day = day + timedelta(days=1)
+        total = store.value_on('followers_total', next_day)
+        if total == total:  # NaN이 아니면
+            return int(total)
+        snapshot_day, snapshot_total = store.latest('followers_total')
+        if snapshot_day is None:
+            return None
+        if snapshot_day > next_day:
+            gains = store.values('follower_count', next_day, snapshot_day - timedelta(days=1))
+            sign = -1
+        else:
+            gains = store.values('follower_count', snapshot_day, day)
+            sign = 1
+        if np.isnan(gains).any():
+            return None
+        return int(snapshot_total + sign * gains.sum())
+
+    def account_month_summary(self, year: int, month: int) -> Dict:
+        """로컬 시계열에서 한 달치 계정 지표 계산 (sync_account_series 이후 호출)"""
+        start_date, end_date = self.get_month_range(year, month)
+        first, last = start_date.date(), end_date.date()
+        store = self.series_store
+        
+        summary = {}
+        for metric_name in store.metrics():
+            if metric_name == 'followers_total':
+                continue
+            total, days = store.window_sum(metric_name, first, last)
+            if days:
+                summary[metric_name] = int(total)
+        
+        # 월말 팔로워 수와 전월말 대비 증가분
+        current = self.followers_on(last)
+        previous = self.followers_on(first - timedelta(days=1))
+        if current is not None and previous is not None:
+            new_followers = current - previous
+        else:
+            # 전월말 값을 알 수 없으면 이 달 일별 신규 팔로워 합계로 대체
+            new_followers = summary.get('follower_count', 0)
+        if current is None:
+            # 0으로 쓰면 실제 값처럼 보이므로 None 그대로 (시트에는 빈 칸)
+            logging.warning(f"{year}년 {month}월말 팔로워 수를 계산할 스냅샷/일별 신규 팔로워가 없습니다 → 빈 칸")
+        summary['current_followers'] = current
+        summary['new_followers'] = new_followers
+        return summary
+
+    def _merge_cached_insights(self, media_ids: List[str], fetched: Dict, fetched_count: int, now: datetime) -> Dict:
+        """새로 조회한 인사이트를 캐시에 저장하고 media_ids 전체의 인사이트 반환"""
+        self.insights_cache.put_many(fetched, now)
         try:
-            # 계정 인사이트 조회
-            insights = self.ig_user.get_insights(
-                metric=[
-                    'impressions',
-                    'reach',
-                    'profile_views',
-                    'follower_count',
-                    'email_contacts',
-                    'phone_call_clicks',
-                    'text_message_clicks',
-                    'get_directions_clicks',
-                    'website_clicks'
-                ],
-                period='day',
-                since=start_date.strftime('%Y-%m-%d'),
-                until=end_date.strftime('%Y-%m-%d')
-            )
+            self.insights_cache.save()
+        except OSError as e:
+            logging.warning(f"미디어 인사이트 캐시 저장 실패: {e}")
+
+        logging.info(f"  미디어 인사이트: {len(media_ids) - fetched_count}개 캐시 사용, {fetched_count}개 조회")
+        media_insights = self.insights_cache.get_many(media_ids)
+        # 조회에 실패했고 이전 캐시도 없는 미디어는 빈 값
+        for media_id in media_ids:
+            media_insights.setdefault(media_id, {})
+        return media_insights
+
+    def collect_media_and_insights(self, start_date: datetime, end_date: datetime,
+                                   account_task: Optional[Callable[[], Any]] = None) -> Tuple[List[Dict], Dict]:
+        """
+        미디어 스캔과 미디어 인사이트 조회를 겹쳐 실행하는 파이프라인
+        - 미디어 페이지가 도착할 때마다 갱신이 필요한 ID를 50개 단위 batch 작업으로 바로 제출
+        - account_task(계정 인사이트 동기화)는 같은 풀에서 처음부터 함께 실행
+        - 전체 소요 시간 ≈ 세 단계의 합이 아니라 가장 긴 단계
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        media_data: List[Dict] = []
+        pending_ids: List[str] = []
+        stale_count = 0
+        fetched: Dict[str, Dict] = {}
+
+        with ThreadPoolExecutor(max_workers=INSTAGRAM_MAX_WORKERS + 1) as pool:
+            account_future = pool.submit(account_task) if account_task else None
+            insight_futures = {}
+
+            def submit_batch(media_ids: List[str]):
+                insight_futures[pool.submit(self._fetch_media_insight_batch, media_ids)] = media_ids
+
+            scan_error = None
+            try:
+                for page in self.iter_media_pages_in_range(start_date, end_date):
+                    media_data.extend(page)
+                    posted_at = {media['id']: self.parse_timestamp(media['timestamp']) for media in page}
+                    stale_ids = self.insights_cache.stale_ids(posted_at, now, force_refresh=self.force_refresh)
+                    stale_count += len(stale_ids)
+                    pending_ids.extend(stale_ids)
+                    while len(pending_ids) >= GRAPH_BATCH_LIMIT:
+                        submit_batch(pending_ids[:GRAPH_BATCH_LIMIT])
+                        del pending_ids[:GRAPH_BATCH_LIMIT]
+            except Exception as e:
+                # 중간에 끊긴 스캔은 기간 일부만 담고 있으므로 집계하지 않음 (이미 제출한 인사이트 조회만 마무리)
+                logging.error(f"미디어 데이터 수집 오류: {e}")
+                scan_error = e
+            if pending_ids and scan_error is None:
+                submit_batch(pending_ids)
+
+            for fut in as_completed(insight_futures):
+                try:
+                    fetched.update(fut.result())
+                except Exception as e:
+                    logging.error(f"미디어 인사이트 수집 오류 ({len(insight_futures[fut])}개): {e}")
+            if account_future is not None:
+                account_future.result()
+
+        if scan_error is not None:
+            # 이미 받은 인사이트만 캐시에 남겨 재시도 때 다시 조회하지 않음
+            self._merge_cached_insights(list(fetched), fetched, len(fetched), now)
+            raise RuntimeError(f"미디어 목록 스캔 실패 ({len(media_data)}개 수집 후 중단): {scan_error}") from scan_error
+        media_insights = self._merge_cached_insights([media['id'] for media in media_data], fetched, stale_count, now)
+        logging.info(f"  수집 파이프라인 {time.perf_counter() - started:.1f}s (미디어 {len(media_data)}개)")
+        return media_data, media_insights
+
+    def _fetch_media_insight_batch(self, media_ids: List[str]) -> Dict:
+        metric_param = ','.join(MEDIA_INSIGHT_METRICS)
+        responses = self.graph.batch([
+            {'method': 'GET', 'relative_url': f"{media_id}/insights?metric={metric_param}"}
+            for media_id in media_ids
+        ])
+        
+        media_insights = {}
+        for media_id, body in zip(media_ids, responses):
+            if 'error' in body:
+                logging.warning(f"미디어 {media_id} 인사이트 수집 실패: {body['error'].get('message', '')}")
+                media_insights[media_id] = {}
+                continue
             
-            insights_data = {}
-            for insight in insights:
-                insight_dict = insight.export_all_data()
+            media_data = {}
+            for insight_dict in body.get('data', []):
                 metric_name = insight_dict['name']
                 values = insight_dict.get('values', [])
                 
                 if values:
-                    # 일별 데이터의 합계 계산
                     total_value = sum(float(v.get('value', 0)) for v in values)
-                    insights_data[metric_name] = int(total_value)
+                    media_data[metric_name] = int(total_value)
                 else:
-                    insights_data[metric_name] = 0
-            
-            return insights_data
-            
-        except Exception as e:
-            logging.error(f"인사이트 데이터 수집 오류: {e}")
-            return {}
-    
-    def fetch_media_insights(self, media_ids: List[str]) -> Dict:
-        """개별 미디어 인사이트 데이터 수집"""
-        try:
-            media_insights = {}
-            
-            for media_id in media_ids:
-                try:
-                    media = IGMedia(media_id)
-                    insights = media.get_insights(
-                        metric=[
-                            'impressions',
-                            'reach',
-                            'video_views',
-                            'saved',
-                            'shares'
-                        ]
-                    )
-                    
-                    media_data = {}
-                    for insight in insights:
-                        insight_dict = insight.export_all_data()
-                        metric_name = insight_dict['name']
-                        values = insight_dict.get('values', [])
-                        
-                        if values:
-                            total_value = sum(float(v.get('value', 0)) for v in values)
-                            media_data[metric_name] = int(total_value)
-                        else:
-                            media_data[metric_name] = 0
-                    
-                    media_insights[media_id] = media_data
-                    
-                except Exception as e:
-                    logging.warning(f"미디어 {media_id} 인사이트 수집 실패: {e}")
-                    media_insights[media_id] = {}
+                    media_data[metric_name] = 0
             
-            return media_insights
-            
-        except Exception as e:
-            logging.error(f"미디어 인사이트 수집 오류: {e}")
-            return {}
+            media_insights[media_id] = media_data
+        
+        return media_insights
     
     def calculate_monthly_stats(self, year: int, month: int) -> Dict:
         """특정 월의 통계 데이터 계산"""
@@ -190,17 +449,50 @@ class InstagramAnalytics:
         
         logging.info(f"📊 {year}년 {month}월 데이터 수집 중... ({start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')})")
         
-        # 1. 미디어 데이터 수집
-        media_data = self.fetch_media_data(start_date, end_date)
+        # 미디어 스캔 + 미디어별 인사이트 + 계정 인사이트(로컬 시계열에 없는 날짜만)를 동시에 수집
+        media_data, media_insights = self.collect_media_and_insights(
+            start_date, end_date, account_task=lambda: self.sync_account_series(start_date)
+        )
+        insights_data = self.account_month_summary(year, month)
+
+        return self.aggregate_monthly_stats(year, month, media_data, insights_data, media_insights)
+    
+    def calculate_range_stats(self, start_year: int, start_month: int, end_year: int, end_month: int) -> List[Dict]:
+        """
+        여러 달의 통계를 한 번에 계산 (백필용)
+        - 미디어 엣지는 전체 기간에 대해 한 번만 스캔 후 월별로 분할
+        - 전체 미디어 인사이트는 한 번에 조회, 계정 인사이트는 로컬 시계열을 한 번 동기화한 뒤 월별로 집계
+        """
+        start_date, _ = self.get_month_range(start_year, start_month)
+        _, end_date = self.get_month_range(end_year, end_month)
+        if start_date > end_date:
+            raise ValueError(f"잘못된 기간: {start_year}-{start_month:02d} ~ {end_year}-{end_month:02d}")
         
-        # 2. 계정 인사이트 수집
-        insights_data = self.fetch_insights_data(start_date, end_date)
+        logging.info(f"📊 {start_date.strftime('%Y-%m')} ~ {end_date.strftime('%Y-%m')} 백필 데이터 수집 중...")
+        
+        media_data, media_insights = self.collect_media_and_insights(
+            start_date, end_date, account_task=lambda: self.sync_account_series(start_date)
+        )
+        media_by_month = self.partition_media_by_month(media_data)
+
+        logging.info(f"  미디어 {len(media_data)}개, {len(media_by_month)}개월에 분포")
         
-        # 3. 미디어별 인사이트 수집
-        media_ids = [media['id'] for media in media_data]
-        media_insights = self.fetch_media_insights(media_ids)
+        results = []
+        year, month = start_year, start_month
+        while (year, month) <= (end_year, end_month):
+            results.append(self.aggregate_monthly_stats(
+                year, month, media_by_month.get((year, month), []),
+                self.account_month_summary(year, month), media_insights
+            ))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return results
+    
+    def aggregate_monthly_stats(self, year: int, month: int, media_data: List[Dict],
+                                insights_data: Dict, media_insights: Dict) -> Dict:
+        """한 달치 미디어/인사이트 데이터를 보고서 지표로 집계"""
+        start_date, end_date = self.get_month_range(year, month)
         
-        # 4. 통계 계산
+        # 통계 계산
         total_posts = len(media_data)
         total_likes = sum(media.get('like_count', 0) for media in media_data)
         total_comments = sum(media.get('comments_count', 0) for media in media_data)
@@ -208,9 +500,9 @@ class InstagramAnalytics:
         # 최고 좋아요 수
         max_likes = max([media.get('like_count', 0) for media in media_data]) if media_data else 0
         
-        # 총 공유수 (미디어 인사이트에서)
+        # 총 공유수 (이 달 미디어의 인사이트에서; media_insights는 여러 달이 공유할 수 있음)
         total_shares = sum(
-            insights.get('shares', 0) for insights in media_insights.values()
+            media_insights.get(media['id'], {}).get('shares', 0) for media in media_data
         )
         
         # 릴스 평균 조회수 (비디오 타입만)
@@ -227,12 +519,9 @@ class InstagramAnalytics:
         # 프로필 클릭 (인사이트에서)
         profile_clicks = insights_data.get('profile_views', 0)
         
-        # 팔로워 수 변화 (현재 팔로워 수)
-        current_followers = insights_data.get('follower_count', 0)
-        
-        # 이전 달과 비교하여 새 팔로워 수 계산 (간단한 추정)
-        # 실제로는 이전 달 데이터가 필요하지만, 여기서는 현재 팔로워 수만 반환
-        new_followers = current_followers  # 실제로는 이전 달 대비 증가분 계산 필요
+        # 월말 팔로워 수와 전월 대비 증가분 (account_month_summary에서 로컬 시계열로 계산)
+        current_followers = insights_data.get('current_followers')
+        new_followers = insights_data.get('new_followers', 0)
         
         return {
             'year': year,
@@ -277,7 +566,7 @@ def main():
         logging.info("📊 수집된 데이터:")
         logging.info(f"  📅 분석 기간: {stats['start_date']} ~ {stats['end_date']}")
         logging.info(f"  📝 총 게시물: {stats['total_posts']}개")
-        logging.info(f"  👥 현재 팔로워: {stats['current_followers']}명")
+        logging.info(f"  👥 현재 팔로워: {stats['current_followers'] if stats['current_followers'] is not None else '-'}명")
         logging.info(f"  📈 새 팔로워: {stats['new_followers']}명")
         logging.info(f"  ❤️ 최고 좋아요: {stats['max_likes']}개")
         logging.info(f"  🔄 총 공유: {stats['total_shares']}회")
@@ -294,4 +583,4 @@ def main():
         raise
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'instagram_analytics')
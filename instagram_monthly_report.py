@@ -12,12 +12,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
 import gspread
+from gspread.utils import absolute_range_name
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.errors import HttpError
 
 from instagram_analytics import InstagramAnalytics
+from job_checkpoint import JobCheckpoint
+from profiling import run_profiled
 
 # 로깅 설정
 logging.basicConfig(
@@ -36,10 +39,10 @@ CLIENT_SECRET_FILE = os.getenv('CLIENT_SECRET_FILE', os.path.join(BASE_DIR, 'sec
 TOKEN_SHEETS = os.getenv('TOKEN_SHEETS', os.path.join(BASE_DIR, 'secrets/token_sheets.json'))
 
 class InstagramMonthlyReport:
-    def __init__(self):
-        """Instagram 월간 보고서 클래스 초기화"""
-        self.instagram = InstagramAnalytics()
-        self.sheets_client = self._get_sheets_client()
+    def __init__(self, instagram: Optional[InstagramAnalytics] = None, sheets_client: Optional[gspread.Client] = None):
+        """Instagram 월간 보고서 클래스 초기화 (여러 계정 실행 시 클라이언트를 주입해 공유)"""
+        self.instagram = instagram or InstagramAnalytics()
+        self.sheets_client = sheets_client or self._get_sheets_client()
         
     def _get_sheets_client(self) -> gspread.Client:
         """Google Sheets 클라이언트 생성"""
@@ -63,29 +66,6 @@ class InstagramMonthlyReport:
         
         return gspread.authorize(creds)
     
-    def find_or_create_month_column(self, month_label: str) -> int:
-        """월 라벨에 해당하는 열 인덱스 찾기 또는 생성"""
-        try:
-            sheet = self.sheets_client.open_by_key(SPREADSHEET_ID)
-            worksheet = sheet.worksheet(SHEET_NAME)
-            
-            # 3행에서 월 라벨 찾기
-            row3 = worksheet.row_values(3)
-            
-            for idx, value in enumerate(row3, start=1):
-                if value and value.strip() == month_label:
-                    return idx
-            
-            # 월 라벨이 없으면 새 열에 추가
-            next_col = len(row3) + 1
-            col_letter = self._col_to_letter(next_col)
-            worksheet.update(f'{col_letter}3', month_label)
-            return next_col
-            
-        except Exception as e:
-            logging.error(f"월 열 찾기/생성 오류: {e}")
-            return 3  # 기본값
-    
     def _col_to_letter(self, col_idx: int) -> str:
         """열 인덱스를 A1 표기법으로 변환"""
         result = ""
@@ -94,53 +74,99 @@ class InstagramMonthlyReport:
             result = chr(65 + remainder) + result
         return result
     
-    def write_monthly_data(self, stats: Dict):
+    def stats_to_column(self, stats: Dict) -> List[List[Any]]:
+        """월 통계 → 4행부터 기록할 열 데이터"""
+        return [
+            [f"{stats['start_date']} ~ {stats['end_date']}"],  # 4행: 분석 기간
+            [stats['total_posts']],                           # 5행: 총 게시물 업로드 수
+            ['' if stats['current_followers'] is None else stats['current_followers']],  # 6행: 현재 팔로워 수 (모르면 빈 칸)
+            [stats['new_followers']],                         # 7행: 새 팔로워 수(전달대비)
+            [stats['max_likes']],                             # 8행: 좋아요 최고 수
+            [stats['total_shares']],                          # 9행: 총 공유수
+            [self.instagram.format_number(stats['avg_reels_views'])],  # 10행: 릴스 평균 조회수
+            [stats['profile_clicks']],                        # 11행: 프로필 클릭
+        ]
+    
+    def write_monthly_data(self, stats: Dict, checkpoint: Optional[JobCheckpoint] = None):
         """월간 데이터를 Google Sheets에 기록"""
+        self.write_months_data([stats], checkpoint)
+    
+    def write_months_data(self, stats_list: List[Dict], checkpoint: Optional[JobCheckpoint] = None):
+        """
+        여러 달의 데이터를 values batchUpdate 한 번으로 기록
+        - 3행(월 헤더)은 한 번만 읽고, 없는 달은 오른쪽 새 열에 헤더와 함께 기록
+        - checkpoint를 주면 보내기 전에 쓰기 내용을 로그에 남김 (실패 시 다음 실행에서 재전송)
+        """
         try:
-            month_label = f"{stats['month']}월"
-            col_idx = self.find_or_create_month_column(month_label)
-            col_letter = self._col_to_letter(col_idx)
-            
             sheet = self.sheets_client.open_by_key(SPREADSHEET_ID)
             worksheet = sheet.worksheet(SHEET_NAME)
             
-            # 데이터 준비 (4행부터 시작)
-            data = [
-                [f"{stats['start_date']} ~ {stats['end_date']}"],  # 4행: 분석 기간
-                [stats['total_posts']],                           # 5행: 총 게시물 업로드 수
-                [stats['current_followers']],                     # 6행: 현재 팔로워 수
-                [stats['new_followers']],                         # 7행: 새 팔로워 수(전달대비)
-                [stats['max_likes']],                             # 8행: 좋아요 최고 수
-                [stats['total_shares']],                          # 9행: 총 공유수
-                [self.instagram.format_number(stats['avg_reels_views'])],  # 10행: 릴스 평균 조회수
-                [stats['profile_clicks']],                        # 11행: 프로필 클릭
-            ]
-            
-            # 데이터 기록
-            start_row = 4
-            for i, row_data in enumerate(data):
-                row = start_row + i
-                worksheet.update(f'{col_letter}{row}', row_data)
-            
-            logging.info(f"✅ {month_label} 데이터 기록 완료")
+            data = self.month_column_updates(worksheet.row_values(3), stats_list, SHEET_NAME)
+            if data:
+                self.send_values(sheet, {'valueInputOption': 'RAW', 'data': data}, checkpoint)
+            
+            month_labels = ', '.join(f"{stats['month']}월" for stats in stats_list)
+            logging.info(f"✅ {month_labels} 데이터 기록 완료")
             
         except Exception as e:
             logging.error(f"Google Sheets 기록 오류: {e}")
             raise
     
-    def create_sheet_if_not_exists(self):
+    def send_values(self, spreadsheet: gspread.Spreadsheet, body: Dict, checkpoint: Optional[JobCheckpoint] = None):
+        """values batchUpdate 전송 (checkpoint가 있으면 전송 전 기록 → 성공 후 완료 표시)"""
+        write_id = checkpoint.begin_write({'spreadsheet_id': spreadsheet.id, 'body': body}) if checkpoint else None
+        spreadsheet.values_batch_update(body)
+        if checkpoint:
+            checkpoint.complete_write(write_id)
+    
+    def replay_pending_writes(self, checkpoint: JobCheckpoint):
+        """이전 실행에서 보내지 못한 시트 쓰기를 먼저 재전송"""
+        for write_id, payload in checkpoint.pending_writes():
+            self.sheets_client.open_by_key(payload['spreadsheet_id']).values_batch_update(payload['body'])
+            checkpoint.complete_write(write_id)
+            logging.info(f"♻️ 미전송 시트 쓰기 재전송 ({len(payload['body']['data'])}개 범위)")
+    
+    def checkpoint(self) -> JobCheckpoint:
+        return JobCheckpoint(f"instagram_monthly_report:{self.instagram.account_id}")
+    
+    def month_column_updates(self, row3: List[str], stats_list: List[Dict], sheet_name: Optional[str] = None) -> List[Dict]:
+        """
+        3행(월 헤더) 값 기준 batch update 데이터 생성
+        - 있는 달은 그 열, 없는 달은 오른쪽 새 열에 헤더와 함께 기록
+        - sheet_name을 주면 스프레드시트 단위 values batchUpdate용 '시트'!A1 범위로 생성
+        """
+        month_cols = {value.strip(): idx for idx, value in enumerate(row3, start=1) if value and value.strip()}
+        # A열은 항목 이름이므로 월 열은 B열부터
+        next_col = max(len(row3), 1) + 1
+        
+        def a1(range_name: str) -> str:
+            return absolute_range_name(sheet_name, range_name) if sheet_name else range_name
+        
+        data = []
+        for stats in stats_list:
+            month_label = f"{stats['month']}월"
+            col_idx = month_cols.get(month_label)
+            if col_idx is None:
+                col_idx = month_cols[month_label] = next_col
+                next_col += 1
+                data.append({'range': a1(f'{self._col_to_letter(col_idx)}3'), 'values': [[month_label]]})
+            col_letter = self._col_to_letter(col_idx)
+            data.append({'range': a1(f'{col_letter}4:{col_letter}11'), 'values': self.stats_to_column(stats)})
+        return data
+    
+    def create_sheet_if_not_exists(self, spreadsheet_id: str = SPREADSHEET_ID, sheet_name: str = SHEET_NAME):
         """시트가 없으면 생성"""
         try:
-            sheet = self.sheets_client.open_by_key(SPREADSHEET_ID)
+            sheet = self.sheets_client.open_by_key(spreadsheet_id)
             
             # 시트 존재 여부 확인
             try:
-                worksheet = sheet.worksheet(SHEET_NAME)
-                logging.info(f"✅ 시트 '{SHEET_NAME}' 이미 존재")
+                worksheet = sheet.worksheet(sheet_name)
+                logging.info(f"✅ 시트 '{sheet_name}' 이미 존재")
                 return worksheet
             except:
                 # 시트가 없으면 생성
-                worksheet = sheet.add_worksheet(title=SHEET_NAME, rows=20, cols=10)
+                worksheet = sheet.add_worksheet(title=sheet_name, rows=20, cols=10)
                 
                 # 헤더 설정
                 headers = [
@@ -168,7 +194,7 @@ class InstagramMonthlyReport:
                 for i, item in enumerate(row_items, 4):
                     worksheet.update(f'A{i}', item)
                 
-                logging.info(f"✅ 새 시트 '{SHEET_NAME}' 생성 완료")
+                logging.info(f"✅ 새 시트 '{sheet_name}' 생성 완료")
                 return worksheet
                 
         except Exception as e:
@@ -180,7 +206,9 @@ class InstagramMonthlyReport:
         try:
             logging.info("📱 Instagram 월간 보고서 시작")
             
-            # 시트 준비
+            # 이전 실행이 남긴 미전송 쓰기 재전송 → 시트 준비
+            checkpoint = self.checkpoint()
+            self.replay_pending_writes(checkpoint)
             self.create_sheet_if_not_exists()
             
             # 분석할 연월 결정
@@ -190,17 +218,24 @@ class InstagramMonthlyReport:
             
             logging.info(f"📊 {year}년 {month}월 데이터 분석 중...")
             
-            # 데이터 수집
-            stats = self.instagram.calculate_monthly_stats(year, month)
+            # 데이터 수집 (이전 실행에서 수집을 마쳤으면 체크포인트 재사용)
+            unit = f"{year}-{month:02d}"
+            stats = checkpoint.fetched(unit)
+            if stats is None:
+                stats = self.instagram.calculate_monthly_stats(year, month)
+                checkpoint.record_fetch(unit, stats)
+            else:
+                logging.info(f"♻️ 체크포인트의 {unit} 수집 결과 재사용")
             
             # Google Sheets에 기록
-            self.write_monthly_data(stats)
+            self.write_monthly_data(stats, checkpoint)
+            checkpoint.finish()
             
             # 결과 출력
             logging.info("📊 분석 결과:")
             logging.info(f"  📅 분석 기간: {stats['start_date']} ~ {stats['end_date']}")
             logging.info(f"  📝 총 게시물: {stats['total_posts']}개")
-            logging.info(f"  👥 현재 팔로워: {stats['current_followers']}명")
+            logging.info(f"  👥 현재 팔로워: {stats['current_followers'] if stats['current_followers'] is not None else '-'}명")
             logging.info(f"  📈 새 팔로워: {stats['new_followers']}명")
             logging.info(f"  ❤️ 최고 좋아요: {stats['max_likes']}개")
             logging.info(f"  🔄 총 공유: {stats['total_shares']}회")
@@ -212,17 +247,77 @@ class InstagramMonthlyReport:
         except Exception as e:
             logging.error(f"❌ 월간 보고서 오류: {e}")
             raise
+    
+    def run_backfill(self, start_year: int, start_month: int, end_year: int = None, end_month: int = None):
+        """
+        여러 달 백필: 미디어 엣지 1회 스캔 → 월별 분할 → 전체 인사이트 동시 수집 → batch_update 1회
+        시트가 연도별(월 라벨 'N월')이므로 한 번에 최대 12개월
+        """
+        try:
+            if end_year is None or end_month is None:
+                start_date, _ = self.instagram.get_last_month_range()
+                end_year, end_month = start_date.year, start_date.month
+            
+            span = (end_year - start_year) * 12 + (end_month - start_month) + 1
+            if not 1 <= span <= 12:
+                raise ValueError(f"백필 범위는 1~12개월이어야 합니다: {start_year}-{start_month:02d} ~ {end_year}-{end_month:02d}")
+            
+            logging.info(f"📱 Instagram 백필 시작 ({span}개월)")
+            checkpoint = self.checkpoint()
+            self.replay_pending_writes(checkpoint)
+            self.create_sheet_if_not_exists()
+            
+            # 이전 실행에서 수집을 마친 달은 건너뛰고, 남은 달의 구간만 수집
+            months = []
+            year, month = start_year, start_month
+            for _ in range(span):
+                months.append((year, month))
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            units = {ym: f"{ym[0]}-{ym[1]:02d}" for ym in months}
+            missing = [ym for ym in months if checkpoint.fetched(units[ym]) is None]
+            if len(missing) < span:
+                logging.info(f"♻️ 체크포인트의 수집 결과 재사용: {span - len(missing)}개월 (새로 수집 {len(missing)}개월)")
+            if missing:
+                (first_year, first_month), (last_year, last_month) = missing[0], missing[-1]
+                for stats in self.instagram.calculate_range_stats(first_year, first_month, last_year, last_month):
+                    checkpoint.record_fetch(f"{stats['year']}-{stats['month']:02d}", stats)
+            stats_list = [checkpoint.fetched(units[ym]) for ym in months]
+            self.write_months_data(stats_list, checkpoint)
+            checkpoint.finish()
+            
+            for stats in stats_list:
+                logging.info(f"  📅 {stats['start_date']} ~ {stats['end_date']}: 게시물 {stats['total_posts']}개, "
+                             f"공유 {stats['total_shares']}회, 프로필 클릭 {stats['profile_clicks']}회")
+            
+            logging.info("✅ Instagram 백필 완료!")
+            
+        except Exception as e:
+            logging.error(f"❌ 백필 오류: {e}")
+            raise
+
+def parse_year_month(value: str) -> tuple:
+    """'YYYY-MM' → (연, 월)"""
+    year, month = value.strip().split('-')
+    return int(year), int(month)
 
 def main():
     """메인 함수"""
     try:
-        # Instagram 월간 보고서 실행
         report = InstagramMonthlyReport()
-        report.run_monthly_report()
+        
+        # BACKFILL_FROM=YYYY-MM (선택: BACKFILL_TO=YYYY-MM, 기본 지난달)이면 여러 달 백필
+        backfill_from = os.getenv('BACKFILL_FROM', '').strip()
+        if backfill_from:
+            backfill_to = os.getenv('BACKFILL_TO', '').strip()
+            end_year, end_month = parse_year_month(backfill_to) if backfill_to else (None, None)
+            report.run_backfill(*parse_year_month(backfill_from), end_year, end_month)
+        else:
+            # Instagram 월간 보고서 실행
+            report.run_monthly_report()
         
     except Exception as e:
         logging.error(f"❌ 메인 함수 오류: {e}")
         raise
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'instagram_monthly_report')
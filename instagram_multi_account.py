@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+여러 Instagram 비즈니스 계정 월간 보고서를 한 번의 실행으로 처리
+- 계정 목록: INSTAGRAM_ACCOUNTS_FILE (JSON 파일) 또는 INSTAGRAM_ACCOUNTS_JSON (JSON 문자열)
+    [{"name": "브랜드A", "account_id": "1784...", "access_token_env": "IG_TOKEN_BRAND_A",
+      "spreadsheet_id": "...", "sheet_name": "인스타그램_브랜드A"}, ...]
+  (access_token을 직접 넣을 수도 있지만 시크릿은 access_token_env로 환경 변수 이름을 지정하는 것을 권장)
+- 모든 계정이 Graph API 커넥션 풀 하나를 공유 (GraphClient.with_token)
+- 계정별로 동시 실행, 한 계정의 실패는 해당 계정만 실패 처리
+- Sheets 기록은 스프레드시트 단위로 모아 헤더 읽기 1회 + values batchUpdate 1회
+- 계정별 수집 결과와 시트 쓰기를 체크포인트(WAL)에 남겨, 재실행 시 실패한 계정만 다시 수집하고 미전송 쓰기는 재전송
+- Cloud Run Job 태스크가 여러 개면 계정을 태스크별로 나눠 수집하고 마지막 태스크가 스프레드시트별로 한 번에 기록 (task_shards)
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from gspread.utils import absolute_range_name
+
+from graph_client import GraphClient
+from instagram_analytics import FACEBOOK_ACCESS_TOKEN, FACEBOOK_APP_SECRET, SPREADSHEET_ID, SHEET_NAME, InstagramAnalytics
+from instagram_monthly_report import InstagramMonthlyReport, parse_year_month
+from job_checkpoint import JobCheckpoint
+from profiling import run_profiled
+from task_shards import ShardRun, sharding_enabled
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+
+INSTAGRAM_ACCOUNTS_FILE = os.getenv('INSTAGRAM_ACCOUNTS_FILE')
+INSTAGRAM_ACCOUNTS_JSON = os.getenv('INSTAGRAM_ACCOUNTS_JSON')
+# 동시에 처리할 계정 수 (계정마다 INSTAGRAM_MAX_WORKERS + 1개 스레드를 추가로 사용하므로 GRAPH_POOL_SIZE와 함께 조정)
+INSTAGRAM_ACCOUNT_WORKERS = int(os.getenv('INSTAGRAM_ACCOUNT_WORKERS', '4'))
+
+def load_accounts() -> List[Dict]:
+    """계정 설정 로드 및 검증 (토큰은 환경 변수에서 해석)"""
+    if INSTAGRAM_ACCOUNTS_FILE:
+        with open(INSTAGRAM_ACCOUNTS_FILE, encoding='utf-8') as f:
+            raw = json.load(f)
+    elif INSTAGRAM_ACCOUNTS_JSON:
+        raw = json.loads(INSTAGRAM_ACCOUNTS_JSON)
+    else:
+        raise ValueError("INSTAGRAM_ACCOUNTS_FILE 또는 INSTAGRAM_ACCOUNTS_JSON을 설정하세요.")
+
+    accounts = []
+    targets = set()
+    for item in raw:
+        account_id = str(item['account_id'])
+        token = item.get('access_token') or os.getenv(item.get('access_token_env', ''), '') or FACEBOOK_ACCESS_TOKEN
+        if not token:
+            raise ValueError(f"계정 {account_id}의 액세스 토큰이 없습니다 (access_token_env 확인)")
+        account = {
+            'name': item.get('name', account_id),
+            'account_id': account_id,
+            'access_token': token,
+            'app_secret': os.getenv(item['app_secret_env'], '') if item.get('app_secret_env') else FACEBOOK_APP_SECRET,
+            'spreadsheet_id': item.get('spreadsheet_id', SPREADSHEET_ID),
+            'sheet_name': item.get('sheet_name', SHEET_NAME),
+        }
+        # 같은 시트에 두 계정을 쓰면 월 열이 겹침
+        target = (account['spreadsheet_id'], account['sheet_name'])
+        if target in targets:
+            raise ValueError(f"시트가 중복 지정되었습니다: {target[1]} ({account['name']})")
+        targets.add(target)
+        accounts.append(account)
+    return accounts
+
+class MultiAccountRunner:
+    def __init__(self, accounts: List[Dict], report: Optional[InstagramMonthlyReport] = None):
+        self.accounts = accounts
+        # 첫 계정 토큰으로 세션을 만들고 나머지는 with_token으로 같은 풀 공유
+        first = accounts[0]
+        self.graph = GraphClient(first['access_token'], app_secret=first['app_secret'])
+        self.analytics = {
+            account['account_id']: InstagramAnalytics(
+                account_id=account['account_id'],
+                graph=self.graph.with_token(account['access_token'], account['app_secret']),
+            )
+            for account in accounts
+        }
+        # Sheets 클라이언트/열 계산 로직은 단일 계정 보고서와 공유
+        self.report = report or InstagramMonthlyReport(instagram=self.analytics[first['account_id']])
+
+    def _run_account(self, account: Dict, year: int, month: int) -> Dict:
+        started = time.perf_counter()
+        stats = self.analytics[account['account_id']].calculate_monthly_stats(year, month)
+        return {'account': account, 'stats': stats, 'seconds': time.perf_counter() - started}
+
+    def collect(self, year: int, month: int, checkpoint: Optional[JobCheckpoint] = None,
+                accounts: Optional[List[Dict]] = None) -> List[Dict]:
+        """계정 통계를 동시에 수집 (기본: 전체 계정, 실패한 계정은 error에 기록, 체크포인트에 있는 계정은 재사용)"""
+        results = []
+        pending = []
+        for account in self.accounts if accounts is None else accounts:
+            stats = checkpoint.fetched(account['account_id']) if checkpoint else None
+            if stats is not None:
+                logging.info(f"♻️ [{account['name']}] 체크포인트의 수집 결과 재사용")
+                results.append({'account': account, 'stats': stats, 'seconds': 0.0})
+            else:
+                pending.append(account)
+        with ThreadPoolExecutor(max_workers=max(1, min(INSTAGRAM_ACCOUNT_WORKERS, len(pending)))) as pool:
+            started = {}
+            futures = {}
+            for account in pending:
+                started[account['account_id']] = time.perf_counter()
+                futures[pool.submit(self._run_account, account, year, month)] = account
+            for fut in as_completed(futures):
+                account = futures[fut]
+                try:
+                    results.append(fut.result())
+                    if checkpoint:
+                        checkpoint.record_fetch(account['account_id'], results[-1]['stats'])
+                    logging.info(f"✅ [{account['name']}] 수집 완료")
+                except Exception as e:
+                    logging.error(f"❌ [{account['name']}] 수집 실패: {e}")
+                    results.append({'account': account, 'stats': None, 'error': str(e),
+                                    'seconds': time.perf_counter() - started[account['account_id']]})
+        order = {account['account_id']: i for i, account in enumerate(self.accounts)}
+        results.sort(key=lambda r: order[r['account']['account_id']])
+        return results
+
+    def write(self, results: List[Dict], checkpoint: Optional[JobCheckpoint] = None):
+        """성공한 계정 결과를 스프레드시트별로 모아 기록 (시트 생성 → 3행 일괄 읽기 → batchUpdate 1회)"""
+        by_spreadsheet: Dict[str, List[Dict]] = {}
+        for result in results:
+            if result.get('stats'):
+                by_spreadsheet.setdefault(result['account']['spreadsheet_id'], []).append(result)
+
+        for spreadsheet_id, group in by_spreadsheet.items():
+            started = time.perf_counter()
+            try:
+                spreadsheet = self.report.sheets_client.open_by_key(spreadsheet_id)
+                existing = {worksheet.title for worksheet in spreadsheet.worksheets()}
+                for result in group:
+                    if result['account']['sheet_name'] not in existing:
+                        self.report.create_sheet_if_not_exists(spreadsheet_id, result['account']['sheet_name'])
+
+                header_rows = spreadsheet.values_batch_get(
+                    [absolute_range_name(result['account']['sheet_name'], '3:3') for result in group]
+                ).get('valueRanges', [])
+                data = []
+                for result, value_range in zip(group, header_rows):
+                    row3 = (value_range.get('values') or [[]])[0]
+                    data.extend(self.report.month_column_updates(row3, [result['stats']], result['account']['sheet_name']))
+                self.report.send_values(spreadsheet, {'valueInputOption': 'RAW', 'data': data}, checkpoint)
+                logging.info(f"✅ 스프레드시트 {spreadsheet_id}: {len(group)}개 계정 기록 ({time.perf_counter() - started:.1f}s)")
+            except Exception as e:
+                logging.error(f"❌ 스프레드시트 {spreadsheet_id} 기록 실패: {e}")
+                for result in group:
+                    result['error'] = f"Sheets 기록 실패: {e}"
+
+    def run(self, year: int, month: int) -> List[Dict]:
+        # 같은 달 재실행이면 이전 실행의 미전송 쓰기부터 재전송하고, 수집을 마친 계정은 건너뜀
+        checkpoint = JobCheckpoint(f"instagram_multi_account:{year}-{month:02d}")
+        self.report.replay_pending_writes(checkpoint)
+        results = self.collect(year, month, checkpoint)
+        self.write(results, checkpoint)
+        if not any(result.get('error') for result in results):
+            checkpoint.finish()
+        return results
+
+    def run_shard(self, year: int, month: int, shard: ShardRun) -> List[Dict]:
+        """
+        Cloud Run Job 태스크 하나의 몫: 계정 id를 결정적으로 분할해 자기 계정만 수집 → 샤드 파일 저장
+        - 모든 샤드가 모이면 마지막 태스크가 전체 결과를 스프레드시트별 batchUpdate 1회로 기록
+        """
+        by_id = {account['account_id']: account for account in self.accounts}
+        mine = shard.mine(by_id)
+        previous = shard.previous_results()
+        results = [{'account': by_id[account_id], 'stats': previous[account_id], 'seconds': 0.0}
+                   for account_id in mine if account_id in previous]
+        if results:
+            logging.info(f"♻️ 이전 시도의 샤드 결과 재사용: {len(results)}개 계정")
+        results += self.collect(year, month, accounts=[by_id[account_id] for account_id in mine if account_id not in previous])
+        shard.save({result['account']['account_id']: result['stats'] for result in results if result.get('stats')},
+                   [result['account']['account_id'] for result in results if result.get('error')])
+        shard.merge_if_ready(lambda merged: self.write_merged(year, month, merged))
+        return results
+
+    def write_merged(self, year: int, month: int, merged: Dict[str, Dict]):
+        """샤드에서 모은 계정별 통계 기록 (쓰기는 체크포인트 WAL 경유, 실패하면 예외 → 합치기 재시도)"""
+        by_id = {account['account_id']: account for account in self.accounts}
+        results = [{'account': by_id[account_id], 'stats': stats, 'seconds': 0.0}
+                   for account_id, stats in merged.items() if account_id in by_id]
+        checkpoint = JobCheckpoint(f"instagram_multi_account:{year}-{month:02d}")
+        self.report.replay_pending_writes(checkpoint)
+        self.write(results, checkpoint)
+        errors = [result['error'] for result in results if result.get('error')]
+        if errors:
+            raise RuntimeError(f"샤드 결과 기록 실패: {errors[0]}")
+        checkpoint.finish()
+
+def print_summary(results: List[Dict]):
+    logging.info("📊 계정별 결과:")
+    for result in results:
+        status = f"❌ {result['error']}" if result.get('error') else "✅"
+        stats = result.get('stats') or {}
+        logging.info(f"  {result['account']['name']:<20} {result['seconds']:6.1f}s  "
+                     f"게시물 {stats.get('total_posts', '-')}  팔로워 {'-' if stats.get('current_followers') is None else stats['current_followers']}  {status}")
+
+def main():
+    """메인 함수"""
+    accounts = load_accounts()
+    logging.info(f"📱 Instagram 다계정 월간 보고서 시작 ({len(accounts)}개 계정)")
+
+    runner = MultiAccountRunner(accounts)
+    analysis_month = os.getenv('ANALYSIS_MONTH_YM', '').strip()
+    if analysis_month:
+        year, month = parse_year_month(analysis_month)
+    else:
+        start_date, _ = runner.report.instagram.get_last_month_range()
+        year, month = start_date.year, start_date.month
+
+    if sharding_enabled():
+        results = runner.run_shard(year, month, ShardRun(f"instagram_multi_account:{year}-{month:02d}"))
+    else:
+        results = runner.run(year, month)
+    print_summary(results)
+
+    failed = [result['account']['name'] for result in results if result.get('error')]
+    if failed:
+        raise RuntimeError(f"{len(failed)}개 계정 실패: {', '.join(failed)}")
+    logging.info("✅ Instagram 다계정 월간 보고서 완료!")
+
+if __name__ == '__main__':
+    run_profiled(main, 'instagram_multi_account')
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+잡 체크포인트 (로컬 write-ahead log)
+- 잡별 append-only JSONL 파일 (STATE_DIR/checkpoints/<잡>.wal), 기록마다 flush + fsync
+    · {"type": "fetched", "unit": "2025-09", "data": {...}}  수집을 마친 단위(월, 계정×월 등)의 결과
+    · {"type": "write", "id": "...", "payload": {...}}       보내기 직전의 시트 쓰기
+    · {"type": "written", "id": "..."}                       쓰기 완료
+- 실패한 실행 뒤 재시도하면
+    · 완료되지 않은 쓰기를 먼저 재전송 (replay)
+    · 이미 수집한 단위는 다시 조회하지 않음
+- 실행이 전부 성공하면 finish()로 로그 삭제, CHECKPOINT_MAX_AGE_HOURS보다 오래된 기록은 무시
+  (며칠 지난 실패 기록으로 새 데이터를 덮어쓰지 않도록)
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from env_config import STATE_DIR
+
+CHECKPOINT_DIR = os.path.join(STATE_DIR, 'checkpoints')
+CHECKPOINT_MAX_AGE_HOURS = float(os.getenv('CHECKPOINT_MAX_AGE_HOURS', '24'))
+
+def _json_default(value):
+    # numpy 스칼라 등 (.item()으로 파이썬 기본형 변환)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON 직렬화 불가: {type(value).__name__}")
+
+class JobCheckpoint:
+    def __init__(self, job: str, path: Optional[str] = None, max_age_hours: float = CHECKPOINT_MAX_AGE_HOURS):
+        self.path = path or os.path.join(CHECKPOINT_DIR, f"{job.replace(':', '_')}.wal")
+        self.max_age = max_age_hours * 3600
+        self._fetched: Dict[str, Dict] = {}
+        self._writes: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        cutoff = time.time() - self.max_age
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 기록 도중 중단된 마지막 줄
+                    continue
+                if record.get('ts', 0) < cutoff:
+                    continue
+                kind = record.get('type')
+                if kind == 'fetched':
+                    self._fetched[record['unit']] = record['data']
+                elif kind == 'write':
+                    self._writes[record['id']] = record['payload']
+                elif kind == 'written':
+                    self._writes.pop(record['id'], None)
+        if self._fetched or self._writes:
+            logging.info(f"♻️ 체크포인트 복구: 수집 완료 {len(self._fetched)}건, 미전송 쓰기 {len(self._writes)}건 ({self.path})")
+
+    def _append(self, record: Dict):
+        record['ts'] = time.time()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def fetched(self, unit: str) -> Optional[Dict]:
+        return self._fetched.get(unit)
+
+    def record_fetch(self, unit: str, data: Dict):
+        self._append({'type': 'fetched', 'unit': unit, 'data': data})
+        self._fetched[unit] = data
+
+    def pending_writes(self) -> List[Tuple[str, Dict]]:
+        return list(self._writes.items())
+
+    def begin_write(self, payload: Dict) -> str:
+        """쓰기 내용을 먼저 로그에 남기고 id 반환 (전송 성공 후 complete_write)"""
+        write_id = uuid.uuid4().hex
+        self._append({'type': 'write', 'id': write_id, 'payload': payload})
+        self._writes[write_id] = payload
+        return write_id
+
+    def complete_write(self, write_id: str):
+        self._append({'type': 'written', 'id': write_id})
+        self._writes.pop(write_id, None)
+
+    def finish(self):
+        """잡 전체 성공 → 로그 삭제"""
+        self._fetched.clear()
+        self._writes.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
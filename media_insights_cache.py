@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Instagram 미디어 인사이트 영속 캐시
+- 미디어 ID별 마지막 조회 시각과 인사이트 값을 계정별 JSON 파일에 저장 (STATE_DIR/media_insights/<계정ID>.json)
+- 게시물 나이에 따른 갱신 주기
+    · 48시간 미만: 1시간마다
+    · 30일 미만  : 하루마다
+    · 30일 이상  : 30일이 지난 뒤 한 번 더 조회하고 이후 고정
+- 저장은 임시 파일에 쓴 뒤 os.replace로 교체 (중간에 중단돼도 기존 캐시 유지)
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from env_config import STATE_DIR
+
+MEDIA_INSIGHTS_CACHE_DIR = os.getenv('MEDIA_INSIGHTS_CACHE_DIR', os.path.join(STATE_DIR, 'media_insights'))
+
+# (게시물 나이 상한, 갱신 주기) — 위에서부터 처음 맞는 구간 적용
+INSIGHTS_REFRESH_TIERS = [
+    (timedelta(hours=48), timedelta(hours=1)),
+    (timedelta(days=30), timedelta(days=1)),
+]
+INSIGHTS_FROZEN_AFTER = timedelta(days=30)
+
+def media_insights_cache_path(account_id: str) -> str:
+    return os.path.join(MEDIA_INSIGHTS_CACHE_DIR, f"{account_id}.json")
+
+def is_fresh(posted_at: datetime, fetched_at: datetime, now: datetime) -> bool:
+    """캐시 값이 아직 유효한지 (모든 시각은 UTC 기준 naive datetime)"""
+    if fetched_at - posted_at >= INSIGHTS_FROZEN_AFTER:
+        return True
+    age = now - posted_at
+    for max_age, ttl in INSIGHTS_REFRESH_TIERS:
+        if age < max_age:
+            return now - fetched_at < ttl
+    # 마지막 조회가 고정 시점 이전 → 한 번 더 조회해 최종값으로 고정
+    return False
+
+class MediaInsightsCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"미디어 인사이트 캐시 로드 실패 → 빈 캐시로 시작 ({self.path}): {e}")
+            self.entries = {}
+
+    def stale_ids(self, posted_at: Dict[str, datetime], now: datetime, force_refresh: bool = False) -> List[str]:
+        """조회가 필요한 미디어 ID 목록 (캐시에 없거나 갱신 주기가 지난 것)"""
+        if force_refresh:
+            return list(posted_at)
+        stale = []
+        for media_id, posted in posted_at.items():
+            entry = self.entries.get(media_id)
+            if entry is None or not is_fresh(posted, datetime.fromisoformat(entry['fetched_at']), now):
+                stale.append(media_id)
+        return stale
+
+    def get_many(self, media_ids: Iterable[str]) -> Dict[str, Dict]:
+        return {media_id: self.entries[media_id]['insights'] for media_id in media_ids if media_id in self.entries}
+
+    def put_many(self, insights: Dict[str, Dict], now: datetime):
+        """조회 결과 반영 (빈 결과 = 조회 실패는 저장하지 않아 다음 실행에서 재시도)"""
+        for media_id, values in insights.items():
+            if values:
+                self.entries[media_id] = {'fetched_at': now.isoformat(timespec='seconds'), 'insights': values}
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+결과 출력 sink (Google Sheets / SQLite / CSV / Parquet)
+- 잡마다 환경 변수로 선택 (예: VIDEO_ANALYSIS_SINKS=sheets,parquet, YT_MONTHLY_SINKS=sheets,sqlite)
+- Table: 표 이름, 열 (이름, int/float/str), 키 열(있으면 키 기준 upsert, 없으면 매 실행 전체 교체)
+    · bulk=True 표(카탈로그 전체 등)는 Sheets(셀 한도)에는 쓰지 않고 로컬 sink에만 기록
+- Sinks.write_table(table, rows): rows(iterable, 제너레이터 가능)를 SINK_CHUNK_ROWS씩 나눠 모든 sink에 차례로 전달
+    · 표 전체를 메모리에 두 번 만들지 않음 (Sheets는 한 번의 update가 필요하므로 값만 모음)
+    · 모두 끝나면 sink별 커밋(SQLite COMMIT, 파일은 임시 파일 → os.replace)
+    · 커밋은 실패하기 쉬운 원격 sink(Sheets)부터 → 로컬 sink 순서. 커밋 전에 실패하면 모든 sink를 되돌리고,
+      커밋 도중 실패하면 아직 커밋하지 않은 sink만 되돌림 (이미 커밋한 sink는 sink 간 원자성 없이 그대로 남음)
+- 로컬 파일은 OUTPUT_DIR 아래: <표>.csv, <표>.parquet, <잡>.sqlite
+- Parquet은 선택 의존성 pyarrow (없는데 parquet을 고르면 수집 전에 바로 오류)
+"""
+
+import os
+import csv
+import sqlite3
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+OUTPUT_DIR = os.getenv('OUTPUT_DIR', os.path.join(os.getenv('BASE_DIR', os.getcwd()), 'output'))
+SINK_CHUNK_ROWS = int(os.getenv('SINK_CHUNK_ROWS', '5000'))
+SHEETS_MAX_CELLS = 10_000_000  # 스프레드시트 전체 셀 한도
+
+SINK_NAMES = ('sheets', 'sqlite', 'csv', 'parquet')
+SQLITE_TYPES = {int: 'INTEGER', float: 'REAL', str: 'TEXT'}
+
+@dataclass
+class Table:
+    name: str
+    columns: List[Tuple[str, type]]
+    key: Optional[str] = None           # 있으면 키 기준 upsert (없으면 전체 교체)
+    sheet_name: Optional[str] = None    # Sheets 워크시트 이름 (없으면 name)
+    bulk: bool = False                  # Sheets에는 쓰지 않는 대용량 표
+
+    @property
+    def headers(self) -> List[str]:
+        return [name for name, _ in self.columns]
+
+def typed_row(table: Table, row: Sequence) -> list:
+    """숫자 열의 빈 칸('')은 None으로 (SQLite NULL / Parquet null)"""
+    return [None if value == '' and kind is not str else value for value, (_, kind) in zip(row, table.columns)]
+
+def chunks(rows: Iterable[Sequence], size: int):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+# ──────────────────────────────────────────────────────────────────────────────
+# sink 구현 (open(table) → writer: write(chunk) / commit() / abort())
+# ──────────────────────────────────────────────────────────────────────────────
+
+class SheetsSink:
+    """표 하나 = 워크시트 하나 (전체 지우고 헤더+데이터를 update 한 번으로)"""
+    name = 'sheets'
+    summary_only = True
+
+    def __init__(self, client: Callable[[], Any], spreadsheet_id: str):
+        self.client = client                # 처음 기록할 때 인증하도록 gspread 클라이언트를 지연 생성
+        self.spreadsheet_id = spreadsheet_id
+
+    def open(self, table: Table):
+        return _SheetsWriter(self, table)
+
+class _SheetsWriter:
+    def __init__(self, sink: SheetsSink, table: Table):
+        self.sink = sink
+        self.table = table
+        self.values = [table.headers]
+
+    def write(self, rows: List[Sequence]):
+        if (len(self.values) + len(rows)) * len(self.table.columns) > SHEETS_MAX_CELLS:
+            raise ValueError(f"{self.table.name}: Sheets 셀 한도({SHEETS_MAX_CELLS:,}) 초과 → 로컬 sink(bulk 표)로 기록하세요")
+        self.values.extend(['' if value is None else value for value in row] for row in rows)
+
+    def commit(self):
+        import gspread
+        sh = self.sink.client().open_by_key(self.sink.spreadsheet_id)
+        sheet_name = self.table.sheet_name or self.table.name
+        try:
+            ws = sh.worksheet(sheet_name)
+        except gspread.WorksheetNotFound:
+            ws = sh.add_worksheet(title=sheet_name, rows=max(1000, len(self.values)), cols=len(self.table.columns))
+        # 전체 지우고 헤더+데이터 한번에 업데이트 (빠름)
+        ws.clear()
+        ws.update('A1', self.values, value_input_option='RAW')
+
+    def abort(self):
+        self.values = []
+
+class SQLiteSink:
+    """<잡>.sqlite 파일의 표 (WAL 모드, 표 하나 = 트랜잭션 하나)"""
+    name = 'sqlite'
+    summary_only = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def open(self, table: Table):
+        return _SQLiteWriter(self.path, table)
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class _SQLiteWriter:
+    def __init__(self, path: str, table: Table):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.table = table
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('BEGIN IMMEDIATE')
+        columns = ', '.join(f"{_quote(name)} {SQLITE_TYPES[kind]}" for name, kind in table.columns)
+        if table.key:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table.name)} ({columns}, PRIMARY KEY ({_quote(table.key)}))")
+        else:
+            # 같은 트랜잭션 안에서 교체 → 다른 연결은 커밋 전까지 이전 표를 봄
+            self.conn.execute(f"DROP TABLE IF EXISTS {_quote(table.name)}")
+            self.conn.execute(f"CREATE TABLE {_quote(table.name)} ({columns})")
+        self.sql = f"INSERT OR REPLACE INTO {_quote(table.name)} VALUES ({', '.join('?' * len(table.columns))})"
+
+    def write(self, rows: List[Sequence]):
+        self.conn.executemany(self.sql, [typed_row(self.table, row) for row in rows])
+
+    def commit(self):
+        self.conn.execute('COMMIT')
+        self.conn.close()
+
+    def abort(self):
+        self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+class CsvSink:
+    name = 'csv'
+    summary_only = False
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def open(self, table: Table):
+        return _CsvWriter(os.path.join(self.root, f"{table.name}.csv"), table)
+
+class _CsvWriter:
+    def __init__(self, path: str, table: Table):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.table = table
+        self.tmp_path = f"{path}.tmp{os.getpid()}"
+        self.f = open(self.tmp_path, 'w', encoding='utf-8-sig', newline='')  # 엑셀에서 한글이 깨지지 않도록 BOM
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(table.headers)
+        self.key_index = table.headers.index(table.key) if table.key else None
+        self.keys = set()
+
+    def write(self, rows: List[Sequence]):
+        if self.key_index is not None:
+            self.keys.update(str(row[self.key_index]) for row in rows)
+        self.writer.writerows(rows)
+
+    def commit(self):
+        if self.key_index is not None and os.path.exists(self.path):
+            # upsert: 이번에 쓰지 않은 키의 기존 행을 뒤에 이어 붙임 (기존 파일도 한 줄씩 스트리밍)
+            with open(self.path, encoding='utf-8-sig', newline='') as old:
+                reader = csv.reader(old)
+                if next(reader, None) == self.table.headers:
+                    self.writer.writerows(row for row in reader if row[self.key_index] not in self.keys)
+                else:
+                    logging.warning(f"⚠️ {self.path}: 열 구성이 달라 기존 행을 버리고 새로 씀")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.f.close()
+        os.remove(self.tmp_path)
+
+class ParquetSink:
+    name = 'parquet'
+    summary_only = False
+
+    def __init__(self, root: str):
+        if pa is None:
+            raise ValueError("parquet sink에는 pyarrow가 필요합니다 (pip install pyarrow)")
+        self.root = root
+
+    def open(self, table: Table):
+        return _ParquetWriter(os.path.join(self.root, f"{table.name}.parquet"), table)
+
+class _ParquetWriter:
+    def __init__(self, path: str, table: Table):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+        self.path = path
+        self.table = table
+        self.schema = pa.schema([(name, arrow_types[kind]) for name, kind in table.columns])
+        self.tmp_path = f"{path}.tmp{os.getpid()}"
+        # 청크 하나 = row group 하나
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression='zstd')
+        self.keys = []
+
+    def write(self, rows: List[Sequence]):
+        columns = list(zip(*(typed_row(self.table, row) for row in rows)))
+        batch = pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+                                     schema=self.schema)
+        if self.table.key:
+            self.keys.append(batch.column(self.table.key))
+        self.writer.write_table(batch)
+
+    def commit(self):
+        if self.table.key and os.path.exists(self.path):
+            old = pq.ParquetFile(self.path)
+            if old.schema_arrow.equals(self.schema):
+                written = pa.chunked_array(self.keys, type=self.schema.field(self.table.key).type).combine_chunks() \
+                    if self.keys else pa.array([], type=self.schema.field(self.table.key).type)
+                for batch in old.iter_batches():
+                    keep = pc.invert(pc.is_in(batch.column(self.table.key), value_set=written))
+                    self.writer.write_table(pa.Table.from_batches([batch.filter(keep)], schema=self.schema))
+            else:
+                logging.warning(f"⚠️ {self.path}: 스키마가 달라 기존 행을 버리고 새로 씀")
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.writer.close()
+        os.remove(self.tmp_path)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 잡별 sink 묶음
+# ──────────────────────────────────────────────────────────────────────────────
+
+class Sinks:
+    def __init__(self, sinks: List):
+        self.sinks = sinks
+
+    @property
+    def names(self) -> List[str]:
+        return [sink.name for sink in self.sinks]
+
+    @property
+    def local(self) -> List:
+        return [sink for sink in self.sinks if not sink.summary_only]
+
+    def write_table(self, table: Table, rows: Iterable[Sequence]) -> int:
+        """rows를 청크 단위로 모든 대상 sink에 기록 → 기록한 행 수 (대상 sink가 없으면 rows를 읽지 않고 0)"""
+        targets = [sink for sink in self.sinks if not (table.bulk and sink.summary_only)]
+        if not targets:
+            return 0
+        writers = []
+        committed = 0
+        count = 0
+        try:
+            # 원격(Sheets) 먼저 커밋: 네트워크 실패면 로컬 sink는 아직 커밋 전이라 되돌릴 수 있음
+            for sink in sorted(targets, key=lambda sink: not sink.summary_only):
+                writers.append((sink, sink.open(table)))
+            for chunk in chunks(rows, SINK_CHUNK_ROWS):
+                for _, writer in writers:
+                    writer.write(chunk)
+                count += len(chunk)
+            for _, writer in writers:
+                writer.commit()
+                committed += 1
+        except BaseException:
+            if committed:
+                logging.warning(f"⚠️ {table.name}: 커밋 도중 실패 — 이미 커밋된 sink는 유지: "
+                                f"{', '.join(sink.name for sink, _ in writers[:committed])}")
+            for _, writer in writers[committed:]:
+                try:
+                    writer.abort()
+                except Exception:
+                    logging.exception(f"{table.name} 기록 되돌리기 실패")
+            raise
+        logging.info(f"🗃️ {table.name}: {count}행 → {', '.join(sink.name for sink in targets)}")
+        return count
+
+def parse_sink_names(spec: str) -> List[str]:
+    names = [name.strip().lower() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SINK_NAMES]
+    if unknown:
+        raise ValueError(f"알 수 없는 sink: {', '.join(unknown)} (사용 가능: {', '.join(SINK_NAMES)})")
+    return list(dict.fromkeys(names))
+
+def build_sinks(names: Iterable[str], job: str, sheets_client: Callable[[], Any] = None,
+                spreadsheet_id: Optional[str] = None, root: str = OUTPUT_DIR) -> Sinks:
+    """sink 이름 목록 → Sinks (sheets는 sheets_client/spreadsheet_id 필요)"""
+    sinks = []
+    for name in names:
+        if name == 'sheets':
+            if sheets_client is None or not spreadsheet_id:
+                raise ValueError(f"{job}: sheets sink에는 Sheets 클라이언트와 스프레드시트 ID가 필요합니다")
+            sinks.append(SheetsSink(sheets_client, spreadsheet_id))
+        elif name == 'sqlite':
+            sinks.append(SQLiteSink(os.path.join(root, f"{job}.sqlite")))
+        elif name == 'csv':
+            sinks.append(CsvSink(root))
+        elif name == 'parquet':
+            sinks.append(ParquetSink(root))
+    return Sinks(sinks)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+배치 잡 온디맨드 프로파일링 모드
+- PROFILE=true 일 때만 동작 (비활성 시 main을 그대로 호출 → 오버헤드 없음)
+- cProfile 결과      → <출력폴더>/<잡이름>-<타임스탬프>.pstats
+- 샘플링 스택         → <출력폴더>/<잡이름>-<타임스탬프>.collapsed (flamegraph.pl / speedscope 호환)
+- tracemalloc 상위 할당 → <출력폴더>/<잡이름>-<타임스탬프>.tracemalloc.txt
+
+사용:
+    PROFILE=true python yt_video_analysis_fixed.py
+"""
+
+import os
+import sys
+import time
+import threading
+import cProfile
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable
+
+from env_config import env_bool
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 설정
+# ──────────────────────────────────────────────────────────────────────────────
+
+PROFILE_ENABLED = env_bool("PROFILE", False)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getenv("BASE_DIR", os.getcwd()), "profile_output"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_TRACEMALLOC_TOP = int(os.getenv("PROFILE_TRACEMALLOC_TOP", "30"))
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "10"))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 샘플링 프로파일러 (collapsed stack)
+# ──────────────────────────────────────────────────────────────────────────────
+
+class StackSampler:
+    """일정 간격으로 모든 스레드의 콜스택을 샘플링해 collapsed 포맷으로 집계"""
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = max(interval_ms, 0.5) / 1000.0
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 실행 래퍼
+# ──────────────────────────────────────────────────────────────────────────────
+
+def write_tracemalloc_report(snapshot: tracemalloc.Snapshot, path: str, peak: int):
+    stats = snapshot.statistics("traceback")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"peak traced memory: {peak / 1024 / 1024:.2f} MiB\n")
+        f.write(f"top {PROFILE_TRACEMALLOC_TOP} allocations (by size)\n\n")
+        for i, stat in enumerate(stats[:PROFILE_TRACEMALLOC_TOP], 1):
+            f.write(f"#{i}: {stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            for line in stat.traceback.format():
+                f.write(f"    {line}\n")
+            f.write("\n")
+
+def run_profiled(main: Callable[[], Any], name: str = None) -> Any:
+    """PROFILE=true면 main을 프로파일링하며 실행, 아니면 그대로 실행"""
+    if not PROFILE_ENABLED:
+        return main()
+
+    name = name or getattr(main, "__module__", "job")
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    prefix = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+    sampler = StackSampler()
+    profiler = cProfile.Profile()
+    sampler.start()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return main()
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(prefix + ".pstats")
+        sampler.write_collapsed(prefix + ".collapsed")
+        write_tracemalloc_report(snapshot, prefix + ".tracemalloc.txt", peak)
+        print(
+            f"🔬 프로파일 저장: {prefix}.{{pstats,collapsed,tracemalloc.txt}} "
+            f"(경과 {elapsed:.2f}s, 샘플 {sum(sampler.counts.values())}개, 메모리 피크 {peak / 1024 / 1024:.1f}MiB)"
+        )
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+영상 통계 갱신 스케줄러
+- 영상마다 업로드 경과 시간과 최근 조회수 속도(velocity_7d)로 갱신 주기를 정하고,
+  주기가 지난 영상만 videos.list 50개 배치로 묶어 조회
+    · 업로드 2일 미만 : 매 실행
+    · 30일 미만       : 1일
+    · 1년 미만        : 3일
+    · 그 이후(에버그린): 7일
+    · 일평균 조회수 증가가 REFRESH_HOT_VELOCITY 이상이면 최대 1일
+- 실행당 배치 수(REFRESH_BATCHES_PER_RUN)만큼 밀린 정도(경과/주기)가 큰 순으로 선택
+  (주기가 안 된 영상으로도 예산/배치를 꽉 채워 다음 실행들의 부하를 평탄화)
+- 모든 영상이 REFRESH_MAX_STALENESS_HOURS 안에 갱신되도록, 상한이 다가오는 영상 수를
+  남은 실행(REFRESH_RUN_INTERVAL_HOURS 간격)에 나눠 필요하면 예산보다 더 조회
+- 마지막으로 조회한 영상 메타/통계를 함께 저장해, 이번에 조회하지 않은 영상도 순위/시트에 사용
+  (STATE_DIR/refresh_schedule/<채널ID>.json)
+- 일일 잡과 WebSub 수신기가 같은 파일을 갱신하므로 저장은 잠금(<파일>.lock, fcntl.flock) 안에서
+  디스크의 최신 상태를 다시 읽고 이번 실행에서 바꾼 영상만 덮어씀 (다른 프로세스의 갱신 유실 방지)
+"""
+
+import os
+import json
+import math
+import logging
+import datetime as dt
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from env_config import STATE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows 로컬 실행: 잠금 없이 (동시 쓰기 잡이 없다는 전제)
+    fcntl = None
+
+VIDEOS_PER_BATCH = 50
+REFRESH_BATCHES_PER_RUN = int(os.getenv('REFRESH_BATCHES_PER_RUN', '2'))
+REFRESH_MAX_STALENESS_HOURS = float(os.getenv('REFRESH_MAX_STALENESS_HOURS', str(7 * 24)))
+REFRESH_RUN_INTERVAL_HOURS = float(os.getenv('REFRESH_RUN_INTERVAL_HOURS', '24'))
+REFRESH_HOT_VELOCITY = float(os.getenv('REFRESH_HOT_VELOCITY', '1000'))
+
+# (업로드 경과 상한, 갱신 주기) — 위에서부터 처음 맞는 구간 적용
+REFRESH_AGE_TIERS = [
+    (dt.timedelta(days=2), dt.timedelta(0)),
+    (dt.timedelta(days=30), dt.timedelta(days=1)),
+    (dt.timedelta(days=365), dt.timedelta(days=3)),
+]
+REFRESH_EVERGREEN_INTERVAL = dt.timedelta(days=7)
+# cron 지연 등 실행 시각 흔들림 여유 (주기 판정/상한 보장 모두에 적용)
+REFRESH_SLACK = dt.timedelta(hours=1)
+
+def parse_published(value: Optional[str]) -> Optional[dt.datetime]:
+    """'2025-08-01T12:34:56Z' → UTC naive datetime"""
+    if not value:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+def refresh_interval(published: Optional[dt.datetime], velocity: float, now: dt.datetime,
+                     max_staleness: dt.timedelta) -> dt.timedelta:
+    age = now - published if published else dt.timedelta(0)
+    interval = REFRESH_EVERGREEN_INTERVAL
+    for max_age, tier_interval in REFRESH_AGE_TIERS:
+        if age < max_age:
+            interval = tier_interval
+            break
+    if velocity >= REFRESH_HOT_VELOCITY:
+        interval = min(interval, dt.timedelta(days=1))
+    return min(interval, max_staleness)
+
+class RefreshSchedule:
+    """
+    영상별 상태: {'refreshed_at': ISO, 'velocity': float, 'record': [VideoRecord 필드...] | None}
+    (record가 None이면 마지막 조회에서 응답이 없던 영상 = 비공개/삭제)
+    """
+
+    def __init__(self, channel_id: str, path: Optional[str] = None,
+                 batches_per_run: int = REFRESH_BATCHES_PER_RUN,
+                 max_staleness_hours: float = REFRESH_MAX_STALENESS_HOURS,
+                 run_interval_hours: float = REFRESH_RUN_INTERVAL_HOURS):
+        self.path = path or os.path.join(STATE_DIR, 'refresh_schedule', f"{channel_id}.json")
+        self.capacity = max(1, batches_per_run) * VIDEOS_PER_BATCH
+        self.max_staleness = dt.timedelta(hours=max_staleness_hours)
+        self.run_interval = dt.timedelta(hours=run_interval_hours)
+        # 이번 실행에서 조회 결과/속도를 바꾼 영상 (저장 때 디스크 상태 위에 이것만 반영)
+        self._updated: Set[str] = set()
+        self._velocities: Dict[str, float] = {}
+        self.entries: Dict[str, Dict] = self._load()
+        self._loaded_ids: Set[str] = set(self.entries)
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"갱신 스케줄 로드 실패 → 전체 재조회 ({self.path}): {e}")
+            return {}
+
+    def plan(self, catalogue: Dict[str, Optional[dt.datetime]], now: dt.datetime) -> List[str]:
+        """이번 실행에 조회할 영상 ID (50개 배치 단위로 채움, 우선순위 순)"""
+        forced, due, rest = [], [], []
+        # 상한까지 남은 실행 횟수별 영상 수 (0 = 이번 실행이 마지막 기회)
+        runs_left_counts: Dict[int, int] = {}
+        for vid, published in catalogue.items():
+            entry = self.entries.get(vid)
+            if entry is None:
+                forced.append((math.inf, vid))
+                runs_left_counts[0] = runs_left_counts.get(0, 0) + 1
+                continue
+            staleness = now - dt.datetime.fromisoformat(entry['refreshed_at'])
+            interval = refresh_interval(published, entry.get('velocity', 0.0), now, self.max_staleness)
+            score = math.inf if interval <= dt.timedelta(0) else staleness / interval
+            runs_left = max(0, int((self.max_staleness - staleness - REFRESH_SLACK) / self.run_interval))
+            runs_left_counts[runs_left] = runs_left_counts.get(runs_left, 0) + 1
+            if runs_left == 0:
+                forced.append((score, vid))
+            elif staleness + REFRESH_SLACK >= interval:
+                due.append((score, vid))
+            else:
+                rest.append((score, vid))
+
+        # 같은 점수면 카탈로그 순서(최신 업로드 우선) 유지
+        forced.sort(key=lambda x: -x[0])
+        due.sort(key=lambda x: -x[0])
+        rest.sort(key=lambda x: -x[0])
+
+        # r번째 실행까지 상한에 걸리는 영상을 남은 실행에 고르게 나누려면 지금 몇 개가 필요한지
+        # (첫 실행에 한꺼번에 조회한 영상들이 같은 날 만료되어 몰리는 것을 미리 분산)
+        needed, cumulative = 0, 0
+        for runs_left in sorted(runs_left_counts):
+            cumulative += runs_left_counts[runs_left]
+            needed = max(needed, math.ceil(cumulative / (runs_left + 1)))
+        count = max(self.capacity, needed, len(forced))
+        if count % VIDEOS_PER_BATCH:
+            count += VIDEOS_PER_BATCH - count % VIDEOS_PER_BATCH
+
+        # 필수 → 주기 도래 → 아직 여유 있는 영상 순 (예산을 매번 채워 만료 시점을 분산)
+        chosen = [vid for _, vid in forced + due + rest][:count]
+        self.last_plan = {'forced': len(forced), 'due': len(due), 'fresh': len(rest), 'chosen': len(chosen)}
+        return chosen
+
+    def update(self, requested_ids: Iterable[str], records: Sequence, now: dt.datetime):
+        """조회 결과 반영 (응답에 없는 영상은 record=None)"""
+        by_id = {record.id: record for record in records}
+        for vid in requested_ids:
+            entry = self.entries.setdefault(vid, {'velocity': 0.0})
+            entry['refreshed_at'] = now.isoformat(timespec='seconds')
+            record = by_id.get(vid)
+            entry['record'] = [record.title, record.upload_date, record.views, record.likes,
+                               record.comments, record.duration_seconds] if record else None
+            self._updated.add(vid)
+
+    def update_velocity(self, velocities: Dict[str, float]):
+        for vid, velocity in velocities.items():
+            if vid in self.entries and velocity == velocity:  # NaN 제외
+                self.entries[vid]['velocity'] = float(velocity)
+                self._velocities[vid] = float(velocity)
+
+    def records(self, video_ids: Iterable[str], record_type) -> List:
+        """카탈로그 순서대로 마지막으로 조회한 레코드 (응답이 없던 영상 제외)"""
+        out = []
+        for vid in video_ids:
+            entry = self.entries.get(vid)
+            if entry and entry.get('record'):
+                out.append(record_type(vid, *entry['record']))
+        return out
+
+    def _merge_from_disk(self):
+        """디스크의 최신 상태에 이번 실행의 변경만 덮어씀 (잠금 안에서 호출)"""
+        merged = self._load() if os.path.exists(self.path) else {}
+        for vid in self._updated:
+            ours, theirs = self.entries[vid], merged.get(vid)
+            # 다른 프로세스가 그 사이 더 최근에 조회했으면 그쪽 결과 유지
+            if theirs is None or theirs.get('refreshed_at', '') <= ours['refreshed_at']:
+                merged[vid] = {**(theirs or {}), **ours}
+        for vid, velocity in self._velocities.items():
+            if vid in merged:
+                merged[vid]['velocity'] = velocity
+        self.entries = merged
+
+    def refreshed_at(self, video_id: str) -> Optional[dt.datetime]:
+        """영상의 마지막 조회 시각 (조회한 적 없으면 None)"""
+        entry = self.entries.get(video_id)
+        return dt.datetime.fromisoformat(entry['refreshed_at']) if entry else None
+
+    def save(self, catalogue_ids: Optional[Iterable[str]] = None):
+        """저장 (catalogue_ids를 주면 카탈로그에서 빠진 영상 정리)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            self._merge_from_disk()
+            if catalogue_ids is not None:
+                # 로드 이후 다른 프로세스가 추가한 영상(새 업로드 알림 등)은 다음 카탈로그까지 유지
+                keep = set(catalogue_ids)
+                self.entries = {vid: entry for vid, entry in self.entries.items()
+                                if vid in keep or vid not in self._loaded_ids}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        finally:
+            os.close(lock_fd)  # 닫으면 flock도 해제
+        self._updated.clear()
+        self._velocities.clear()
+        self._loaded_ids = set(self.entries)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+API 요청 셰이핑 레이어
+- googleapiclient: build(..., requestBuilder=ShapedHttpRequest)로 gzip 헤더 강제 + 응답 크기 집계
+- requests 세션(gspread, Graph API): shape_requests_session(session) (api_metrics에서 재노출)
+- fields 마스크는 호출부에서 실제로 읽는 필드만 지정 (각 스크립트의 *_FIELDS 상수)
+- API_FIELDS_AUDIT=true면 메서드별 첫 호출에 한해 마스크 없는 응답 크기도 측정해 절감량 리포트
+- decode_with(decode): 성공 응답 본문을 dict 없이 바로 레코드로 변환 (fast_json.execute_typed)
+- build(..., model=FastJsonModel()): 나머지 응답도 orjson/msgspec으로 디코딩 (설치된 경우)
+"""
+
+import logging
+import urllib.parse
+
+from googleapiclient.http import HttpRequest
+from googleapiclient.model import JsonModel
+
+from api_metrics import API_STATS, GZIP_USER_AGENT, shape_requests_session  # noqa: F401 (재노출)
+from env_config import env_bool
+from fast_json import DECODE_ERRORS, backend, loads
+
+API_FIELDS_AUDIT = env_bool("API_FIELDS_AUDIT", False)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# googleapiclient
+# ──────────────────────────────────────────────────────────────────────────────
+
+def strip_fields_param(uri: str) -> str:
+    parts = urllib.parse.urlsplit(uri)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k != "fields"]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+class ShapedHttpRequest(HttpRequest):
+    """gzip 헤더를 강제하고 응답 본문 크기를 API_STATS에 기록하는 HttpRequest"""
+
+    def __init__(self, http, postproc, uri, method="GET", body=None, headers=None,
+                 methodId=None, resumable=None):
+        headers = dict(headers or {})
+        headers["accept-encoding"] = "gzip"
+        user_agent = headers.get("user-agent", "")
+        if "gzip" not in user_agent:
+            headers["user-agent"] = f"{user_agent} {GZIP_USER_AGENT}".strip()
+
+        self._decode = None
+        self._base_postproc = postproc
+
+        super().__init__(http, postproc, uri, method=method, body=body, headers=headers,
+                         methodId=methodId, resumable=resumable)
+
+    def execute(self, http=None, num_retries=0):
+        # list_next는 요청을 얕은 복사(copy.copy)해 uri만 바꾸므로, 복사본의 uri/decode를 쓰도록 실행하는 객체에 다시 묶음
+        self.postproc = self._recording_postproc
+        return super().execute(http=http, num_retries=num_retries)
+
+    def _recording_postproc(self, resp, content):
+        API_STATS.record(
+            self.methodId or "unknown",
+            decoded=len(content or b""),
+            gzipped=resp.get("-content-encoding") == "gzip",
+        )
+        if API_FIELDS_AUDIT and "fields=" in self.uri and API_STATS.needs_audit(self.methodId):
+            self._audit_fields_mask(len(content or b""))
+        # 오류/빈 응답은 기존 postproc이 처리 (HttpError 등 동작 유지)
+        if self._decode is not None and resp.status < 300 and content:
+            return self._decode(content)
+        return self._base_postproc(resp, content)
+
+    def decode_with(self, decode):
+        """응답 본문(bytes)을 decode로 직접 변환 (list_next로 복사된 다음 페이지 요청에도 유지)"""
+        self._decode = decode
+        return self
+
+    def _audit_fields_mask(self, masked_size: int):
+        try:
+            _, unmasked = self.http.request(strip_fields_param(self.uri), method=self.method,
+                                            body=self.body, headers=self.headers)
+            API_STATS.record_audit(self.methodId, masked_size, len(unmasked or b""))
+        except Exception as e:
+            logging.warning(f"fields 마스크 감사 실패 ({self.methodId}): {e}")
+            API_STATS.record_audit(self.methodId, masked_size, 0)
+
+class FastJsonModel(JsonModel):
+    """JsonModel.deserialize의 표준 json을 fast_json.loads로 교체 (data 래퍼/디코딩 실패 시 동작은 동일)"""
+
+    def deserialize(self, content):
+        if backend() == "json":
+            return super().deserialize(content)
+        try:
+            body = loads(content)
+        except DECODE_ERRORS:
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
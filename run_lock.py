@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+잡 실행 임대(lease) 잠금 — 같은 잡의 겹친 실행 방지
+- SQLite 한 파일(STATE_DIR/run_locks.sqlite)에 잡 이름별 (소유자, 만료 시각)을 기록
+- 만료 전이면 다른 실행은 잠금을 얻지 못하고 '합쳐진 트리거' 수만 올린 뒤 바로 종료
+  → 5분 cron이 느린 실행과 겹쳐도 실행은 하나, 쿼터/시트 쓰기 중복 없음
+- 소유자는 TTL/3마다 만료 시각을 연장 (프로세스가 죽으면 TTL 뒤 자동 해제)
+- 같은 호스트/볼륨의 실행끼리만 보호 (GitHub Actions 러너 간에는 워크플로 concurrency 그룹 사용)
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from env_config import STATE_DIR
+
+RUN_LOCK_PATH = os.getenv('RUN_LOCK_PATH', os.path.join(STATE_DIR, 'run_locks.sqlite'))
+RUN_LOCK_TTL_SECONDS = float(os.getenv('RUN_LOCK_TTL_SECONDS', '900'))
+
+class RunLease:
+    def __init__(self, name: str, ttl_seconds: float = RUN_LOCK_TTL_SECONDS, path: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.path = path or RUN_LOCK_PATH
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.coalesced = 0
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, "
+                     "expires_at REAL, coalesced INTEGER NOT NULL DEFAULT 0)")
+        return conn
+
+    def acquire(self) -> bool:
+        """잠금 획득 (보유 중인 실행이 있으면 합쳐진 트리거 수만 올리고 False)"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if row and row[1] > now:
+                conn.execute("UPDATE leases SET coalesced = coalesced + 1 WHERE name = ?", (self.name,))
+                conn.execute("COMMIT")
+                logging.info(f"🔒 {self.name}: 실행 중인 소유자 {row[0]} (만료까지 {row[1] - now:.0f}s)")
+                return False
+            if row:
+                logging.warning(f"🔓 {self.name}: 만료된 잠금 회수 (이전 소유자 {row[0]})")
+            conn.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at, coalesced) VALUES (?, ?, ?, 0)",
+                         (self.name, self.owner, now + self.ttl))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self._heartbeat = threading.Thread(target=self._renew_loop, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.ttl / 3):
+            conn = self._connect()
+            try:
+                updated = conn.execute("UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                                       (time.time() + self.ttl, self.name, self.owner)).rowcount
+            finally:
+                conn.close()
+            if not updated:
+                logging.warning(f"⚠️ {self.name}: 잠금을 잃었습니다 (다른 실행이 만료 후 회수)")
+                return
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT coalesced FROM leases WHERE name = ? AND owner = ?",
+                               (self.name, self.owner)).fetchone()
+            if row:
+                self.coalesced = row[0]
+                conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if self.coalesced:
+            logging.info(f"🔗 {self.name}: 실행 중 들어온 트리거 {self.coalesced}건을 이번 실행으로 처리")
+
+@contextmanager
+def run_lease(name: str, ttl_seconds: float = RUN_LOCK_TTL_SECONDS, path: Optional[str] = None) -> Iterator[bool]:
+    """with run_lease('잡') as acquired: — acquired가 False면 다른 실행이 진행 중"""
+    lease = RunLease(name, ttl_seconds, path)
+    acquired = lease.acquire()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lease.release()
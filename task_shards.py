@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloud Run Job 태스크 샤딩
+- CLOUD_RUN_TASK_INDEX / CLOUD_RUN_TASK_COUNT (Cloud Run Jobs가 태스크마다 주입)로 작업 목록을 결정적으로 분할
+    · 작업 키를 정렬한 뒤 라운드로빈 → 모든 태스크가 같은 목록을 계산하면 항상 같은 분할, 태스크 간 개수 차이는 최대 1
+- 태스크마다 자기 몫의 결과를 SHARD_DIR/<잡>/<실행 id>/shard-<index>.json에 원자적으로 저장
+    · 같은 실행 안에서 재시도된 태스크는 자기 샤드 파일의 결과를 재사용하고 실패한 키만 다시 수집
+- 샤드 파일이 모두 모이면 마지막 태스크가 합치기 마커를 O_EXCL로 선점해 결과를 합친 뒤
+  스프레드시트별 batchUpdate 1회로 기록 (합치기 이후 재시도된 태스크는 자기 몫만 기록)
+- SHARD_DIR은 모든 태스크가 공유하는 경로여야 함 (Cloud Run: Cloud Storage 볼륨 마운트, 로컬: 같은 디렉터리)
+- 태스크가 1개면 샤딩 없이 기존 단일 실행 경로 사용
+
+로컬에서 N개 태스크를 N개 프로세스로 시뮬레이션:
+    python task_shards.py --tasks 3 -- python yt_monthly_report.py
+    python task_shards.py --tasks 2 -- python instagram_multi_account.py
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import subprocess
+from typing import Callable, Dict, Iterable, List, Optional
+
+from env_config import STATE_DIR
+
+SHARD_DIR = os.getenv('SHARD_DIR', os.path.join(STATE_DIR, 'shards'))
+TASK_INDEX = int(os.getenv('CLOUD_RUN_TASK_INDEX', '0'))
+TASK_COUNT = int(os.getenv('CLOUD_RUN_TASK_COUNT', '1'))
+# 같은 실행의 태스크끼리 공유하는 id (Cloud Run은 실행 이름을 CLOUD_RUN_EXECUTION으로 주입)
+SHARD_RUN_ID = os.getenv('SHARD_RUN_ID') or os.getenv('CLOUD_RUN_EXECUTION', '')
+SHARD_RETENTION_DAYS = float(os.getenv('SHARD_RETENTION_DAYS', '7'))
+
+def sharding_enabled() -> bool:
+    return TASK_COUNT > 1
+
+def partition(keys: Iterable[str], index: int, count: int) -> List[str]:
+    """정렬된 키를 라운드로빈으로 나눠 index번 태스크의 몫 반환"""
+    return sorted(set(keys))[index::count]
+
+def _json_default(value):
+    # numpy 스칼라 등 (.item()으로 파이썬 기본형 변환)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON 직렬화 불가: {type(value).__name__}")
+
+class ShardRun:
+    def __init__(self, job: str, index: int = TASK_INDEX, count: int = TASK_COUNT,
+                 run_id: str = SHARD_RUN_ID, root: str = SHARD_DIR):
+        if not run_id:
+            raise ValueError("샤딩 실행 id가 없습니다 (CLOUD_RUN_EXECUTION 또는 SHARD_RUN_ID 설정)")
+        if not 0 <= index < count:
+            raise ValueError(f"태스크 번호 범위 오류: {index} / {count}")
+        self.job = job
+        self.index = index
+        self.count = count
+        self.job_dir = os.path.join(root, job.replace(':', '_'))
+        self.dir = os.path.join(self.job_dir, run_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self._results: Dict[str, Dict] = {}
+
+    def _shard_path(self, index: int) -> str:
+        return os.path.join(self.dir, f"shard-{index:04d}.json")
+
+    @property
+    def _claim_path(self) -> str:
+        return os.path.join(self.dir, 'merge.claim')
+
+    @property
+    def _merged_path(self) -> str:
+        return os.path.join(self.dir, 'merged.json')
+
+    def mine(self, keys: Iterable[str]) -> List[str]:
+        keys = partition(keys, self.index, self.count)
+        logging.info(f"🧩 {self.job}: 태스크 {self.index + 1}/{self.count} → {len(keys)}개 ({', '.join(keys) or '없음'})")
+        return keys
+
+    def previous_results(self) -> Dict[str, Dict]:
+        """같은 실행에서 이 태스크가 이전 시도에 저장한 결과 (재시도 시 재사용)"""
+        shard = self._read(self._shard_path(self.index))
+        return shard['results'] if shard else {}
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: Dict):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def save(self, results: Dict[str, Dict], failures: Iterable[str] = ()):
+        """이 태스크 몫의 결과 저장 (실패한 키는 기록만 하고 합치기에서 제외)"""
+        self._results = results
+        self._write(self._shard_path(self.index), {
+            'index': self.index, 'count': self.count, 'saved_at': time.time(),
+            'results': results, 'failures': sorted(failures),
+        })
+
+    def _collect(self) -> Optional[Dict[str, Dict]]:
+        """모든 샤드 파일이 있으면 결과를 합쳐 반환, 하나라도 없으면 None"""
+        merged = {}
+        for index in range(self.count):
+            shard = self._read(self._shard_path(index))
+            if shard is None:
+                return None
+            if shard.get('count') != self.count:
+                logging.warning(f"⚠️ 샤드 {index}의 태스크 수가 다릅니다 ({shard.get('count')} ≠ {self.count})")
+            if shard.get('failures'):
+                logging.warning(f"⚠️ 샤드 {index} 수집 실패 키: {', '.join(shard['failures'])}")
+            merged.update(shard['results'])
+        return merged
+
+    def merge_if_ready(self, merge: Callable[[Dict[str, Dict]], None]) -> bool:
+        """
+        모든 샤드가 모였으면 한 태스크만 merge(결과 전체)를 호출
+        - 합치기가 실패하면 선점을 풀어 재시도된 태스크가 다시 합칠 수 있게 함
+        - 합치기가 이미 끝난 실행에서 재시도된 태스크는 자기 결과만 merge
+        """
+        if os.path.exists(self._merged_path):
+            logging.info(f"🧩 {self.job}: 합치기 이후 재시도된 태스크 → 자기 몫 {len(self._results)}건만 기록")
+            if self._results:
+                merge(self._results)
+            return True
+        merged = self._collect()
+        if merged is None:
+            logging.info(f"🧩 {self.job}: 다른 태스크의 샤드를 기다림 → 마지막 태스크가 합치기")
+            return False
+        try:
+            os.close(os.open(self._claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        logging.info(f"🧩 {self.job}: 샤드 {self.count}개 합치기 ({len(merged)}건)")
+        try:
+            merge(merged)
+        except BaseException:
+            os.remove(self._claim_path)
+            raise
+        self._write(self._merged_path, {'merged_at': time.time(), 'keys': sorted(merged)})
+        self.prune()
+        return True
+
+    def prune(self, retention_days: float = SHARD_RETENTION_DAYS):
+        """보존 기간이 지난 이전 실행의 샤드 디렉터리 삭제"""
+        cutoff = time.time() - retention_days * 86400
+        for name in os.listdir(self.job_dir):
+            path = os.path.join(self.job_dir, name)
+            if path != self.dir and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+def simulate(command: List[str], tasks: int, run_id: Optional[str] = None) -> int:
+    """Cloud Run Job 실행을 흉내 내 command를 태스크 수만큼 동시에 띄우고 실패한 태스크 수 반환"""
+    run_id = run_id or f"local-{time.strftime('%Y%m%d-%H%M%S')}"
+    logging.info(f"🧪 로컬 샤딩 시뮬레이션: {tasks}개 태스크, 실행 id {run_id}")
+    procs = []
+    for index in range(tasks):
+        env = dict(os.environ, CLOUD_RUN_TASK_INDEX=str(index), CLOUD_RUN_TASK_COUNT=str(tasks),
+                   SHARD_RUN_ID=run_id)
+        procs.append(subprocess.Popen(command, env=env))
+    failed = 0
+    for index, proc in enumerate(procs):
+        code = proc.wait()
+        if code:
+            failed += 1
+            logging.error(f"❌ 태스크 {index} 종료 코드 {code}")
+    logging.info(f"🧪 시뮬레이션 종료: 성공 {tasks - failed} / {tasks}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="N개 태스크 Cloud Run Job을 로컬 프로세스로 시뮬레이션")
+    parser.add_argument('--tasks', type=int, default=3)
+    parser.add_argument('--run-id', default=None)
+    parser.add_argument('command', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        parser.error("실행할 명령을 -- 뒤에 지정하세요 (예: -- python yt_monthly_report.py)")
+    sys.exit(1 if simulate(command, args.tasks, args.run_id) else 0)
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s"
+    )
+    main()
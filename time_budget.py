@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+실행 시간 예산과 우선순위 실행기
+- Cloud Run Job(task-timeout), GitHub Actions(timeout-minutes)의 강제 종료 전에 스스로 작업을 멈추고 기록
+- JOB_TIME_BUDGET_SECONDS: 잡 전체 시간 예산 (0 = 제한 없음)
+- JOB_FLUSH_RESERVE_SECONDS: 예산 끝에서 시트 기록/상태 저장용으로 남겨 둘 시간
+- run_prioritized: 우선순위(작을수록 먼저) 순서로 작업 시작
+    · 남은 시간이 작업 예상 시간(없으면 이번 실행에서 끝난 작업의 평균 소요 시간)보다 짧으면 시작하지 않고 미룸
+    · 작업 마감 시각이 지나면 실행 중인 작업을 기다리지 않고 미룸 처리 (결과는 버림)
+    · 이미 진행 중인 API 호출은 중단할 수 없으므로 해당 스레드는 HTTP 응답/타임아웃 뒤 종료
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+JOB_TIME_BUDGET_SECONDS = float(os.getenv('JOB_TIME_BUDGET_SECONDS', '0'))
+JOB_FLUSH_RESERVE_SECONDS = float(os.getenv('JOB_FLUSH_RESERVE_SECONDS', '60'))
+
+class Deadline:
+    def __init__(self, budget_seconds: float = JOB_TIME_BUDGET_SECONDS,
+                 reserve_seconds: float = JOB_FLUSH_RESERVE_SECONDS, started: Optional[float] = None):
+        self.budget = budget_seconds
+        self.reserve = reserve_seconds
+        self.started = time.monotonic() if started is None else started
+
+    @property
+    def unlimited(self) -> bool:
+        return self.budget <= 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """작업에 쓸 수 있는 남은 시간 (기록 예비 시간 제외, 제한 없음이면 inf)"""
+        if self.unlimited:
+            return float('inf')
+        return self.budget - self.reserve - self.elapsed()
+
+    def allows(self, estimate_seconds: float = 0.0) -> bool:
+        return self.remaining() > estimate_seconds
+
+    def __repr__(self) -> str:
+        if self.unlimited:
+            return "Deadline(제한 없음)"
+        return f"Deadline(예산 {self.budget:.0f}s, 남은 작업 시간 {self.remaining():.0f}s)"
+
+@dataclass
+class WorkItem:
+    key: Any
+    priority: Any                       # 작을수록 먼저 (튜플 가능)
+    run: Callable[[], Any]
+    estimate: Optional[float] = None    # 예상 소요 시간(초), None이면 완료된 작업의 평균
+
+def run_prioritized(items: List[WorkItem], deadline: Deadline, pool: Optional[ThreadPoolExecutor] = None,
+                    max_workers: int = 4, on_done: Callable[[Any, Any], None] = None
+                    ) -> Tuple[Dict[Any, Any], List[Tuple[Any, Exception]], List[Any]]:
+    """
+    우선순위 순서로 최대 max_workers개씩 실행 → (완료 {key: 결과}, 실패 [(key, 예외)], 미룸 [key])
+    - pool을 주면 그 풀을 사용하고 종료하지 않음 (worker_daemon의 상주 풀)
+    - on_done(key, 결과): 작업이 끝나는 즉시 호출 (체크포인트 기록 등)
+    """
+    queue = sorted(items, key=lambda item: item.priority)
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queue))))
+    done: Dict[Any, Any] = {}
+    failures: List[Tuple[Any, Exception]] = []
+    in_flight = {}
+    durations = []
+    try:
+        while queue or in_flight:
+            while queue and len(in_flight) < max_workers:
+                item = queue[0]
+                estimate = item.estimate if item.estimate is not None else (
+                    sum(durations) / len(durations) if durations else 0.0)
+                if not deadline.allows(estimate):
+                    # 우선순위가 높은 작업을 건너뛰고 낮은 작업을 시작하지 않도록 남은 작업은 모두 미룸
+                    break
+                queue.pop(0)
+                in_flight[pool.submit(_timed, item.run)] = item
+            if not in_flight:
+                break
+            timeout = None if deadline.unlimited else max(0.0, deadline.remaining())
+            finished, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not finished:
+                logging.warning(f"⏰ 시간 예산 소진: 실행 중인 작업 {len(in_flight)}개를 기다리지 않고 미룸")
+                break
+            for fut in finished:
+                item = in_flight.pop(fut)
+                try:
+                    result, seconds = fut.result()
+                except Exception as e:
+                    logging.exception(f"{item.key} 작업 실패")
+                    failures.append((item.key, e))
+                    continue
+                durations.append(seconds)
+                done[item.key] = result
+                if on_done:
+                    on_done(item.key, result)
+    finally:
+        for fut in in_flight:
+            fut.cancel()
+        if own_pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+    deferred = [item.key for item in queue] + [item.key for item in in_flight.values()]
+    if deferred:
+        logging.warning(f"⏭️ 시간 예산 부족으로 다음 실행으로 미룸: {', '.join(map(str, deferred))} ({deadline})")
+    return done, failures, deferred
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
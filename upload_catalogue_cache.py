@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+업로드 재생목록 카탈로그 캐시
+- 채널별로 업로드 재생목록 ID, playlistItems 첫 페이지 etag, 영상 (ID, 업로드 시각) 목록을 저장
+  (STATE_DIR/upload_catalogue/<채널ID>.json)
+- 다음 실행은 첫 페이지를 If-None-Match로 조건부 요청
+    · 304 또는 같은 etag → 저장된 목록 그대로 사용 (channels.list 포함 추가 호출 없음)
+    · etag 변경        → 저장된 최신 영상이 나올 때까지만 페이지를 넘겨 새 업로드만 앞에 붙임
+- complete: 마지막 전체 조회가 재생목록 끝까지 도달했는지 (영상 수가 max_videos 미만인 채널)
+"""
+
+import os
+import json
+import logging
+from typing import List, Optional, Tuple
+
+from env_config import STATE_DIR
+
+UPLOAD_CATALOGUE_DIR = os.path.join(STATE_DIR, 'upload_catalogue')
+
+def upload_catalogue_cache_path(channel_id: str) -> str:
+    return os.path.join(UPLOAD_CATALOGUE_DIR, f"{channel_id}.json")
+
+class UploadCatalogueCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.playlist_id: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.items: List[Tuple[str, str]] = []
+        self.complete = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.playlist_id = data.get('playlist_id')
+            self.etag = data.get('etag')
+            self.items = [tuple(item) for item in data.get('items', [])]
+            self.complete = bool(data.get('complete'))
+        except (OSError, ValueError) as e:
+            logging.warning(f"업로드 카탈로그 캐시 로드 실패 → 전체 조회 ({self.path}): {e}")
+            self.playlist_id, self.etag, self.items, self.complete = None, None, [], False
+
+    def covers(self, max_videos: int) -> bool:
+        """저장된 목록으로 최신 max_videos개를 만들 수 있는지 (증분 조회 가능 여부)"""
+        return bool(self.items) and (self.complete or len(self.items) >= max_videos)
+
+    def update(self, playlist_id: str, etag: Optional[str], items: List[Tuple[str, str]], complete: bool):
+        self.playlist_id, self.etag, self.items, self.complete = playlist_id, etag, items, complete
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'playlist_id': self.playlist_id, 'etag': self.etag, 'complete': self.complete,
+                       'items': self.items}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
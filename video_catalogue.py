@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+영상 카탈로그 인덱스 (고정 폭 레코드 파일 + mmap)
+- 파일: STATE_DIR/video_catalogue/<채널ID>.bin
+    · 헤더 32바이트: 매직 b'YTCATLG1', 버전, 레코드 크기, 커밋된 레코드 수
+    · 레코드 64바이트 (CATALOGUE_DTYPE): 영상 ID, 게시 시각(epoch 초), 길이(초), 플래그(Shorts),
+      마지막 조회수/좋아요/댓글, 통계 조회 시각
+- 읽기: mmap(읽기 전용) 위에 numpy 구조화 배열 뷰 → JSON 파싱/API 호출 없이 시작하자마자
+    · ID 조회 (첫 조회 때 ID → 위치 dict 생성), 게시 기간 조회, Shorts 분리, 길이 통계
+    · 여러 잡이 같은 파일을 동시에 읽기 전용으로 열 수 있음 (열 때의 커밋 수까지만 보임, refresh()로 다시 매핑)
+- 쓰기(upsert): 파일 배타 잠금(fcntl.flock) 안에서
+    · 새 영상: 커밋 수 뒤에 레코드를 쓰고 fsync → 헤더의 레코드 수 갱신 + fsync
+      (읽는 쪽은 헤더의 수만큼만 보므로 쓰다 만 레코드는 보이지 않음 = 원자적 추가)
+    · 기존 영상: 통계 필드(조회수~조회 시각 32바이트)만 제자리 덮어쓰기
+- 레코드는 삭제하지 않음 (삭제/비공개 영상도 마지막 값 유지, 순서 = 처음 본 순서)
+"""
+
+import os
+import mmap
+import struct
+import datetime as dt
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from env_config import STATE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows 로컬 실행: 잠금 없이 (동시 쓰기 잡이 없다는 전제)
+    fcntl = None
+
+CATALOGUE_MAGIC = b'YTCATLG1'
+CATALOGUE_VERSION = 1
+HEADER = struct.Struct('<8sHHIQ8x')     # 매직, 버전, 레코드 크기, 예약, 레코드 수
+FLAG_SHORT = 0x01
+
+CATALOGUE_DTYPE = np.dtype([
+    ('id', 'S11'),          # YouTube 영상 ID (11자)
+    ('flags', 'u1'),
+    ('duration', '<u4'),
+    ('published', '<i8'),   # UTC epoch 초 (모르면 0)
+    ('views', '<i8'),
+    ('likes', '<i8'),
+    ('comments', '<i8'),
+    ('stats_at', '<i8'),    # 통계 조회 시각 UTC epoch 초
+    ('reserved', 'V8'),
+])
+STATS_FIELDS = ('views', 'likes', 'comments', 'stats_at')
+STATS_OFFSET = CATALOGUE_DTYPE.fields['views'][1]
+STATS = struct.Struct('<qqqq')
+
+def video_catalogue_path(channel_id: str) -> str:
+    return os.path.join(STATE_DIR, 'video_catalogue', f"{channel_id}.bin")
+
+def to_epoch(value: Optional[dt.datetime]) -> int:
+    """UTC naive datetime → epoch 초 (None이면 0)"""
+    return int(value.replace(tzinfo=dt.timezone.utc).timestamp()) if value else 0
+
+class VideoCatalogue:
+    """
+    with VideoCatalogue(path) as cat:
+        cat.lookup('dQw4w9WgXcQ'), cat.published_between(start, end), cat.duration_stats(shorts=True)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._index: Optional[Dict[bytes, int]] = None
+        self.records = np.empty(0, dtype=CATALOGUE_DTYPE)
+        self.refresh()
+
+    # ── 매핑 ─────────────────────────────────────────────────────────────────
+
+    def refresh(self):
+        """파일을 다시 매핑 (다른 잡이 추가한 레코드 반영)"""
+        self.close()
+        if not os.path.exists(self.path):
+            return
+        self._file = open(self.path, 'rb')
+        if fcntl:
+            # 헤더와 레코드 수를 쓰는 중인 잡과 겹치지 않게 공유 잠금으로 커밋 수만 읽음
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size >= HEADER.size:
+                count = self._read_count(self._file)
+                self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        finally:
+            if fcntl:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        if self._map is None:
+            # 다른 잡이 방금 만들고 아직 헤더를 쓰기 전
+            return
+        self.records = np.frombuffer(self._map, dtype=CATALOGUE_DTYPE, count=count, offset=HEADER.size)
+
+    def close(self):
+        self.records = np.empty(0, dtype=CATALOGUE_DTYPE)
+        self._index = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # 호출부가 아직 레코드 뷰를 들고 있으면 참조가 사라질 때 해제
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _read_count(self, f) -> int:
+        magic, version, record_size, _, count = HEADER.unpack(os.pread(f.fileno(), HEADER.size, 0))
+        if magic != CATALOGUE_MAGIC or version != CATALOGUE_VERSION or record_size != CATALOGUE_DTYPE.itemsize:
+            raise ValueError(f"영상 카탈로그 형식 불일치: {self.path} ({magic!r} v{version}, {record_size}바이트)")
+        return count
+
+    # ── 조회 ─────────────────────────────────────────────────────────────────
+
+    def position(self, video_id: str) -> int:
+        """영상 ID → 레코드 위치 (없으면 -1)"""
+        if self._index is None:
+            self._index = {vid: i for i, vid in enumerate(self.records['id'].tolist())}
+        return self._index.get(video_id.encode('ascii'), -1)
+
+    def lookup(self, video_id: str) -> Optional[Dict]:
+        i = self.position(video_id)
+        if i < 0:
+            return None
+        rec = self.records[i]
+        return {
+            'id': video_id,
+            'published': dt.datetime.utcfromtimestamp(int(rec['published'])) if rec['published'] else None,
+            'duration_seconds': int(rec['duration']),
+            'is_short': bool(rec['flags'] & FLAG_SHORT),
+            **{name: int(rec[name]) for name in STATS_FIELDS},
+        }
+
+    def published_between(self, start: dt.datetime, end: dt.datetime) -> np.ndarray:
+        """게시 시각이 [start, end)인 레코드 위치"""
+        published = self.records['published']
+        return np.flatnonzero((published >= to_epoch(start)) & (published < to_epoch(end)))
+
+    def shorts_mask(self) -> np.ndarray:
+        return (self.records['flags'] & FLAG_SHORT).astype(bool)
+
+    def ids(self, positions: Optional[np.ndarray] = None) -> list:
+        column = self.records['id'] if positions is None else self.records['id'][positions]
+        return [vid.decode('ascii') for vid in column.tolist()]
+
+    def duration_stats(self, shorts: Optional[bool] = None) -> Dict[str, float]:
+        """길이(초) 통계 (shorts=True/False면 숏폼/롱폼만)"""
+        durations = self.records['duration']
+        if shorts is not None:
+            durations = durations[self.shorts_mask() == shorts]
+        if not len(durations):
+            return {'count': 0}
+        return {
+            'count': int(len(durations)),
+            'mean': float(durations.mean()),
+            'median': float(np.median(durations)),
+            'p90': float(np.percentile(durations, 90)),
+            'max': int(durations.max()),
+        }
+
+    def summary(self) -> str:
+        if not len(self):
+            return "영상 카탈로그 인덱스 없음 (이번 실행에서 생성)"
+        shorts = int(self.shorts_mask().sum())
+        longs = self.duration_stats(shorts=False)
+        median = f", 롱폼 길이 중앙값 {longs['median'] / 60:.1f}분" if longs['count'] else ""
+        return f"영상 카탈로그 인덱스 {len(self)}개 (숏폼 {shorts} / 롱폼 {len(self) - shorts}{median})"
+
+    # ── 쓰기 ─────────────────────────────────────────────────────────────────
+
+    def upsert(self, rows: Iterable[Tuple[str, int, int, bool, int, int, int]], stats_at: dt.datetime) -> Tuple[int, int]:
+        """
+        rows: (영상 ID, 게시 epoch 초, 길이 초, Shorts 여부, 조회수, 좋아요, 댓글)
+        → (추가한 수, 통계 갱신한 수), 끝나면 다시 매핑
+        """
+        stamp = to_epoch(stats_at)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size < HEADER.size:
+                os.pwrite(fd, HEADER.pack(CATALOGUE_MAGIC, CATALOGUE_VERSION, CATALOGUE_DTYPE.itemsize, 0, 0), 0)
+            with open(fd, 'rb', closefd=False) as f:
+                count = self._read_count(f)
+            # 잠금을 잡은 뒤의 ID 열로 위치 계산 (열어 둔 매핑은 다른 잡의 추가를 모를 수 있음)
+            existing = np.frombuffer(os.pread(fd, count * CATALOGUE_DTYPE.itemsize, HEADER.size),
+                                     dtype=CATALOGUE_DTYPE, count=count)
+            index = {vid: i for i, vid in enumerate(existing['id'].tolist())}
+
+            new_rows = []
+            updated = 0
+            for vid, published, duration, is_short, views, likes, comments in rows:
+                key = vid.encode('ascii')
+                if key in index:
+                    offset = HEADER.size + index[key] * CATALOGUE_DTYPE.itemsize + STATS_OFFSET
+                    os.pwrite(fd, STATS.pack(views, likes, comments, stamp), offset)
+                    updated += 1
+                else:
+                    index[key] = count + len(new_rows)
+                    new_rows.append((key, FLAG_SHORT if is_short else 0, duration, published,
+                                     views, likes, comments, stamp, b'\0' * 8))
+            if new_rows:
+                block = np.array(new_rows, dtype=CATALOGUE_DTYPE)
+                os.pwrite(fd, block.tobytes(), HEADER.size + count * CATALOGUE_DTYPE.itemsize)
+                os.fsync(fd)
+                count += len(new_rows)
+                os.pwrite(fd, HEADER.pack(CATALOGUE_MAGIC, CATALOGUE_VERSION, CATALOGUE_DTYPE.itemsize, 0, count), 0)
+            os.fsync(fd)
+        finally:
+            os.close(fd)  # 닫으면 flock도 해제
+        self.refresh()
+        return len(new_rows), updated
+
+def record_catalogue(channel_id: str, records: Sequence, published: Dict[str, Optional[dt.datetime]],
+                     now: dt.datetime, path: Optional[str] = None) -> VideoCatalogue:
+    """이번에 조회한 VideoRecord를 카탈로그 인덱스에 반영 (새 영상 추가 / 기존 영상 통계 갱신)"""
+    catalogue = VideoCatalogue(path or video_catalogue_path(channel_id))
+    rows = []
+    for v in records:
+        when = published.get(v.id)
+        if when is None and v.upload_date:
+            when = dt.datetime.strptime(v.upload_date, '%Y-%m-%d')
+        rows.append((v.id, to_epoch(when), v.duration_seconds, v.is_short, v.views, v.likes, v.comments))
+    catalogue.upsert(rows, now)
+    return catalogue
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+영상별 일간 스냅샷 저장소 + 성장 지표 계산
+- 저장 구조 (STATE_DIR/video_snapshots/<채널ID>/)
+    · ids.txt          : 영상 ID 목록 (append-only, 줄 번호 = 전역 인덱스)
+    · YYYY-MM-DD.npz   : 그날 스냅샷 열 배열 (idx, views, likes, comments, stats_at)
+      stats_at = 값을 실제로 조회한 시각(epoch 초). 갱신 주기가 긴 영상은 마지막 조회값을 다시 남기므로
+      스냅샷 날짜가 아니라 이 시각 차이로 증가를 나눔 (이전 형식 파일은 스냅샷 날짜 0시로 간주)
+- 성장 지표는 카탈로그 전체를 전역 인덱스 배열로 펼쳐 numpy 한 번에 계산
+    · views_1d / views_7d / views_30d : 기간 조회수 증가 (두 조회 시각 사이 증가를 기간 길이로 환산)
+    · velocity_7d                     : 최근 7일 일평균 조회수 증가
+    · 두 조회 시각 사이가 기간의 절반 미만이면(이후 다시 조회하지 않은 영상 등) NaN
+    · rank_change_7d                  : 조회수 순위 변화 (양수 = 상승)
+- API 추가 호출 없음 (이미 수집한 statistics만 사용)
+"""
+
+import os
+import datetime as dt
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from env_config import STATE_DIR
+
+SNAPSHOT_WINDOWS = (1, 7, 30)
+SNAPSHOT_RETENTION_DAYS = int(os.getenv('SNAPSHOT_RETENTION_DAYS', '45'))
+SNAPSHOT_COLUMNS = ('views', 'likes', 'comments')
+SECONDS_PER_DAY = 86400
+
+def day_epoch(day: dt.date) -> int:
+    return int(dt.datetime(day.year, day.month, day.day, tzinfo=dt.timezone.utc).timestamp())
+
+def window_tolerance(days: int) -> int:
+    """기준일 스냅샷이 없을 때 허용하는 추가 일수 (1일→1, 7일→1, 30일→7)"""
+    return max(1, days // 4)
+
+def rank_desc(values: np.ndarray) -> np.ndarray:
+    """큰 값이 1위인 순위 (NaN은 NaN)"""
+    out = np.full(values.shape, np.nan)
+    present = np.flatnonzero(~np.isnan(values))
+    order = present[np.argsort(-values[present], kind='stable')]
+    out[order] = np.arange(1, len(order) + 1)
+    return out
+
+class SnapshotStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.ids_path = os.path.join(root, 'ids.txt')
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, encoding='utf-8') as f:
+                self.ids = [line.rstrip('\n') for line in f if line.strip()]
+            self.index = {vid: i for i, vid in enumerate(self.ids)}
+
+    def register(self, video_ids: Sequence[str]) -> np.ndarray:
+        """영상 ID → 전역 인덱스 (처음 보는 ID는 ids.txt 끝에 추가)"""
+        new_ids = [vid for vid in dict.fromkeys(video_ids) if vid not in self.index]
+        if new_ids:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.ids_path, 'a', encoding='utf-8') as f:
+                f.writelines(f"{vid}\n" for vid in new_ids)
+            for vid in new_ids:
+                self.index[vid] = len(self.ids)
+                self.ids.append(vid)
+        return np.fromiter((self.index[vid] for vid in video_ids), dtype=np.int32, count=len(video_ids))
+
+    def _path(self, day: dt.date) -> str:
+        return os.path.join(self.root, f"{day.isoformat()}.npz")
+
+    def days(self) -> List[dt.date]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(dt.date.fromisoformat(name[:-4]) for name in os.listdir(self.root) if name.endswith('.npz'))
+
+    def save(self, day: dt.date, idx: np.ndarray, columns: Dict[str, np.ndarray]):
+        """그날 스냅샷 저장 (같은 날 재실행 시 교체)"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._path(day)}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, idx=idx, **{name: columns[name].astype(np.int64) for name in SNAPSHOT_COLUMNS + ('stats_at',)})
+        os.replace(tmp_path, self._path(day))
+
+    def load(self, day: dt.date, column: str) -> np.ndarray:
+        """스냅샷 한 열을 전역 인덱스 길이 배열로 펼침 (없는 영상은 NaN)"""
+        out = np.full(len(self.ids), np.nan)
+        with np.load(self._path(day)) as data:
+            if column == 'stats_at' and column not in data.files:
+                out[data['idx']] = day_epoch(day)
+            else:
+                out[data['idx']] = data[column]
+        return out
+
+    def nearest_before(self, target: dt.date, tolerance: int, days: List[dt.date]) -> Optional[dt.date]:
+        """target 이전 tolerance일 이내의 가장 가까운 스냅샷 날짜"""
+        candidates = [d for d in days if target - dt.timedelta(days=tolerance) <= d <= target]
+        return candidates[-1] if candidates else None
+
+    def prune(self, today: dt.date, keep_days: int = SNAPSHOT_RETENTION_DAYS):
+        for day in self.days():
+            if (today - day).days > keep_days:
+                os.remove(self._path(day))
+
+class VideoGrowth:
+    """전역 인덱스 정렬 성장 지표 열 배열 + 영상 ID 조회"""
+
+    COLUMNS = ('views_1d', 'views_7d', 'views_30d', 'velocity_7d', 'rank_change_7d')
+
+    def __init__(self, index: Dict[str, int], columns: Dict[str, np.ndarray]):
+        self.index = index
+        self.columns = columns
+
+    def value(self, video_id: str, column: str) -> float:
+        i = self.index.get(video_id)
+        return float(self.columns[column][i]) if i is not None else float('nan')
+
+    def row(self, video_id: str) -> List:
+        """시트 행용 값 (값이 없으면 빈 칸)"""
+        out = []
+        for column in self.COLUMNS:
+            value = self.value(video_id, column)
+            out.append('' if np.isnan(value) else (round(value, 1) if column == 'velocity_7d' else int(value)))
+        return out
+
+def record_and_compute_growth(channel_id: str, video_ids: Sequence[str], columns: Dict[str, Sequence[int]],
+                              today: Optional[dt.date] = None, root: Optional[str] = None) -> VideoGrowth:
+    """
+    오늘 스냅샷을 저장하고 과거 스냅샷과 비교한 성장 지표 계산
+    - columns['stats_at']: 영상별 값 조회 시각 epoch 초 (없으면 모두 오늘 0시)
+    """
+    today = today or dt.datetime.utcnow().date()
+    store = SnapshotStore(root or os.path.join(STATE_DIR, 'video_snapshots', channel_id))
+    idx = store.register(video_ids)
+    arrays = {name: np.asarray(columns[name], dtype=np.int64) for name in SNAPSHOT_COLUMNS}
+    arrays['stats_at'] = (np.asarray(columns['stats_at'], dtype=np.int64) if 'stats_at' in columns
+                          else np.full(len(idx), day_epoch(today), dtype=np.int64))
+    store.save(today, idx, arrays)
+
+    current = np.full(len(store.ids), np.nan)
+    current[idx] = arrays['views']
+    current_at = np.full(len(store.ids), np.nan)
+    current_at[idx] = arrays['stats_at']
+    past_days = [d for d in store.days() if d < today]
+
+    growth: Dict[str, np.ndarray] = {}
+    past_views: Dict[int, np.ndarray] = {}
+    elapsed_7d = None
+    for window in SNAPSHOT_WINDOWS:
+        day = store.nearest_before(today - dt.timedelta(days=window), window_tolerance(window), past_days)
+        if day is None:
+            growth[f'views_{window}d'] = np.full(len(store.ids), np.nan)
+            continue
+        past_views[window] = store.load(day, 'views')
+        # 스냅샷 날짜가 아니라 실제 조회 시각 사이 경과 일수 (다시 조회하지 않았으면 0 → NaN)
+        elapsed = (current_at - store.load(day, 'stats_at')) / SECONDS_PER_DAY
+        elapsed[~(elapsed >= window / 2)] = np.nan
+        growth[f'views_{window}d'] = (current - past_views[window]) * window / elapsed
+        if window == 7:
+            elapsed_7d = elapsed
+
+    if elapsed_7d is not None:
+        growth['velocity_7d'] = (current - past_views[7]) / elapsed_7d
+    else:
+        growth['velocity_7d'] = np.full(len(store.ids), np.nan)
+    if 7 in past_views:
+        growth['rank_change_7d'] = rank_desc(past_views[7]) - rank_desc(current)
+    else:
+        growth['rank_change_7d'] = np.full(len(store.ids), np.nan)
+
+    store.prune(today)
+    return VideoGrowth(store.index, growth)
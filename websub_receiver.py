@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YouTube WebSub(PubSubHubbub) 푸시 수신기 (선택 실행, 장기 실행 프로세스)
+- 채널 피드(topic)를 허브에 구독하고, 새 업로드/수정/삭제 알림(Atom)의 영상 ID만 갱신 대기열에 넣음
+- 대기열은 WEBSUB_DEBOUNCE_SECONDS 동안 모은 뒤 videos.list 배치로 한 번에 갱신 (refresh_videos)
+  → 알림이 없으면 YouTube API 호출 0회 (구독 갱신은 허브 호출만)
+- GET  : 구독 확인 (우리 topic이면 hub.challenge를 그대로 응답, 아니면 404)
+- POST : 알림 수신 (WEBSUB_SECRET 설정 시 X-Hub-Signature HMAC 검증,
+         불일치는 허브 재전송을 막기 위해 2xx로 응답하되 내용은 무시)
+- 오프라인 데모: 로컬 대체 허브(LocalHub)가 구독 확인 → 서명된 샘플 알림 전송
+  (YouTube/외부 허브 호출 없이 수신 → 검증 → 대기열 → 갱신 호출까지 확인)
+
+사용:
+    WEBSUB_CALLBACK_URL=https://<공개 주소>/websub WEBSUB_SECRET=... python websub_receiver.py
+    python websub_receiver.py --demo
+"""
+
+import os
+import hmac
+import hashlib
+import logging
+import argparse
+import secrets
+import threading
+import urllib.parse
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+
+CHANNEL_ID = os.getenv('CHANNEL_ID', 'UCEtPneQeO1IE08MndfjzndQ')
+WEBSUB_HUB_URL = os.getenv('WEBSUB_HUB_URL', 'https://pubsubhubbub.appspot.com/subscribe')
+WEBSUB_CALLBACK_URL = os.getenv('WEBSUB_CALLBACK_URL', '')
+WEBSUB_HOST = os.getenv('WEBSUB_HOST', '0.0.0.0')
+WEBSUB_PORT = int(os.getenv('WEBSUB_PORT', os.getenv('PORT', '8080')))
+WEBSUB_SECRET = os.getenv('WEBSUB_SECRET', '')
+WEBSUB_LEASE_SECONDS = int(os.getenv('WEBSUB_LEASE_SECONDS', str(5 * 24 * 3600)))
+WEBSUB_DEBOUNCE_SECONDS = float(os.getenv('WEBSUB_DEBOUNCE_SECONDS', '30'))
+# 임대 기간의 이 비율이 지나면 재구독
+WEBSUB_RENEW_RATIO = 0.8
+MAX_NOTIFICATION_BYTES = 1024 * 1024
+
+ATOM_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'yt': 'http://www.youtube.com/xml/schemas/2015',
+    'at': 'http://purl.org/atompub/tombstones/1.0',
+}
+
+def channel_topic(channel_id: str) -> str:
+    return f"https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+
+# ========================
+# 알림 파싱 / 서명
+# ========================
+def parse_notification(body: bytes) -> List[Dict]:
+    """Atom 알림 → [{'video_id', 'channel_id', 'published', 'updated', 'deleted'}]"""
+    root = ET.fromstring(body)
+    out = []
+    for entry in root.findall('atom:entry', ATOM_NS):
+        out.append({
+            'video_id': entry.findtext('yt:videoId', '', ATOM_NS),
+            'channel_id': entry.findtext('yt:channelId', '', ATOM_NS),
+            'published': entry.findtext('atom:published', '', ATOM_NS),
+            'updated': entry.findtext('atom:updated', '', ATOM_NS),
+            'deleted': False,
+        })
+    # 삭제 알림: <at:deleted-entry ref="yt:video:VIDEO_ID" when="..."/>
+    for tombstone in root.findall('at:deleted-entry', ATOM_NS):
+        out.append({
+            'video_id': tombstone.get('ref', '').rsplit(':', 1)[-1],
+            'channel_id': '',
+            'published': '',
+            'updated': tombstone.get('when', ''),
+            'deleted': True,
+        })
+    return [n for n in out if n['video_id']]
+
+def sign_body(body: bytes, secret: str) -> str:
+    """허브와 같은 방식의 X-Hub-Signature 값 (sha1=<hex>)"""
+    return 'sha1=' + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+
+def verify_signature(body: bytes, header: Optional[str], secret: str) -> bool:
+    if not secret:
+        return True
+    if not header:
+        return False
+    algorithm, _, digest = header.partition('=')
+    if algorithm not in ('sha1', 'sha256', 'sha384', 'sha512'):
+        return False
+    expected = hmac.new(secret.encode(), body, getattr(hashlib, algorithm)).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+# ========================
+# 갱신 대기열
+# ========================
+class RefreshQueue:
+    """알림으로 들어온 영상 ID를 모아 debounce 후 refresh(ids)를 한 번 호출 (중복 ID는 한 번만)"""
+
+    def __init__(self, refresh: Callable[[List[str]], object], debounce_seconds: float = WEBSUB_DEBOUNCE_SECONDS):
+        self.refresh = refresh
+        self.debounce_seconds = debounce_seconds
+        self.pending: Dict[str, None] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='websub-refresh', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def put(self, video_ids: List[str]):
+        with self.lock:
+            for vid in video_ids:
+                self.pending[vid] = None
+        self.wakeup.set()
+
+    def stop(self):
+        """남은 대기열을 처리하고 종료"""
+        self.stopped.set()
+        self.wakeup.set()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            if not self.stopped.is_set():
+                # 업로드 직후 연달아 오는 알림(공개 전환, 제목 수정 등)을 한 배치로
+                self.stopped.wait(self.debounce_seconds)
+            with self.lock:
+                video_ids = list(self.pending)
+                self.pending.clear()
+                self.wakeup.clear()
+            if video_ids:
+                try:
+                    self.refresh(video_ids)
+                    logging.info(f"🔄 알림 영상 {len(video_ids)}개 갱신")
+                except Exception as e:
+                    # 다음 정기 실행의 갱신 스케줄이 다시 챙김
+                    logging.error(f"❌ 알림 영상 갱신 실패 ({len(video_ids)}개): {e}")
+            if self.stopped.is_set():
+                return
+
+# ========================
+# 수신기
+# ========================
+class WebSubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        status, body = self.server.receiver.handle_verification(params)
+        self._respond(status, body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_NOTIFICATION_BYTES:
+            self._respond(413)
+            return
+        body = self.rfile.read(length)
+        self._respond(self.server.receiver.handle_notification(body, self.headers.get('X-Hub-Signature')))
+
+    def _respond(self, status: int, body: bytes = b''):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"websub {self.address_string()} {format % args}")
+
+class WebSubReceiver:
+    def __init__(self, channel_id: str, on_videos: Callable[[List[str]], None], secret: str = WEBSUB_SECRET,
+                 host: str = WEBSUB_HOST, port: int = WEBSUB_PORT):
+        self.channel_id = channel_id
+        self.topic = channel_topic(channel_id)
+        self.on_videos = on_videos
+        self.secret = secret
+        self.lease_seconds: Optional[int] = None
+        self.verified = threading.Event()
+        self.server = ThreadingHTTPServer((host, port), WebSubHandler)
+        self.server.receiver = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/websub"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='websub-server', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_verification(self, params: Dict[str, str]) -> Tuple[int, bytes]:
+        mode, challenge = params.get('hub.mode'), params.get('hub.challenge')
+        if params.get('hub.topic') != self.topic or mode not in ('subscribe', 'unsubscribe') or not challenge:
+            return 404, b''
+        if mode == 'subscribe':
+            self.lease_seconds = int(params.get('hub.lease_seconds') or 0) or None
+            self.verified.set()
+            logging.info(f"✅ WebSub 구독 확인 (임대 {self.lease_seconds}s)")
+        return 200, challenge.encode()
+
+    def handle_notification(self, body: bytes, signature: Optional[str]) -> int:
+        if not verify_signature(body, signature, self.secret):
+            logging.warning("⚠️ WebSub 서명 불일치 → 알림 무시")
+            return 202
+        try:
+            notifications = parse_notification(body)
+        except ET.ParseError as e:
+            logging.warning(f"⚠️ WebSub 알림 파싱 실패: {e}")
+            return 400
+        video_ids = [n['video_id'] for n in notifications if n['channel_id'] in ('', self.channel_id)]
+        if video_ids:
+            logging.info(f"📨 WebSub 알림: {', '.join(video_ids)}")
+            self.on_videos(video_ids)
+        return 204
+
+def subscribe(hub_url: str, callback_url: str, topic: str, secret: str = '',
+              lease_seconds: int = WEBSUB_LEASE_SECONDS, mode: str = 'subscribe') -> int:
+    """허브에 구독 요청 (확인은 허브가 callback으로 GET 하면서 비동기로 진행)"""
+    form = {
+        'hub.callback': callback_url,
+        'hub.topic': topic,
+        'hub.mode': mode,
+        'hub.verify': 'async',
+        'hub.lease_seconds': str(lease_seconds),
+    }
+    if secret:
+        form['hub.secret'] = secret
+    resp = requests.post(hub_url, data=form, timeout=30)
+    resp.raise_for_status()
+    return resp.status_code
+
+def keep_subscribed(receiver: WebSubReceiver, hub_url: str, callback_url: str, stop: threading.Event):
+    """구독 → 확인 대기 → 임대 기간의 WEBSUB_RENEW_RATIO 시점에 재구독 반복"""
+    while not stop.is_set():
+        receiver.verified.clear()
+        try:
+            subscribe(hub_url, callback_url, receiver.topic, receiver.secret)
+            if not receiver.verified.wait(60):
+                raise TimeoutError("허브의 구독 확인 요청이 오지 않았습니다 (callback 주소 확인)")
+            delay = (receiver.lease_seconds or WEBSUB_LEASE_SECONDS) * WEBSUB_RENEW_RATIO
+        except Exception as e:
+            logging.error(f"❌ WebSub 구독 실패 → 5분 후 재시도: {e}")
+            delay = 300
+        stop.wait(delay)
+
+# ========================
+# 오프라인 테스트용 대체 허브
+# ========================
+class LocalHubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+        status = self.server.hub.handle_subscribe(form)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logging.debug(f"local-hub {format % args}")
+
+class LocalHub:
+    """구독 요청 접수(202) → callback에 challenge GET으로 확인 → publish()로 서명된 알림 POST"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.subscriptions: Dict[Tuple[str, str], str] = {}  # (callback, topic) → secret
+        self.changed = threading.Condition()
+        self.server = ThreadingHTTPServer((host, port), LocalHubHandler)
+        self.server.hub = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/subscribe"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='local-hub', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_subscribe(self, form: Dict[str, str]) -> int:
+        if not form.get('hub.callback') or not form.get('hub.topic') or form.get('hub.mode') not in ('subscribe', 'unsubscribe'):
+            return 400
+        threading.Thread(target=self._verify, args=(form,), daemon=True).start()
+        return 202
+
+    def _verify(self, form: Dict[str, str]):
+        challenge = secrets.token_urlsafe(16)
+        resp = requests.get(form['hub.callback'], timeout=10, params={
+            'hub.mode': form['hub.mode'],
+            'hub.topic': form['hub.topic'],
+            'hub.challenge': challenge,
+            'hub.lease_seconds': form.get('hub.lease_seconds', ''),
+        })
+        if resp.status_code != 200 or resp.text != challenge:
+            logging.warning(f"local-hub: 구독 확인 실패 ({resp.status_code})")
+            return
+        key = (form['hub.callback'], form['hub.topic'])
+        with self.changed:
+            if form['hub.mode'] == 'subscribe':
+                self.subscriptions[key] = form.get('hub.secret', '')
+            else:
+                self.subscriptions.pop(key, None)
+            self.changed.notify_all()
+
+    def wait_for_subscription(self, topic: str, timeout: float = 10) -> bool:
+        with self.changed:
+            return self.changed.wait_for(lambda: any(t == topic for _, t in self.subscriptions), timeout)
+
+    def publish(self, topic: str, body: bytes, secret_override: Optional[str] = None) -> List[int]:
+        """topic 구독자 모두에게 알림 POST (secret_override로 위조 서명 테스트)"""
+        statuses = []
+        for (callback, sub_topic), secret in list(self.subscriptions.items()):
+            if sub_topic != topic:
+                continue
+            headers = {'Content-Type': 'application/atom+xml'}
+            key = secret if secret_override is None else secret_override
+            if key:
+                headers['X-Hub-Signature'] = sign_body(body, key)
+            statuses.append(requests.post(callback, data=body, headers=headers, timeout=10).status_code)
+        return statuses
+
+def sample_notification(channel_id: str, video_id: str, title: str = '새 영상',
+                        published: str = '2025-01-01T09:00:00+00:00', updated: Optional[str] = None) -> bytes:
+    """YouTube 허브가 보내는 형식의 새 업로드/수정 알림"""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{channel_topic(channel_id)}"/>
+  <title>YouTube video feed</title>
+  <updated>{updated or published}</updated>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>{title}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+    <published>{published}</published>
+    <updated>{updated or published}</updated>
+  </entry>
+</feed>""".encode('utf-8')
+
+def sample_deletion(channel_id: str, video_id: str, when: str = '2025-01-02T09:00:00+00:00') -> bytes:
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:at="http://purl.org/atompub/tombstones/1.0" xmlns="http://www.w3.org/2005/Atom">
+  <at:deleted-entry ref="yt:video:{video_id}" when="{when}"/>
+  <link rel="self" href="{channel_topic(channel_id)}"/>
+</feed>""".encode('utf-8')
+
+def run_demo() -> bool:
+    """로컬 허브로 구독 → 알림 4건(새 업로드, 수정, 삭제, 위조 서명) → 대기열 처리 결과 확인"""
+    secret = secrets.token_hex(16)
+    refreshed: List[List[str]] = []
+    done = threading.Event()
+
+    def fake_refresh(video_ids: List[str]):
+        refreshed.append(video_ids)
+        done.set()
+
+    queue = RefreshQueue(fake_refresh, debounce_seconds=1)
+    queue.start()
+    receiver = WebSubReceiver(CHANNEL_ID, queue.put, secret=secret, host='127.0.0.1', port=0)
+    receiver.start()
+    hub = LocalHub()
+    hub.start()
+    try:
+        subscribe(hub.url, receiver.url, receiver.topic, secret=secret, lease_seconds=600)
+        if not hub.wait_for_subscription(receiver.topic):
+            logging.error("❌ 로컬 허브 구독 확인 실패")
+            return False
+        statuses = [
+            *hub.publish(receiver.topic, sample_notification(CHANNEL_ID, 'demoVideo01', '데모 업로드')),
+            *hub.publish(receiver.topic, sample_notification(CHANNEL_ID, 'demoVideo01', '데모 업로드 (제목 수정)',
+                                                             updated='2025-01-01T10:00:00+00:00')),
+            *hub.publish(receiver.topic, sample_deletion(CHANNEL_ID, 'demoVideo00')),
+            *hub.publish(receiver.topic, sample_notification(CHANNEL_ID, 'forgedVideo'), secret_override='wrong'),
+        ]
+        done.wait(10)
+    finally:
+        queue.stop()
+        receiver.stop()
+        hub.stop()
+
+    logging.info(f"📨 알림 응답 코드: {statuses}, 임대 {receiver.lease_seconds}s")
+    logging.info(f"🔄 갱신 배치: {refreshed}")
+    ok = refreshed == [['demoVideo01', 'demoVideo00']]
+    logging.info("✅ WebSub 데모 통과" if ok else "❌ WebSub 데모 결과가 예상과 다릅니다")
+    return ok
+
+# ========================
+# 메인
+# ========================
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--demo', action='store_true', help='로컬 대체 허브로 오프라인 동작 확인')
+    args = parser.parse_args()
+
+    if args.demo:
+        raise SystemExit(0 if run_demo() else 1)
+
+    if not WEBSUB_CALLBACK_URL:
+        raise ValueError("WEBSUB_CALLBACK_URL (허브가 접근할 수 있는 공개 주소)을 설정하세요.")
+    if not WEBSUB_SECRET:
+        logging.warning("⚠️ WEBSUB_SECRET 미설정 → 알림 서명 검증 없이 수신")
+
+    from yt_video_analysis_fixed import get_youtube_client, refresh_videos
+    youtube, _ = get_youtube_client()
+
+    # YouTube 클라이언트(httplib2)는 스레드 안전하지 않으므로 갱신은 대기열 스레드 하나에서만
+    queue = RefreshQueue(lambda video_ids: refresh_videos(youtube, video_ids))
+    queue.start()
+    receiver = WebSubReceiver(CHANNEL_ID, queue.put)
+    receiver.start()
+    logging.info(f"📡 WebSub 수신 대기: {WEBSUB_HOST}:{WEBSUB_PORT} (callback {WEBSUB_CALLBACK_URL})")
+
+    stop = threading.Event()
+    try:
+        keep_subscribed(receiver, WEBSUB_HUB_URL, WEBSUB_CALLBACK_URL, stop)
+    except KeyboardInterrupt:
+        logging.info("🛑 종료 중...")
+    finally:
+        stop.set()
+        receiver.stop()
+        queue.stop()
+
+if __name__ == '__main__':
+    main()
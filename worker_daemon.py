@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+상주 워커 데몬 (cron 실행마다 반복되는 import/토큰 로드/discovery 빌드 비용 제거)
+- 시작 시 잡별 자격 증명, 서비스 클라이언트, HTTP 풀을 한 번 만들어 두고 실행 간 재사용 (warm)
+    · yt_monthly        : yt_monthly_report.main (YouTube 자격 증명, Sheets 클라이언트, 수집 스레드 풀)
+    · yt_videos         : yt_video_analysis_fixed.main (YouTube/Analytics/Sheets 클라이언트)
+    · instagram_monthly : InstagramMonthlyReport.run_monthly_report (Graph 세션, Sheets 클라이언트)
+- 내부 스케줄러: 잡별 일정(DAEMON_SCHEDULE_*) + 0~DAEMON_JITTER_SECONDS 무작위 지연
+    · every:<초>        예) every:300
+    · daily:HH:MM       예) daily:00:00 (UTC)
+    · monthly:D:HH:MM   예) monthly:1:00:00 (UTC, D가 그달 마지막 날보다 크면 마지막 날)
+    · off               비활성
+- 같은 잡은 겹쳐 실행하지 않음, 실패 시 해당 잡의 warm 상태를 버리고 다음 실행에서 다시 생성
+- 로컬 제어 엔드포인트 (127.0.0.1:DAEMON_CONTROL_PORT)
+    · GET  /status         잡별 상태/다음 실행/마지막 소요 시간(JSON)
+    · POST /run/<잡 이름>   즉시 실행 (이미 실행 중이면 409)
+
+사용:
+    python worker_daemon.py
+    curl -X POST localhost:8765/run/yt_videos
+"""
+
+import os
+import json
+import time
+import random
+import calendar
+import logging
+import threading
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+
+DAEMON_CONTROL_HOST = os.getenv('DAEMON_CONTROL_HOST', '127.0.0.1')
+DAEMON_CONTROL_PORT = int(os.getenv('DAEMON_CONTROL_PORT', '8765'))
+DAEMON_JITTER_SECONDS = float(os.getenv('DAEMON_JITTER_SECONDS', '120'))
+# 기본 일정은 GitHub Actions cron과 동일
+DAEMON_SCHEDULES = {
+    'yt_monthly': os.getenv('DAEMON_SCHEDULE_YT_MONTHLY', 'every:300'),
+    'yt_videos': os.getenv('DAEMON_SCHEDULE_YT_VIDEOS', 'daily:00:00'),
+    'instagram_monthly': os.getenv('DAEMON_SCHEDULE_INSTAGRAM_MONTHLY', 'monthly:1:00:00'),
+}
+
+# ========================
+# 일정
+# ========================
+def next_run_after(spec: str, now: dt.datetime) -> Optional[dt.datetime]:
+    """일정 문자열 기준 now 이후 첫 실행 시각 (UTC naive, off면 None)"""
+    kind, _, rest = spec.partition(':')
+    if kind == 'off':
+        return None
+    if kind == 'every':
+        return now + dt.timedelta(seconds=float(rest))
+    if kind == 'daily':
+        hour, minute = (int(x) for x in rest.split(':'))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return candidate if candidate > now else candidate + dt.timedelta(days=1)
+    if kind == 'monthly':
+        day, hour, minute = (int(x) for x in rest.split(':'))
+        year, month = now.year, now.month
+        if not 1 <= day <= 31:
+            raise ValueError(f"월간 일정의 날짜는 1~31이어야 합니다: {spec}")
+        while True:
+            # 29~31일은 짧은 달에 마지막 날로 당김
+            candidate = dt.datetime(year, month, min(day, calendar.monthrange(year, month)[1]), hour, minute)
+            if candidate > now:
+                return candidate
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    raise ValueError(f"알 수 없는 일정 형식: {spec} (every:<초> / daily:HH:MM / monthly:D:HH:MM / off)")
+
+# ========================
+# 잡
+# ========================
+class Job:
+    """warm(): 재사용할 클라이언트 dict 생성, run(clients): 실제 API 작업"""
+
+    def __init__(self, name: str, schedule: str, warm: Callable[[], Dict], run: Callable[[Dict], None]):
+        self.name = name
+        self.schedule = schedule
+        self.warm = warm
+        self.run = run
+        self.clients: Optional[Dict] = None
+        self.running = False
+        self.next_run: Optional[dt.datetime] = None
+        self.runs = 0
+        self.last_started: Optional[dt.datetime] = None
+        self.last_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.warm_seconds: Optional[float] = None
+
+    def ensure_warm(self) -> Dict:
+        if self.clients is None:
+            started = time.perf_counter()
+            self.clients = self.warm()
+            self.warm_seconds = time.perf_counter() - started
+            logging.info(f"🔥 [{self.name}] 클라이언트 준비 ({self.warm_seconds:.1f}s)")
+        return self.clients
+
+    def schedule_next(self, now: dt.datetime):
+        next_run = next_run_after(self.schedule, now)
+        self.next_run = next_run + dt.timedelta(seconds=random.uniform(0, DAEMON_JITTER_SECONDS)) if next_run else None
+
+    def status(self) -> Dict:
+        return {
+            'schedule': self.schedule,
+            'running': self.running,
+            'warm': self.clients is not None,
+            'warm_seconds': round(self.warm_seconds, 2) if self.warm_seconds is not None else None,
+            'next_run': self.next_run.isoformat(timespec='seconds') if self.next_run else None,
+            'runs': self.runs,
+            'last_started': self.last_started.isoformat(timespec='seconds') if self.last_started else None,
+            'last_seconds': round(self.last_seconds, 2) if self.last_seconds is not None else None,
+            'last_error': self.last_error,
+        }
+
+def warm_yt_monthly() -> Dict:
+    import yt_monthly_report as job
+    yt_creds = job.get_youtube_credentials()
+    return {
+        'yt_creds': yt_creds,
+        'sheets': job.build_sheets_client(yt_creds),
+        # 상주 풀: 스레드별 YouTube 클라이언트가 실행 간에도 유지됨
+        'pool': ThreadPoolExecutor(max_workers=max(1, job.FETCH_WORKERS), thread_name_prefix='yt-monthly'),
+    }
+
+def run_yt_monthly(clients: Dict):
+    import yt_monthly_report as job
+    job.main(**clients)
+
+def warm_yt_videos() -> Dict:
+    import yt_video_analysis_fixed as job
+    youtube, _ = job.get_youtube_client()
+    return {
+        'youtube': youtube,
+        'gc': job.get_sheets_client(),
+        'yt_analytics': job.get_yt_analytics_client() if job.USE_YT_ANALYTICS else None,
+    }
+
+def run_yt_videos(clients: Dict):
+    import yt_video_analysis_fixed as job
+    job.main(**clients)
+
+def warm_instagram_monthly() -> Dict:
+    from instagram_monthly_report import InstagramMonthlyReport
+    return {'report': InstagramMonthlyReport()}
+
+def run_instagram_monthly(clients: Dict):
+    clients['report'].run_monthly_report()
+
+def default_jobs() -> List[Job]:
+    return [
+        Job('yt_monthly', DAEMON_SCHEDULES['yt_monthly'], warm_yt_monthly, run_yt_monthly),
+        Job('yt_videos', DAEMON_SCHEDULES['yt_videos'], warm_yt_videos, run_yt_videos),
+        Job('instagram_monthly', DAEMON_SCHEDULES['instagram_monthly'], warm_instagram_monthly, run_instagram_monthly),
+    ]
+
+# ========================
+# 데몬
+# ========================
+class WorkerDaemon:
+    def __init__(self, jobs: List[Job]):
+        self.jobs = {job.name: job for job in jobs}
+        self.lock = threading.Condition()
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix='daemon-job')
+
+    def prewarm(self):
+        """예정된 잡의 클라이언트를 미리 준비 (실패하면 첫 실행 때 다시 시도)"""
+        for job in self.jobs.values():
+            if job.schedule == 'off':
+                continue
+            try:
+                job.ensure_warm()
+            except Exception as e:
+                logging.error(f"❌ [{job.name}] 클라이언트 준비 실패: {e}")
+
+    def trigger(self, name: str) -> bool:
+        """즉시 실행 요청 (이미 실행 중이면 False)"""
+        job = self.jobs[name]
+        with self.lock:
+            if job.running:
+                return False
+            job.running = True
+        self.executor.submit(self._run_job, job)
+        return True
+
+    def _run_job(self, job: Job):
+        job.last_started = dt.datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            clients = job.ensure_warm()
+            run_started = time.perf_counter()
+            job.run(clients)
+            job.last_error = None
+            logging.info(f"✅ [{job.name}] 완료 ({time.perf_counter() - run_started:.1f}s)")
+        except BaseException as e:  # SystemExit 포함 (잡 main의 종료 요청이 데몬을 끝내지 않도록)
+            job.last_error = f"{type(e).__name__}: {e}"
+            # 토큰 만료/폐기 등으로 클라이언트가 깨졌을 수 있으므로 다음 실행에서 새로 준비
+            job.clients = None
+            logging.error(f"❌ [{job.name}] 실패: {job.last_error}")
+        finally:
+            job.last_seconds = time.perf_counter() - started
+            job.runs += 1
+            with self.lock:
+                job.running = False
+                self.lock.notify_all()
+
+    def run_forever(self):
+        now = dt.datetime.utcnow()
+        for job in self.jobs.values():
+            job.schedule_next(now)
+            if job.next_run:
+                logging.info(f"🗓️ [{job.name}] {job.schedule} → 다음 실행 {job.next_run:%Y-%m-%d %H:%M:%S} UTC")
+        while not self.stopped.is_set():
+            now = dt.datetime.utcnow()
+            for job in self.jobs.values():
+                if job.next_run and job.next_run <= now:
+                    job.schedule_next(now)
+                    if not self.trigger(job.name):
+                        logging.warning(f"⏭️ [{job.name}] 이전 실행이 아직 진행 중 → 이번 회차 건너뜀")
+            upcoming = [job.next_run for job in self.jobs.values() if job.next_run]
+            timeout = (min(upcoming) - dt.datetime.utcnow()).total_seconds() if upcoming else 3600
+            self.stopped.wait(max(0.5, min(timeout, 60)))
+
+    def stop(self):
+        self.stopped.set()
+        self.executor.shutdown(wait=True)
+        for job in self.jobs.values():
+            pool = (job.clients or {}).get('pool')
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def status(self) -> Dict:
+        return {name: job.status() for name, job in self.jobs.items()}
+
+# ========================
+# 제어 엔드포인트
+# ========================
+class ControlHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') == '/status':
+            self._respond(200, self.server.daemon_ref.status())
+        else:
+            self._respond(404, {'error': 'not found'})
+
+    def do_POST(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'run':
+            self._respond(404, {'error': 'not found'})
+            return
+        daemon = self.server.daemon_ref
+        if parts[1] not in daemon.jobs:
+            self._respond(404, {'error': f"unknown job: {parts[1]}", 'jobs': list(daemon.jobs)})
+        elif daemon.trigger(parts[1]):
+            self._respond(202, {'triggered': parts[1]})
+        else:
+            self._respond(409, {'error': f"{parts[1]} is already running"})
+
+    def _respond(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"control {format % args}")
+
+def start_control_server(daemon: WorkerDaemon, host: str = DAEMON_CONTROL_HOST,
+                         port: int = DAEMON_CONTROL_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), ControlHandler)
+    server.daemon_ref = daemon
+    threading.Thread(target=server.serve_forever, name='daemon-control', daemon=True).start()
+    logging.info(f"🎛️ 제어 엔드포인트: http://{host}:{server.server_address[1]} (GET /status, POST /run/<잡>)")
+    return server
+
+# ========================
+# 메인
+# ========================
+def main():
+    daemon = WorkerDaemon(default_jobs())
+    daemon.prewarm()
+    server = start_control_server(daemon)
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        logging.info("🛑 종료 중 (진행 중인 잡 완료 대기)...")
+    finally:
+        server.shutdown()
+        daemon.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+YouTube Analytics 쿼리 플래너
+- 순위가 필요한 경우: dimensions=video & sort=-<metric> & maxResults=200 한 번으로 상위 영상 조회
+- 특정 영상이 필요한 경우에만 video==id1,id2,... 필터로 폴백
+- 필터는 URL 길이 한도 안에서 분할하고, 400/413/414 응답이면 반으로 나눠 재시도
+- 메트릭 레지스트리: 같은 dimensions/기간의 메트릭은 reports().query 한 번으로 병합
+- 응답은 columnHeaders 이름/rows만 스키마로 디코딩해 바로 행 dict로 변환 (fast_json, msgspec 선택)
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from googleapiclient.errors import HttpError
+
+from fast_json import ReportResponse, TypedDecoder, execute_typed
+
+# Analytics API의 dimensions=video 정렬 조회 최대 행 수
+TOP_VIDEOS_MAX_RESULTS = 200
+
+# 필터 문자열 길이 상한 (쿼리스트링 전체 URL이 ~2K를 넘지 않도록 여유 있게)
+MAX_FILTER_CHARS = int(os.getenv("YTA_MAX_FILTER_CHARS", "1500"))
+
+# 필터 과대로 판단해 분할 재시도할 HTTP 상태
+SPLIT_RETRY_STATUSES = (400, 413, 414)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 공통
+# ──────────────────────────────────────────────────────────────────────────────
+
+def rows_to_dicts(resp: dict) -> List[Dict[str, object]]:
+    """columnHeaders 이름 기준으로 각 행을 dict로 변환"""
+    names = [h["name"] for h in resp.get("columnHeaders", [])]
+    return [dict(zip(names, row)) for row in resp.get("rows", [])]
+
+def rows_from_struct(resp) -> List[Dict[str, object]]:
+    names = [h.name for h in resp.columnHeaders]
+    return [dict(zip(names, row)) for row in resp.rows]
+
+REPORT_ROWS = TypedDecoder(rows_to_dicts, ReportResponse, rows_from_struct)
+
+def split_ids_for_filter(video_ids: List[str], max_chars: int = MAX_FILTER_CHARS) -> List[List[str]]:
+    """video==a,b,c 필터 문자열이 max_chars를 넘지 않도록 ID 목록을 분할"""
+    chunks, current, length = [], [], len("video==")
+    for vid in video_ids:
+        add = len(vid) + (1 if current else 0)
+        if current and length + add > max_chars:
+            chunks.append(current)
+            current, length = [], len("video==")
+            add = len(vid)
+        current.append(vid)
+        length += add
+    if current:
+        chunks.append(current)
+    return chunks
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 쿼리
+# ──────────────────────────────────────────────────────────────────────────────
+
+def query_top_videos(yta, channel_id: str, start_date: str, end_date: str,
+                     metrics: str = "views", sort_metric: str = "views",
+                     max_results: int = TOP_VIDEOS_MAX_RESULTS) -> List[Dict[str, object]]:
+    """기간 내 sort_metric 내림차순 상위 영상 (정렬 순서 유지)"""
+    request = yta.reports().query(
+        ids=f"channel=={channel_id}",
+        startDate=start_date,
+        endDate=end_date,
+        metrics=metrics,
+        dimensions="video",
+        sort=f"-{sort_metric}",
+        maxResults=max_results,
+    )
+    return execute_typed(request, REPORT_ROWS)
+
+def query_videos_by_ids(yta, channel_id: str, start_date: str, end_date: str,
+                        metrics: str, video_ids: Iterable[str],
+                        skip_failed: bool = False) -> List[Dict[str, object]]:
+    """
+    지정 영상만 필터로 조회 (URL 길이 기준 분할 + 실패 시 적응형 재분할)
+    - skip_failed=True면 더 나눌 수 없는 배치 오류는 로그만 남기고 건너뜀 (성공한 배치 행은 유지)
+    """
+    pending = split_ids_for_filter(list(dict.fromkeys(video_ids)))
+    out = []
+    while pending:
+        batch = pending.pop()
+        try:
+            rows = execute_typed(yta.reports().query(
+                ids=f"channel=={channel_id}",
+                startDate=start_date,
+                endDate=end_date,
+                metrics=metrics,
+                dimensions="video",
+                filters=f"video=={','.join(batch)}",
+            ), REPORT_ROWS)
+        except HttpError as e:
+            if len(batch) > 1 and getattr(e.resp, "status", None) in SPLIT_RETRY_STATUSES:
+                mid = len(batch) // 2
+                logging.info(f"Analytics 필터 분할 재시도: {len(batch)} → {mid}+{len(batch) - mid}")
+                pending.extend([batch[:mid], batch[mid:]])
+                continue
+            if skip_failed:
+                logging.warning(f"Analytics 필터 배치 실패 → 건너뜀 ({len(batch)}개 영상): {e}")
+                continue
+            raise
+        out.extend(rows)
+    return out
+
+def fetch_video_metrics(yta, channel_id: str, start_date: str, end_date: str,
+                        metrics: str, video_ids: List[str],
+                        sort_metric: str = "views") -> Dict[str, Dict[str, object]]:
+    """
+    video_ids의 기간 메트릭을 최소 호출로 조회
+    1) 정렬된 상위 200개 조회 한 번
+    2) 결과가 200개 미만이면 나머지 영상은 기간 내 데이터가 없는 것 → 추가 호출 없음
+    3) 200개로 잘렸고 빠진 영상이 있을 때만 ID 필터로 폴백
+       (폴백 배치 하나가 실패해도 나머지 결과는 유지, 실패한 배치 영상만 결과에서 빠짐)
+    """
+    wanted = set(video_ids)
+    top = query_top_videos(yta, channel_id, start_date, end_date, metrics=metrics, sort_metric=sort_metric)
+    results = {r["video"]: r for r in top if r["video"] in wanted}
+
+    missing = [vid for vid in video_ids if vid not in results]
+    if missing and len(top) >= TOP_VIDEOS_MAX_RESULTS:
+        for r in query_videos_by_ids(yta, channel_id, start_date, end_date, metrics, missing, skip_failed=True):
+            results[r["video"]] = r
+    return results
+
+def find_top_video(yta, channel_id: str, start_date: str, end_date: str,
+                   candidate_ids: List[str], metric: str = "views"):
+    """후보 영상 중 기간 내 metric 최대 영상 (video_id, value). 없으면 (None, 0)"""
+    if not candidate_ids:
+        return None, 0
+    candidates = set(candidate_ids)
+    top = query_top_videos(yta, channel_id, start_date, end_date, metrics=metric, sort_metric=metric)
+    for r in top:
+        if r["video"] in candidates:
+            return r["video"], int(r[metric])
+    if len(top) < TOP_VIDEOS_MAX_RESULTS:
+        return None, 0
+
+    best_id, best_value = None, 0
+    for r in query_videos_by_ids(yta, channel_id, start_date, end_date, metric, candidate_ids):
+        if int(r[metric]) > best_value:
+            best_id, best_value = r["video"], int(r[metric])
+    return best_id, best_value
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 메트릭 레지스트리 + 병합 플래너
+# ──────────────────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class MetricSpec:
+    """
+    보고서 한 항목의 선언
+    - key: 결과 dict 키
+    - metric: Analytics 메트릭 이름
+    - dimensions: 쉼표 구분 dimension 집합 ("" = 채널 합계)
+    - aggregation: total(단일 행 값) | sum(행 합계) | argmax(메트릭 최대 행 dict) | rows(전체 행 dict 목록)
+    """
+    key: str
+    metric: str
+    dimensions: str = ""
+    aggregation: str = "total"
+
+def aggregate_metric(spec: MetricSpec, rows: List[Dict[str, object]]):
+    if spec.aggregation == "total":
+        return rows[0].get(spec.metric, 0) if rows else 0
+    if spec.aggregation == "sum":
+        return sum(r.get(spec.metric) or 0 for r in rows)
+    if spec.aggregation == "argmax":
+        return max(rows, key=lambda r: float(r.get(spec.metric) or 0)) if rows else None
+    if spec.aggregation == "rows":
+        return rows
+    raise ValueError(f"알 수 없는 aggregation: {spec.aggregation}")
+
+def query_metrics(yta, channel_id: str, start_date: str, end_date: str,
+                  specs: List[MetricSpec]) -> Dict[str, object]:
+    """
+    specs를 dimensions 기준으로 묶어 그룹당 reports().query 1회로 조회하고
+    columnHeaders 이름으로 각 spec.key에 값을 매핑
+    """
+    groups: Dict[str, List[MetricSpec]] = {}
+    for spec in specs:
+        # "gender,ageGroup"와 "ageGroup,gender"는 같은 그룹 (열은 이름으로 매핑하므로 순서 무관)
+        dimensions = ",".join(sorted(d.strip() for d in spec.dimensions.split(",") if d.strip()))
+        groups.setdefault(dimensions, []).append(spec)
+
+    out = {}
+    for dimensions, group in groups.items():
+        metrics = ",".join(dict.fromkeys(spec.metric for spec in group))
+        params = dict(
+            ids=f"channel=={channel_id}",
+            startDate=start_date,
+            endDate=end_date,
+            metrics=metrics,
+        )
+        if dimensions:
+            params["dimensions"] = dimensions
+        rows = execute_typed(yta.reports().query(**params), REPORT_ROWS)
+        for spec in group:
+            out[spec.key] = aggregate_metric(spec, rows)
+    return out
@@ -5,13 +5,18 @@ YouTube(브랜드 채널) 지난달 요약을 수집해 Google Sheets에 기록
 - 기본: 단일 OAuth 토큰(YouTube+Sheets)
 - 옵션: 토큰 이원화(YouTube/Sheets) 또는 Sheets만 서비스계정 사용
 - Cloud Run Job(비대화형)에서 동작하도록 환경변수/시크릿 대응
-- 4행부터 기록, 지난달 기록 후 '전월' 4행이 비어있으면 자동 보충
+- 4행부터 기록, 지난달 기록 후 시트 범위 내 비어있는 모든 달을 한 번에 보충
+- Cloud Run Job 태스크가 여러 개면 달 목록을 태스크별로 나눠 수집하고 마지막 태스크가 한 번에 기록 (task_shards)
+- 시간 예산(JOB_TIME_BUDGET_SECONDS) 안에서 지난달 → 최근 공백 달 순으로 수집, 못 끝낸 달은 미루고 끝난 달만 기록
+- (선택) YT_MONTHLY_SINKS의 로컬 sink(SQLite/CSV/Parquet)에도 월별 요약 행을 월 키 기준으로 upsert
 """
 
 import os
 import json
 import logging
+import threading
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.relativedelta import relativedelta
 import isodate
 
@@ -22,13 +27,20 @@ from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from env_config import env_bool
+from job_checkpoint import JobCheckpoint
+from output_sinks import Sinks, Table, build_sinks, parse_sink_names
+from profiling import run_profiled
+from request_shaping import API_STATS, FastJsonModel, ShapedHttpRequest
+from run_lock import run_lease
+from task_shards import TASK_INDEX, ShardRun, sharding_enabled
+from time_budget import Deadline, WorkItem, run_prioritized
+from yt_analytics_query import MetricSpec, find_top_video, query_metrics
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 환경/설정
 # ──────────────────────────────────────────────────────────────────────────────
 
-def env_bool(name: str, default: bool = False) -> bool:
-    return str(os.getenv(name, str(default))).lower() in ("1", "true", "yes", "y")
-
 # 기본 경로 (로컬/클라우드 모두 커버)
 BASE_DIR = os.getenv("BASE_DIR", "/workspace")
 
@@ -64,6 +76,37 @@ SCOPES_SINGLE = SCOPES_YOUTUBE + SCOPES_SHEETS
 # 시트 기록 시작행(4로 고정)
 START_ROW = 4
 
+# 공백 보충: 월 헤더("N월")에 연도가 없으므로 최대 12개월 창 안에서만 탐지
+BACKFILL_MAX_MONTHS = 12
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))
+
+# 출력 sink (쉼표 구분: sheets, sqlite, csv, parquet)
+# 시트는 헤더로 공백 달을 찾으므로 항상 기록, 나머지 sink에는 같은 요약을 월 키 기준으로 upsert
+YT_MONTHLY_SINKS = os.getenv("YT_MONTHLY_SINKS", "sheets")
+MONTHLY_TABLE = Table("yt_monthly_summary", [
+    ("month_key", str), ("start_date", str), ("end_date", str), ("shorts", int), ("longs", int),
+    ("total_views", int), ("subs_net", int), ("subs_total", int), ("likes", int), ("comments", int),
+    ("shares", int), ("top_audience", str), ("max_video_title", str), ("max_video_views", int),
+], key="month_key")
+
+# 응답 fields 마스크 (호출부에서 실제로 읽는 필드만)
+SEARCH_FIELDS = "items/id/videoId"
+VIDEOS_FIELDS = "items(id,snippet/title,contentDetails/duration)"
+CHANNEL_STATS_FIELDS = "items/statistics/subscriberCount"
+
+# 월간 요약에 쓰이는 Analytics 메트릭 선언
+# 같은 dimensions끼리는 한 번의 reports().query로 병합되므로,
+# 예: MetricSpec("watch_minutes", "estimatedMinutesWatched") 추가는 API 호출이 늘지 않음
+MONTHLY_METRICS = [
+    MetricSpec("total_views", "views"),
+    MetricSpec("subs_gained", "subscribersGained"),
+    MetricSpec("subs_lost", "subscribersLost"),
+    MetricSpec("likes", "likes"),
+    MetricSpec("comments", "comments"),
+    MetricSpec("shares", "shares"),
+    MetricSpec("top_audience", "viewerPercentage", dimensions="ageGroup,gender", aggregation="argmax"),
+]
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(message)s"
@@ -99,18 +142,19 @@ def get_oauth_credentials(token_path: str, scopes: list, port: int) -> Credentia
                 f.write(creds.to_json())
     return creds
 
-def build_services():
-    """YouTube/Analytics + Sheets 서비스 생성 (토큰 이원화/서비스계정 옵션 지원)"""
-    # YouTube/Analytics
+def get_youtube_credentials() -> Credentials:
     if USE_DUAL_TOKENS:
-        yt_creds = get_oauth_credentials(TOKEN_YOUTUBE, SCOPES_YOUTUBE, OAUTH_PORT_YT)
-    else:
-        yt_creds = get_oauth_credentials(TOKEN_SINGLE, SCOPES_SINGLE, OAUTH_PORT_YT)
+        return get_oauth_credentials(TOKEN_YOUTUBE, SCOPES_YOUTUBE, OAUTH_PORT_YT)
+    return get_oauth_credentials(TOKEN_SINGLE, SCOPES_SINGLE, OAUTH_PORT_YT)
 
-    youtube = build("youtube", "v3", credentials=yt_creds)
-    yta = build("youtubeAnalytics", "v2", credentials=yt_creds)
+def build_youtube_clients(yt_creds):
+    """YouTube Data + Analytics 클라이언트 (httplib2는 스레드 안전하지 않으므로 스레드마다 따로 생성)"""
+    youtube = build("youtube", "v3", credentials=yt_creds, requestBuilder=ShapedHttpRequest, model=FastJsonModel())
+    yta = build("youtubeAnalytics", "v2", credentials=yt_creds, requestBuilder=ShapedHttpRequest, model=FastJsonModel())
+    return youtube, yta
 
-    # Sheets
+def build_sheets_client(yt_creds):
+    """Sheets 클라이언트 (서비스계정/토큰 이원화/단일 토큰)"""
     if USE_SERVICE_ACCOUNT_FOR_SHEETS and SERVICE_ACCOUNT_FILE:
         sh_creds = service_account.Credentials.from_service_account_file(
             SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
@@ -121,7 +165,13 @@ def build_services():
     else:
         sh_creds = yt_creds
 
-    sheets = build("sheets", "v4", credentials=sh_creds)
+    return build("sheets", "v4", credentials=sh_creds, requestBuilder=ShapedHttpRequest)
+
+def build_services():
+    """YouTube/Analytics + Sheets 서비스 생성 (토큰 이원화/서비스계정 옵션 지원)"""
+    yt_creds = get_youtube_credentials()
+    youtube, yta = build_youtube_clients(yt_creds)
+    sheets = build_sheets_client(yt_creds)
     return youtube, yta, sheets
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -148,6 +198,10 @@ def get_last_month_range():
     first_day_prev = last_day_prev.replace(day=1)
     return first_day_prev.isoformat(), last_day_prev.isoformat(), last_day_prev.year, last_day_prev.month
 
+def shift_month(year: int, month: int, delta: int):
+    idx = year * 12 + (month - 1) + delta
+    return idx // 12, idx % 12 + 1
+
 def get_month_range(year: int, month: int):
     start = dt.date(year, month, 1)
     if month == 12:
@@ -171,67 +225,45 @@ def fetch_month_stats(youtube, yta, channel_id, year: int, month: int):
         publishedAfter=start_date + "T00:00:00Z",
         publishedBefore=end_date + "T23:59:59Z",
         type="video",
-        maxResults=50
+        maxResults=50,
+        fields=SEARCH_FIELDS
     ).execute()
     video_ids = [it["id"]["videoId"] for it in uploads.get("items", [])]
 
     shorts = longs = 0
     title_map = {}
     if video_ids:
-        vd = youtube.videos().list(part="contentDetails,snippet", id=",".join(video_ids)).execute()
+        vd = youtube.videos().list(
+            part="contentDetails,snippet", id=",".join(video_ids), fields=VIDEOS_FIELDS
+        ).execute()
         for v in vd.get("items", []):
             secs = parse_duration_seconds(v["contentDetails"]["duration"])
             shorts += 1 if secs <= 60 else 0
             longs  += 1 if secs > 60 else 0
             title_map[v["id"]] = v["snippet"]["title"]
 
-    # 집계 메트릭
-    res = yta.reports().query(
-        ids=f"channel=={channel_id}",
-        startDate=start_date,
-        endDate=end_date,
-        metrics="views,subscribersGained,subscribersLost,likes,comments,shares"
-    ).execute()
-    row = res.get("rows", [[0,0,0,0,0,0]])[0]
-    total_views, subs_gained, subs_lost, likes, comments, shares = row
+    # 집계 메트릭 + 주요 시청자 (dimensions별 병합 쿼리)
+    metrics = query_metrics(yta, channel_id, start_date, end_date, MONTHLY_METRICS)
 
     # 현재 총 구독자수
-    ch = youtube.channels().list(part="statistics", id=channel_id).execute()
+    ch = youtube.channels().list(part="statistics", id=channel_id, fields=CHANNEL_STATS_FIELDS).execute()
     subscriber_count = int(ch["items"][0]["statistics"]["subscriberCount"])
 
     # 주요 시청자 (연령/성별 최대 비중)
-    aud = yta.reports().query(
-        ids=f"channel=={channel_id}",
-        startDate=start_date,
-        endDate=end_date,
-        metrics="viewerPercentage",
-        dimensions="ageGroup,gender"
-    ).execute()
-    audience_rows = aud.get("rows", [])
+    best = metrics["top_audience"]
     top_audience_label = ""
-    if audience_rows:
-        best = max(audience_rows, key=lambda r: float(r[2]))
-        age, gender, _ = best
+    if best:
+        age, gender = best["ageGroup"], best["gender"]
         age_label = age.replace("age", "").replace("-", "–")
         gender_label = "남성" if gender == "male" else "여성"
         top_audience_label = f"{age_label}세 {gender_label}"
 
-    # 신규영상 중 최대 조회수
+    # 신규영상 중 최대 조회수 (조회수 정렬 상위 200개 조회 1회, 필요 시에만 ID 필터 폴백)
     max_video_title, max_views = "", 0
-    if video_ids:
-        vv = yta.reports().query(
-            ids=f"channel=={channel_id}",
-            startDate=start_date,
-            endDate=end_date,
-            metrics="views",
-            dimensions="video",
-            filters=f"video=={','.join(video_ids)}"
-        ).execute()
-        for r in vv.get("rows", []):
-            vid, v = r[0], int(r[1])
-            if v > max_views:
-                max_views = v
-                max_video_title = title_map.get(vid, vid)
+    top_vid, top_views = find_top_video(yta, channel_id, start_date, end_date, video_ids)
+    if top_vid:
+        max_views = top_views
+        max_video_title = title_map.get(top_vid, top_vid)
 
     return {
         "start_date": start_date,
@@ -239,12 +271,12 @@ def fetch_month_stats(youtube, yta, channel_id, year: int, month: int):
         "month": month,
         "shorts": int(shorts),
         "longs": int(longs),
-        "total_views": int(total_views),
-        "subs_net": int(subs_gained) - int(subs_lost),
+        "total_views": int(metrics["total_views"]),
+        "subs_net": int(metrics["subs_gained"]) - int(metrics["subs_lost"]),
         "subs_total": int(subscriber_count),
-        "likes": int(likes),
-        "comments": int(comments),
-        "shares": int(shares),
+        "likes": int(metrics["likes"]),
+        "comments": int(metrics["comments"]),
+        "shares": int(metrics["shares"]),
         "top_audience": top_audience_label,
         "max_video_title": max_video_title,
         "max_video_views": int(max_views),
@@ -254,34 +286,8 @@ def fetch_month_stats(youtube, yta, channel_id, year: int, month: int):
 # Sheets
 # ──────────────────────────────────────────────────────────────────────────────
 
-def find_or_create_month_column(sheets, month_label: str) -> int:
-    rng = f"{SHEET_NAME}!1:3"
-    vals = sheets.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=rng
-    ).execute().get("values", [])
-    row3 = vals[2] if len(vals) >= 3 else []
-
-    for idx, v in enumerate(row3, start=1):
-        if v and v.strip() == month_label:
-            return idx
-
-    current_cols = max((len(r) for r in vals), default=1)
-    target_col = current_cols + 1
-    a1 = col_to_a1(target_col)
-    sheets.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"{SHEET_NAME}!{a1}3",
-        valueInputOption="USER_ENTERED",
-        body={"values": [[month_label]]}
-    ).execute()
-    return target_col
-
-def write_month_summary_to_sheet(sheets, summary: dict):
-    month_label = f"{summary['month']}월"
-    col = find_or_create_month_column(sheets, month_label)
-    colA1 = col_to_a1(col)
-
-    values = [
+def summary_to_values(summary: dict) -> list:
+    return [
         [f"{summary['start_date']} ~ {summary['end_date']}"],  # row 4
         [summary["shorts"]],                                   # row 5
         [summary["longs"]],                                    # row 6
@@ -296,59 +302,240 @@ def write_month_summary_to_sheet(sheets, summary: dict):
         [summary["max_video_views"]],                          # row15
     ]
 
-    start_row = START_ROW
-    end_row = start_row + len(values) - 1
-    rng = f"{SHEET_NAME}!{colA1}{start_row}:{colA1}{end_row}"
+def read_sheet_layout(sheets):
+    """1~4행을 한 번에 읽어 (월 라벨 → 열 번호, 4행 값 목록, 현재 사용 중인 열 수) 반환"""
+    vals = sheets.spreadsheets().values().get(
+        spreadsheetId=SPREADSHEET_ID, range=f"{SHEET_NAME}!1:{START_ROW}", fields="values"
+    ).execute().get("values", [])
+    vals += [[]] * (START_ROW - len(vals))
+    month_cols = {}
+    for idx, v in enumerate(vals[2], start=1):
+        if v and v.strip() and v.strip() not in month_cols:
+            month_cols[v.strip()] = idx
+    used_cols = max((len(r) for r in vals), default=1)
+    return month_cols, vals[START_ROW - 1], used_cols
+
+def find_month_gaps(month_cols: dict, period_row: list, last_year: int, last_month: int) -> list:
+    """
+    시트 범위(최근 12개월 중 3행 헤더가 있는 가장 오래된 달 ~ 지난달)에서
+    열이 없거나 4행(분석 기간)이 비어있는 달 [(year, month), ...] (오래된 순)
+    """
+    window = [shift_month(last_year, last_month, -k) for k in range(BACKFILL_MAX_MONTHS - 1, -1, -1)]
+    labelled = [i for i, (_, m) in enumerate(window) if f"{m}월" in month_cols]
+    if not labelled:
+        return []
+
+    gaps = []
+    for y, m in window[labelled[0]:]:
+        col = month_cols.get(f"{m}월")
+        cell = period_row[col - 1] if col and col <= len(period_row) else ""
+        if not str(cell).strip():
+            gaps.append((y, m))
+    return gaps
+
+def write_month_summaries(sheets, summaries: list, month_cols: dict, used_cols: int,
+                          checkpoint: JobCheckpoint = None):
+    """
+    여러 달 요약을 values().batchUpdate 한 번으로 기록 (없는 월 열은 3행 헤더와 함께 생성)
+    - checkpoint를 주면 보내기 전에 쓰기 내용을 로그에 남기고, 성공하면 완료 표시 (실패 시 다음 실행에서 재전송)
+    """
+    data = []
+    next_col = used_cols + 1
+    for summary in sorted(summaries, key=lambda s: s["start_date"]):
+        month_label = f"{summary['month']}월"
+        col = month_cols.get(month_label)
+        if col is None:
+            col = month_cols[month_label] = next_col
+            next_col += 1
+            data.append({"range": f"{SHEET_NAME}!{col_to_a1(col)}3", "values": [[month_label]]})
+        values = summary_to_values(summary)
+        colA1 = col_to_a1(col)
+        data.append({
+            "range": f"{SHEET_NAME}!{colA1}{START_ROW}:{colA1}{START_ROW + len(values) - 1}",
+            "values": values,
+        })
+    if not data:
+        return
+    body = {"valueInputOption": "USER_ENTERED", "data": data}
+    write_id = checkpoint.begin_write({"spreadsheet_id": SPREADSHEET_ID, "body": body}) if checkpoint else None
+    sheets.spreadsheets().values().batchUpdate(spreadsheetId=SPREADSHEET_ID, body=body).execute()
+    if checkpoint:
+        checkpoint.complete_write(write_id)
+
+def local_sinks() -> Sinks:
+    """YT_MONTHLY_SINKS 중 시트 외 sink (설정 오류는 수집 전에 예외)"""
+    return build_sinks([name for name in parse_sink_names(YT_MONTHLY_SINKS) if name != "sheets"], "yt_monthly_report")
+
+def write_local_summaries(sinks: Sinks, summaries: list):
+    """월별 요약 행을 로컬 sink에 upsert (시트 기록은 이미 끝났으므로 실패는 로그만)"""
+    if not sinks.sinks or not summaries:
+        return
+    columns = MONTHLY_TABLE.headers[1:]
+    rows = ([s["start_date"][:7]] + ["" if s[column] is None else s[column] for column in columns]
+            for s in sorted(summaries, key=lambda s: s["start_date"]))
+    try:
+        sinks.write_table(MONTHLY_TABLE, rows)
+    except Exception:
+        logging.exception("로컬 sink 기록 실패 (시트 기록은 완료)")
 
-    sheets.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=rng,
-        valueInputOption="USER_ENTERED",
-        body={"values": values}
-    ).execute()
+def replay_pending_writes(sheets, checkpoint: JobCheckpoint):
+    """이전 실행에서 보내지 못한 시트 쓰기를 먼저 재전송"""
+    for write_id, payload in checkpoint.pending_writes():
+        sheets.spreadsheets().values().batchUpdate(
+            spreadsheetId=payload["spreadsheet_id"], body=payload["body"]
+        ).execute()
+        checkpoint.complete_write(write_id)
+        logging.info(f"♻️ 미전송 시트 쓰기 재전송 ({len(payload['body']['data'])}개 범위)")
 
-def is_month_column_empty(sheets, month_label: str) -> bool:
-    col_idx = find_or_create_month_column(sheets, month_label)
-    colA1 = col_to_a1(col_idx)
-    resp = sheets.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"{SHEET_NAME}!{colA1}{START_ROW}"  # 4행 분석 기간
-    ).execute()
-    vals = resp.get("values", [])
-    return not vals or not vals[0] or (len(vals[0]) == 0) or (str(vals[0][0]).strip() == "")
+# ──────────────────────────────────────────────────────────────────────────────
+# 동시 수집
+# ──────────────────────────────────────────────────────────────────────────────
+
+# 스레드별 YouTube 클라이언트 (같은 자격 증명이면 재사용 → 상주 워커 풀에서는 실행 간에도 유지)
+_thread_clients = threading.local()
+
+def fetch_months_concurrently(yt_creds, months: list, pool: ThreadPoolExecutor = None,
+                              on_summary=None, deadline: Deadline = None) -> tuple:
+    """
+    (year, month) 목록을 스레드별 클라이언트로 동시 수집 → (성공 요약 목록, 실패 [(y, m, 예외)], 미룸 [(y, m)])
+    - 최신 달부터 시작 (지난달 → 최근 공백 달 → 오래된 공백 달), 시간 예산이 모자라면 남은 달은 미룸
+    - pool을 주면 그 풀을 사용하고 종료하지 않음 (worker_daemon의 상주 풀)
+    - on_summary((year, month), summary): 달마다 수집이 끝나는 즉시 호출 (체크포인트 기록)
+    """
+    def fetch(ym):
+        if getattr(_thread_clients, "creds", None) is not yt_creds:
+            _thread_clients.clients = build_youtube_clients(yt_creds)
+            _thread_clients.creds = yt_creds
+        youtube, yta = _thread_clients.clients
+        return fetch_month_stats(youtube, yta, CHANNEL_ID, *ym)
+
+    items = [WorkItem(key=ym, priority=(-ym[0], -ym[1]), run=lambda ym=ym: fetch(ym)) for ym in months]
+    done, failures, deferred = run_prioritized(
+        items, deadline or Deadline(), pool=pool, max_workers=FETCH_WORKERS, on_done=on_summary
+    )
+    return list(done.values()), [(y, m, e) for (y, m), e in failures], deferred
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 메인 플로우
 # ──────────────────────────────────────────────────────────────────────────────
 
-def main():
-    youtube, yta, sheets = build_services()
+def main(yt_creds=None, sheets=None, pool: ThreadPoolExecutor = None):
+    """
+    자격 증명/Sheets 클라이언트/수집 풀을 주면 재사용 (worker_daemon), 없으면 새로 생성
+    - 이전 실행이 아직 진행 중이면 이번 트리거는 그 실행에 합치고 바로 종료 (run_lock)
+    """
+    # 샤딩 모드에서는 같은 실행의 다른 태스크와 잠금을 다투지 않도록 태스크별 잠금
+    lease_name = f"yt_monthly_report:shard-{TASK_INDEX}" if sharding_enabled() else "yt_monthly_report"
+    with run_lease(lease_name) as acquired:
+        if not acquired:
+            logging.info("⏭️ 이전 실행이 진행 중 → 이번 트리거는 건너뜀")
+            return
+        if sharding_enabled():
+            run_shard(yt_creds, sheets, pool)
+        else:
+            run_report(yt_creds, sheets, pool)
+
+def month_unit(year: int, month: int) -> str:
+    return f"{year}-{month:02d}"
 
-    # 1) 지난달 집계/기록
+def target_months(sheets) -> list:
+    """지난달 + 시트 범위 내 공백 달 [(year, month), ...] (시트 헤더/분석 기간 한 번 읽기, 부작용 없음)"""
     start, end, y, m = get_last_month_range()
     logging.info(f"Target (지난달): {y}-{m:02d} {start} ~ {end}")
-    summary_last = fetch_month_stats(youtube, yta, CHANNEL_ID, y, m)
-    write_month_summary_to_sheet(sheets, summary_last)
-    print("✅ 지난달 기록 완료:", f"{summary_last['month']}월", summary_last["start_date"], "~", summary_last["end_date"])
-
-    # 2) 전월이 비어있으면 자동 보충
-    if m == 1:
-        prev_y, prev_m = y - 1, 12
-    else:
-        prev_y, prev_m = y, m - 1
-    prev_label = f"{prev_m}월"
-
-    if is_month_column_empty(sheets, prev_label):
-        logging.info(f"{prev_label} 4행(분석 기간)이 비어있어 자동 보충")
-        summary_prev = fetch_month_stats(youtube, yta, CHANNEL_ID, prev_y, prev_m)
-        write_month_summary_to_sheet(sheets, summary_prev)
-        print("✅ 전월 보충 완료:", f"{summary_prev['month']}월", summary_prev["start_date"], "~", summary_prev["end_date"])
+    month_cols, period_row, _ = read_sheet_layout(sheets)
+    gaps = [ym for ym in find_month_gaps(month_cols, period_row, y, m) if ym != (y, m)]
+    if gaps:
+        logging.info("비어있는 달 자동 보충: " + ", ".join(f"{gy}-{gm:02d}" for gy, gm in gaps))
     else:
-        logging.info(f"{prev_label} 컬럼은 이미 값이 있어 보충 생략")
+        logging.info("시트 범위 내 비어있는 달 없음")
+    return [(y, m)] + gaps
+
+def run_report(yt_creds=None, sheets=None, pool: ThreadPoolExecutor = None):
+    deadline = Deadline()
+    sinks = local_sinks()
+    yt_creds = yt_creds or get_youtube_credentials()
+    sheets = sheets or build_sheets_client(yt_creds)
+
+    # 0) 이전 실행이 남긴 미전송 쓰기 재전송 (체크포인트 WAL)
+    checkpoint = JobCheckpoint("yt_monthly_report")
+    replay_pending_writes(sheets, checkpoint)
+
+    # 1) 시트 헤더(3행)/분석 기간(4행) 한 번 읽고 공백 달 탐지
+    months = target_months(sheets)
+
+    # 2) 지난달 + 공백 달 동시 수집 (이전 실행에서 수집을 마친 달은 체크포인트 재사용) → batchUpdate 한 번으로 기록
+    cached = {ym: checkpoint.fetched(month_unit(*ym)) for ym in months}
+    summaries = [summary for summary in cached.values() if summary is not None]
+    to_fetch = [ym for ym, summary in cached.items() if summary is None]
+    if summaries:
+        logging.info(f"♻️ 체크포인트의 수집 결과 재사용: {len(summaries)}개월 (새로 수집 {len(to_fetch)}개월)")
+    fetched, failures, deferred = fetch_months_concurrently(
+        yt_creds, to_fetch, pool, on_summary=lambda ym, summary: checkpoint.record_fetch(month_unit(*ym), summary),
+        deadline=deadline,
+    )
+    summaries += fetched
+    # 수집 중 시트가 바뀌었을 수 있으므로 열 배치는 기록 직전 레이아웃으로 다시 계산
+    # (이미 있는 월 라벨은 그 열을 재사용 → 재실행/중단 후 재시도에도 월 열이 중복 생성되지 않음)
+    month_cols, _, used_cols = read_sheet_layout(sheets)
+    write_month_summaries(sheets, summaries, month_cols, used_cols, checkpoint)
+    for s in sorted(summaries, key=lambda s: s["start_date"]):
+        print("✅ 기록 완료:", f"{s['month']}월", s["start_date"], "~", s["end_date"])
+    write_local_summaries(sinks, summaries)
+
+    API_STATS.log_summary()
+    if failures:
+        # 체크포인트는 남겨 두어 다음 실행이 실패한 달만 다시 수집
+        raise RuntimeError("수집 실패: " + ", ".join(f"{fy}-{fm:02d}" for fy, fm, _ in failures))
+    checkpoint.finish()
+    # 미룬 공백 달은 다음 실행에서 다시 공백으로 탐지됨, 지난달까지 미뤘다면 실패로 표시
+    if months[0] in deferred:
+        raise RuntimeError(f"시간 예산 내에 지난달({month_unit(*months[0])}) 수집을 마치지 못함")
+
+def write_merged_summaries(sheets, summaries: list, sinks: Sinks = None):
+    """샤드 결과를 기록 직전 레이아웃에 맞춰 batchUpdate 한 번으로 기록 (쓰기는 체크포인트 WAL 경유)"""
+    checkpoint = JobCheckpoint("yt_monthly_report")
+    replay_pending_writes(sheets, checkpoint)
+    month_cols, _, used_cols = read_sheet_layout(sheets)
+    write_month_summaries(sheets, summaries, month_cols, used_cols, checkpoint)
+    for s in sorted(summaries, key=lambda s: s["start_date"]):
+        print("✅ 기록 완료:", f"{s['month']}월", s["start_date"], "~", s["end_date"])
+    checkpoint.finish()
+    if sinks is not None:
+        write_local_summaries(sinks, summaries)
+
+def run_shard(yt_creds=None, sheets=None, pool: ThreadPoolExecutor = None):
+    """
+    Cloud Run Job 태스크 하나의 몫 (CLOUD_RUN_TASK_INDEX / CLOUD_RUN_TASK_COUNT)
+    - 모든 태스크가 같은 시트 상태로 같은 달 목록을 계산 → 달 키를 결정적으로 분할해 자기 몫만 수집
+    - 결과는 샤드 파일로 저장, 모든 샤드가 모이면 마지막 태스크가 시트에 한 번에 기록
+    """
+    deadline = Deadline()
+    sinks = local_sinks()
+    yt_creds = yt_creds or get_youtube_credentials()
+    sheets = sheets or build_sheets_client(yt_creds)
+    shard = ShardRun("yt_monthly_report")
+
+    units = {month_unit(*ym): ym for ym in target_months(sheets)}
+    mine = shard.mine(units)
+    results = {unit: summary for unit, summary in shard.previous_results().items() if unit in mine}
+    if results:
+        logging.info(f"♻️ 이전 시도의 샤드 결과 재사용: {len(results)}개월")
+    _, failures, deferred = fetch_months_concurrently(
+        yt_creds, [units[unit] for unit in mine if unit not in results], pool,
+        on_summary=lambda ym, summary: results.update({month_unit(*ym): summary}), deadline=deadline,
+    )
+    # 미룬 달도 샤드 파일에는 실패로 남겨 합치기를 막지 않음 (다음 실행에서 공백으로 다시 탐지)
+    shard.save(results, [month_unit(fy, fm) for fy, fm, _ in failures] + [month_unit(*ym) for ym in deferred])
+    shard.merge_if_ready(lambda merged: write_merged_summaries(sheets, list(merged.values()), sinks))
+
+    API_STATS.log_summary()
+    if failures:
+        # 실패한 달은 샤드 파일에 남지 않음 → Cloud Run이 이 태스크를 재시도하면 그 달만 다시 수집
+        raise RuntimeError("수집 실패: " + ", ".join(f"{fy}-{fm:02d}" for fy, fm, _ in failures))
 
 if __name__ == "__main__":
     try:
-        main()
+        run_profiled(main, "yt_monthly_report")
     except HttpError as e:
         logging.exception("Google API HttpError")
         raise
@@ -16,6 +16,8 @@ from googleapiclient.errors import HttpError
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 
+from profiling import run_profiled
+
 # OAuth 스코프
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.readonly',
@@ -252,4 +254,4 @@ def main():
         print(f"❌ 오류 발생: {e}")
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'yt_video_analysis')
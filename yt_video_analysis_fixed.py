@@ -6,13 +6,18 @@ YouTube 영상별 분석 스크립트 (개선 버전)
 - 배치 조회로 속도/쿼터 효율 개선
 - 시트는 한번에 업데이트
 - (옵션) YouTube Analytics 평균 시청시간/시청비율 추가
+- (선택 의존성 msgspec/orjson) videos/playlistItems 응답을 dict 없이 바로 레코드로 디코딩 (fast_json)
+- 시간 예산(JOB_TIME_BUDGET_SECONDS) 안에서 갱신 우선순위 순으로 조회, 남은 시간이 없으면 Analytics 보강은 생략하고 시트는 항상 기록
+- 조회한 영상은 mmap 카탈로그 인덱스(video_catalogue)에 추가/통계 갱신 → 다음 실행은 시작 즉시 이전 영상 정보 사용
+- 출력 sink 선택(VIDEO_ANALYSIS_SINKS): Sheets에는 롱폼/숏폼 TOP 요약, 로컬 sink(SQLite/CSV/Parquet)에는 카탈로그 전체 표도 기록
 """
 
 import os
 import re
 import datetime as dt
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -23,6 +28,17 @@ from google.auth.transport.requests import Request
 
 import gspread
 
+from fast_json import PlaylistItemListResponse, TypedDecoder, VideoListResponse, execute_typed
+from output_sinks import Table, build_sinks, parse_sink_names
+from profiling import run_profiled
+from refresh_scheduler import RefreshSchedule, parse_published
+from upload_catalogue_cache import UploadCatalogueCache, upload_catalogue_cache_path
+from video_catalogue import VideoCatalogue, record_catalogue, to_epoch, video_catalogue_path
+from request_shaping import API_STATS, FastJsonModel, ShapedHttpRequest, shape_requests_session
+from time_budget import Deadline, WorkItem, run_prioritized
+from video_snapshots import VideoGrowth, record_and_compute_growth
+from yt_analytics_query import fetch_video_metrics
+
 # ========================
 # 설정
 # ========================
@@ -36,6 +52,14 @@ CHANNEL_ID = os.getenv('CHANNEL_ID', 'UCEtPneQeO1IE08MndfjzndQ')
 SPREADSHEET_ID = os.getenv('SPREADSHEET_ID', '17Z6bewPmkp00RHpBKymyMaFj4CvqD_QjAPzagmlkCP8')
 LONGFORM_SHEET_NAME = '유튜브_영상별분석(롱폼)'
 SHORTFORM_SHEET_NAME = '유튜브_영상별분석(숏폼)'
+MAX_VIDEOS = int(os.getenv('MAX_VIDEOS', '100'))  # 업로드 재생목록에서 수집할 최신 영상 수
+# 갱신 스케줄러가 관리할 카탈로그 크기 (기본은 MAX_VIDEOS, 실행당 조회량은 REFRESH_BATCHES_PER_RUN으로 제한)
+CATALOGUE_MAX_VIDEOS = int(os.getenv('CATALOGUE_MAX_VIDEOS', str(MAX_VIDEOS)))
+TOP_K = 20
+# TOP 선정 기준: views(누적 조회수) 또는 스냅샷 성장 지표(views_1d, views_7d, views_30d, velocity_7d, rank_change_7d)
+RANK_METRIC = os.getenv('RANK_METRIC', 'views')
+# 출력 sink (쉼표 구분: sheets, sqlite, csv, parquet), 로컬 sink는 OUTPUT_DIR에 기록
+VIDEO_ANALYSIS_SINKS = os.getenv('VIDEO_ANALYSIS_SINKS', 'sheets')
 
 BASE_DIR = os.getenv('BASE_DIR', os.getcwd())
 CLIENT_SECRET_FILE = os.getenv('CLIENT_SECRET_FILE', os.path.join(BASE_DIR, 'secrets/client_secret.json'))
@@ -43,6 +67,13 @@ TOKEN_YOUTUBE  = os.getenv('TOKEN_YOUTUBE',  os.path.join(BASE_DIR, 'secrets/tok
 TOKEN_SHEETS   = os.getenv('TOKEN_SHEETS',   os.path.join(BASE_DIR, 'secrets/token_sheets.json'))
 TOKEN_YTANALYT = os.getenv('TOKEN_YTANALYT', os.path.join(BASE_DIR, 'secrets/token_ytanalytics.json'))
 
+# 응답 fields 마스크 (호출부에서 실제로 읽는 필드만, 페이지네이션용 nextPageToken 포함)
+UPLOADS_PLAYLIST_FIELDS = 'items/contentDetails/relatedPlaylists/uploads'
+# etag: 다음 실행의 조건부 요청(If-None-Match)용
+PLAYLIST_ITEMS_FIELDS = 'etag,nextPageToken,items/contentDetails(videoId,videoPublishedAt)'
+VIDEOS_META_FIELDS = ('items(id,snippet(title,publishedAt),'
+                      'statistics(viewCount,likeCount,commentCount),contentDetails/duration)')
+
 # ========================
 # 공통: OAuth
 # ========================
@@ -63,16 +94,20 @@ def load_installed_app_creds(token_path: str, client_secret_path: str, scopes: L
 
 def get_youtube_client() -> Any:
     yt_creds = load_installed_app_creds(TOKEN_YOUTUBE, CLIENT_SECRET_FILE, YOUTUBE_SCOPES, local_port=8081)
-    return build('youtube', 'v3', credentials=yt_creds), yt_creds
+    return build('youtube', 'v3', credentials=yt_creds, requestBuilder=ShapedHttpRequest,
+                 model=FastJsonModel()), yt_creds
 
 def get_sheets_client() -> gspread.Client:
     sheets_creds = load_installed_app_creds(TOKEN_SHEETS, CLIENT_SECRET_FILE, SHEETS_SCOPES, local_port=8082)
-    return gspread.authorize(sheets_creds)
+    gc = gspread.authorize(sheets_creds)
+    shape_requests_session(gc.http_client.session, 'sheets')
+    return gc
 
 def get_yt_analytics_client() -> Any:
     # YouTube Analytics는 YouTube와 같은 토큰 사용 (yt_monthly_report_test.py 참고)
     yt_analyt_creds = load_installed_app_creds(TOKEN_YOUTUBE, CLIENT_SECRET_FILE, YOUTUBE_SCOPES + YT_ANALYTICS_SCOPES, local_port=8081)
-    return build('youtubeAnalytics', 'v2', credentials=yt_analyt_creds)
+    return build('youtubeAnalytics', 'v2', credentials=yt_analyt_creds, requestBuilder=ShapedHttpRequest,
+                 model=FastJsonModel())
 
 # ========================
 # YouTube 데이터 수집
@@ -95,110 +130,247 @@ def parse_duration_to_seconds(iso_dur: str) -> int:
     return total
 
 def fetch_uploads_playlist_id(youtube, channel_id: str) -> str:
-    resp = youtube.channels().list(part='contentDetails', id=channel_id).execute()
+    resp = youtube.channels().list(part='contentDetails', id=channel_id, fields=UPLOADS_PLAYLIST_FIELDS).execute()
     items = resp.get('items', [])
     if not items:
         raise ValueError(f'채널을 찾을 수 없습니다: {channel_id}')
     return items[0]['contentDetails']['relatedPlaylists']['uploads']
 
+def playlist_page_from_dict(resp: Dict) -> Dict:
+    """playlistItems.list 응답 → {'etag', 'nextPageToken', 'items': [(영상 ID, 업로드 시각), ...]} (list_next 호환)"""
+    return {
+        'etag': resp.get('etag'),
+        'nextPageToken': resp.get('nextPageToken'),
+        'items': [(it['contentDetails']['videoId'], it['contentDetails'].get('videoPublishedAt', ''))
+                  for it in resp.get('items', [])],
+    }
+
+def playlist_page_from_struct(resp) -> Dict:
+    return {
+        'etag': resp.etag,
+        'nextPageToken': resp.nextPageToken,
+        'items': [(it.contentDetails.videoId, it.contentDetails.videoPublishedAt) for it in resp.items],
+    }
+
+PLAYLIST_PAGE = TypedDecoder(playlist_page_from_dict, PlaylistItemListResponse, playlist_page_from_struct)
+
+def fetch_playlist_items(youtube, playlist_id: str, max_videos: int = 50) -> List[Tuple[str, str]]:
+    """업로드 재생목록에서 최신 영상 (ID, 업로드 시각) 가져오기 (최대 max_videos개)"""
+    items = []
+    req = youtube.playlistItems().list(
+        part='contentDetails',
+        playlistId=playlist_id,
+        maxResults=50,
+        fields=PLAYLIST_ITEMS_FIELDS
+    )
+    while req and len(items) < max_videos:
+        resp = execute_typed(req, PLAYLIST_PAGE)
+        items.extend(resp['items'][:max_videos - len(items)])
+        req = youtube.playlistItems().list_next(req, resp)
+    return items
+
 def fetch_all_playlist_video_ids(youtube, playlist_id: str, max_videos: int = 50) -> List[str]:
     """업로드 재생목록에서 최신 영상 ID들을 가져오기 (최대 max_videos개)"""
-    ids = []
+    return [vid for vid, _ in fetch_playlist_items(youtube, playlist_id, max_videos)]
+
+def fetch_upload_catalogue(youtube, channel_id: str, max_videos: int,
+                           cache: UploadCatalogueCache) -> List[Tuple[str, str]]:
+    """
+    최신 영상 (ID, 업로드 시각) 목록을 캐시와 조건부 요청으로 가져오기
+    - 첫 페이지가 304/같은 etag면 저장된 목록 사용, 바뀌었으면 새 업로드 구간만 조회
+    """
+    playlist_id = cache.playlist_id or fetch_uploads_playlist_id(youtube, channel_id)
+    incremental = cache.covers(max_videos)
     req = youtube.playlistItems().list(
         part='contentDetails',
         playlistId=playlist_id,
-        maxResults=50
+        maxResults=50,
+        fields=PLAYLIST_ITEMS_FIELDS
     )
-    while req and len(ids) < max_videos:
-        resp = req.execute()
-        for it in resp.get('items', []):
-            if len(ids) >= max_videos:
+    if incremental and cache.etag:
+        req.headers['If-None-Match'] = cache.etag
+    try:
+        resp = execute_typed(req, PLAYLIST_PAGE)
+    except HttpError as e:
+        if incremental and e.resp.status == 304:
+            print("♻️ 업로드 목록 변경 없음 (304) → 저장된 카탈로그 사용")
+            return cache.items[:max_videos]
+        raise
+    # list_next는 요청을 얕은 복사하므로 다음 페이지에 조건부 헤더가 따라가지 않도록 제거
+    req.headers.pop('If-None-Match', None)
+    first_etag = resp.get('etag')
+    if incremental and first_etag and first_etag == cache.etag:
+        print("♻️ 업로드 목록 변경 없음 (etag 일치) → 저장된 카탈로그 사용")
+        return cache.items[:max_videos]
+
+    known = {vid for vid, _ in cache.items} if incremental else set()
+    new_items: List[Tuple[str, str]] = []
+    reached_known = False
+    while True:
+        for vid, published in resp['items']:
+            if vid in known:
+                reached_known = True
+                break
+            new_items.append((vid, published))
+            if len(new_items) >= max_videos:
                 break
-            vid = it['contentDetails']['videoId']
-            ids.append(vid)
+        if reached_known or len(new_items) >= max_videos:
+            req = None
+            break
         req = youtube.playlistItems().list_next(req, resp)
-    return ids
+        if req is None:
+            break
+        resp = execute_typed(req, PLAYLIST_PAGE)
+
+    if reached_known:
+        items = new_items + cache.items
+        complete = cache.complete and len(items) <= max_videos
+        print(f"🆕 새 업로드 {len(new_items)}개만 추가 조회")
+    else:
+        items = new_items
+        # 재생목록 끝까지 읽었고 max_videos에 못 미침 = 채널 전체
+        complete = req is None and len(new_items) < max_videos
+    items = items[:max_videos]
+    cache.update(playlist_id, first_etag, items, complete)
+    cache.save()
+    return items
+
+SHORTS_MAX_SECONDS = 60  # Shorts 휴리스틱
+
+@dataclass(slots=True)
+class VideoRecord:
+    """
+    영상 1개 (수집 → 정렬 → 행 렌더링까지 같은 객체 사용)
+    - __slots__로 인스턴스 dict 없이 저장 (카탈로그 10만 개 규모 메모리 절감)
+    - URL/Shorts 여부는 저장하지 않고 필요할 때 계산
+    """
+    id: str
+    title: str
+    upload_date: str
+    views: int
+    likes: int
+    comments: int
+    duration_seconds: int
+
+    @property
+    def is_short(self) -> bool:
+        return self.duration_seconds <= SHORTS_MAX_SECONDS
+
+    @property
+    def url(self) -> str:
+        return f"https://www.youtube.com/watch?v={self.id}"
 
 def chunked(iterable: List[str], size: int):
     for i in range(0, len(iterable), size):
         yield iterable[i:i+size]
 
-def fetch_videos_meta(youtube, video_ids: List[str]) -> List[Dict[str, Any]]:
-    """videos().list를 배치로 호출하여 메타/통계를 수집"""
+def video_records_from_dict(resp: Dict) -> List[VideoRecord]:
+    out = []
+    for v in resp.get('items', []):
+        sn = v.get('snippet', {})
+        st = v.get('statistics', {})
+        cd = v.get('contentDetails', {})
+
+        out.append(VideoRecord(
+            id=v.get('id'),
+            title=sn.get('title', ''),
+            upload_date=(sn.get('publishedAt', '')[:10] or ''),
+            views=int(st.get('viewCount', 0) or 0),
+            likes=int(st.get('likeCount', 0) or 0),
+            comments=int(st.get('commentCount', 0) or 0),
+            duration_seconds=parse_duration_to_seconds(cd.get('duration', 'PT0S')),
+        ))
+    return out
+
+def video_records_from_struct(resp) -> List[VideoRecord]:
+    return [
+        VideoRecord(
+            id=v.id,
+            title=v.snippet.title,
+            upload_date=v.snippet.publishedAt[:10],
+            views=int(v.statistics.viewCount or 0),
+            likes=int(v.statistics.likeCount or 0),
+            comments=int(v.statistics.commentCount or 0),
+            duration_seconds=parse_duration_to_seconds(v.contentDetails.duration),
+        )
+        for v in resp.items
+    ]
+
+VIDEO_LIST = TypedDecoder(video_records_from_dict, VideoListResponse, video_records_from_struct)
+
+def fetch_videos_meta(youtube, video_ids: List[str]) -> List[VideoRecord]:
+    """videos().list를 배치로 호출하여 메타/통계를 수집 (응답은 바로 VideoRecord로 디코딩)"""
     out = []
     for batch in chunked(video_ids, 50):
-        resp = youtube.videos().list(
+        out.extend(execute_typed(youtube.videos().list(
             part='snippet,statistics,contentDetails',
             id=','.join(batch),
-            maxResults=50
-        ).execute()
-        for v in resp.get('items', []):
-            sn = v.get('snippet', {})
-            st = v.get('statistics', {})
-            cd = v.get('contentDetails', {})
-            dur = cd.get('duration', 'PT0S')
-            sec = parse_duration_to_seconds(dur)
-            is_short = sec <= 60  # Shorts 휴리스틱
-
-            out.append({
-                'id': v.get('id'),
-                'title': sn.get('title', ''),
-                'upload_date': (sn.get('publishedAt', '')[:10] or ''),
-                'views': int(st.get('viewCount', 0) or 0),
-                'likes': int(st.get('likeCount', 0) or 0),
-                'comments': int(st.get('commentCount', 0) or 0),
-                'duration': dur,
-                'duration_seconds': sec,
-                'is_short': is_short,
-                'url': f"https://www.youtube.com/watch?v={v.get('id')}"
-            })
+            maxResults=50,
+            fields=VIDEOS_META_FIELDS
+        ), VIDEO_LIST))
     return out
 
+def fetch_videos_meta_within(youtube, video_ids: List[str], deadline: Deadline) -> Tuple[List[str], List[VideoRecord]]:
+    """
+    video_ids 순서(갱신 우선순위)대로 50개 배치를 조회하다가 시간 예산이 모자라면 중단
+    → (실제로 조회한 ID, 레코드), 못 한 배치는 다음 실행에서 다시 갱신 대상
+    """
+    batches = list(chunked(video_ids, 50))
+    items = [WorkItem(key=i, priority=i, run=lambda batch=batch: fetch_videos_meta(youtube, batch))
+             for i, batch in enumerate(batches)]
+    done, failures, _ = run_prioritized(items, deadline, max_workers=1)
+    if failures:
+        raise failures[0][1]
+    requested = [vid for i in sorted(done) for vid in batches[i]]
+    return requested, [record for i in sorted(done) for record in done[i]]
+
+def refresh_videos(youtube, video_ids: List[str]) -> List[VideoRecord]:
+    """
+    지정한 영상만 메타/통계를 조회해 갱신 스케줄 상태에 반영 (WebSub 알림 등 이벤트 기반 갱신)
+    - 응답에 없는 영상(삭제/비공개)은 다음 정기 실행의 순위에서 제외됨
+    - 일간 스냅샷은 정기 실행에서만 기록 (부분 스냅샷으로 덮어쓰지 않도록)
+    """
+    now = datetime.utcnow()
+    records = fetch_videos_meta(youtube, video_ids)
+    schedule = RefreshSchedule(CHANNEL_ID)
+    schedule.update(video_ids, records, now)
+    schedule.save()
+    try:
+        record_catalogue(CHANNEL_ID, records, {}, now).close()
+    except Exception as e:
+        print(f"⚠️ 영상 카탈로그 인덱스 갱신 실패: {e}")
+    return records
+
 # ========================
 # (선택) YouTube Analytics
 # ========================
 def fetch_yt_analytics_for_videos(yt_analytics, video_ids: List[str]) -> Dict[str, Dict[str, float]]:
     """
     각 비디오별로 평균 시청시간(초), 평균 시청 비율(%)을 조회
-    - yt_monthly_report_test.py 스타일로 구현
+    - 최근 30일 창에 대해 조회수 정렬 상위 200개 쿼리 1회 (영상 수와 무관)
+    - 잘린 결과에서 빠진 영상만 ID 필터로 폴백 (yt_analytics_query 참고)
+    - 폴백 배치가 실패하면 그 배치 영상만 0으로 남김 (상위 조회 자체가 실패하면 모두 0)
     """
-    results = {}
-    
-    # 배치로 처리 (50개씩)
-    for batch in chunked(video_ids, 50):
-        try:
-            # 최근 30일 데이터로 조회 (더 안정적)
-            end_date = datetime.utcnow().date()
-            start_date = end_date - dt.timedelta(days=30)
-            
-            resp = yt_analytics.reports().query(
-                ids=f'channel=={CHANNEL_ID}',
-                startDate=start_date.isoformat(),
-                endDate=end_date.isoformat(),
-                metrics='averageViewDuration,averageViewPercentage',
-                dimensions='video',
-                filters=f'video=={",".join(batch)}'
-            ).execute()
-            
-            rows = resp.get('rows', [])
-            for row in rows:
-                vid, avg_dur, avg_pct = row
-                results[vid] = {
-                    'avg_view_duration': float(avg_dur or 0.0),
-                    'avg_view_percentage': float(avg_pct or 0.0),
-                }
-            
-            # 데이터가 없는 비디오는 0으로 설정
-            for vid in batch:
-                if vid not in results:
-                    results[vid] = {'avg_view_duration': 0.0, 'avg_view_percentage': 0.0}
-                    
-        except HttpError as e:
-            print(f"Analytics API 오류 (배치): {e}")
-            # 실패한 배치는 모두 0으로 설정
-            for vid in batch:
-                results[vid] = {'avg_view_duration': 0.0, 'avg_view_percentage': 0.0}
-    
+    # 최근 30일 데이터로 조회 (더 안정적)
+    end_date = datetime.utcnow().date()
+    start_date = end_date - dt.timedelta(days=30)
+
+    results = {vid: {'avg_view_duration': 0.0, 'avg_view_percentage': 0.0} for vid in video_ids}
+    try:
+        rows = fetch_video_metrics(
+            yt_analytics, CHANNEL_ID, start_date.isoformat(), end_date.isoformat(),
+            metrics='views,averageViewDuration,averageViewPercentage',
+            video_ids=video_ids
+        )
+        for vid, row in rows.items():
+            results[vid] = {
+                'avg_view_duration': float(row.get('averageViewDuration') or 0.0),
+                'avg_view_percentage': float(row.get('averageViewPercentage') or 0.0),
+            }
+    except HttpError as e:
+        # 상위 조회 실패 시 모두 0으로 유지
+        print(f"Analytics API 오류: {e}")
+
     return results
 
 # ========================
@@ -206,13 +378,23 @@ def fetch_yt_analytics_for_videos(yt_analytics, video_ids: List[str]) -> Dict[st
 # ========================
 LONG_HEADERS = [
     'No', 'videoId', '영상 제목', '업로드일', '조회수', '좋아요', '댓글',
-    '시청 유지율(%)', '평균 시청시간(초)', '길이(초)', 'Shorts 여부', '영상 링크', '비고'
+    '시청 유지율(%)', '평균 시청시간(초)', '길이(초)', 'Shorts 여부', '영상 링크',
+    '조회수 증가(1일)', '조회수 증가(7일)', '조회수 증가(30일)', '일평균 조회수(7일)', '순위 변화(7일)', '비고'
 ]
-
-def build_sheet_rows(videos: List[Dict[str, Any]], analytics: Dict[str, Dict[str, float]] = None) -> List[List[Any]]:
+LONG_COLUMN_TYPES = [int, str, str, str, int, int, int, float, float, int, str, str, int, int, int, float, int, str]
+LONGFORM_TABLE = Table('yt_videos_long', list(zip(LONG_HEADERS, LONG_COLUMN_TYPES)), sheet_name=LONGFORM_SHEET_NAME)
+SHORTFORM_TABLE = Table('yt_videos_short', list(zip(LONG_HEADERS, LONG_COLUMN_TYPES)), sheet_name=SHORTFORM_SHEET_NAME)
+# 카탈로그 전체 (Sheets 셀 한도를 넘을 수 있으므로 로컬 sink 전용)
+CATALOGUE_TABLE = Table('yt_video_catalogue', [
+    ('video_id', str), ('title', str), ('upload_date', str), ('views', int), ('likes', int), ('comments', int),
+    ('duration_seconds', int), ('is_short', int), *((column, float) for column in VideoGrowth.COLUMNS),
+], bulk=True)
+
+def build_sheet_rows(videos: List[VideoRecord], analytics: Dict[str, Dict[str, float]] = None,
+                     growth: VideoGrowth = None) -> List[List[Any]]:
     rows = []
     for i, v in enumerate(videos, 1):
-        vid = v['id']
+        vid = v.id
         avg_pct = ''
         avg_dur = ''
         if analytics is not None and vid in analytics:
@@ -221,97 +403,165 @@ def build_sheet_rows(videos: List[Dict[str, Any]], analytics: Dict[str, Dict[str
         rows.append([
             i,
             vid,
-            v['title'],
-            v['upload_date'],
-            v['views'],
-            v['likes'],
-            v['comments'],
+            v.title,
+            v.upload_date,
+            v.views,
+            v.likes,
+            v.comments,
             avg_pct,            # 시청 유지율(%)
             avg_dur,            # 평균 시청시간(초)
-            v['duration_seconds'],
-            'Y' if v['is_short'] else 'N',
-            v['url'],
+            v.duration_seconds,
+            'Y' if v.is_short else 'N',
+            v.url,              # 렌더링 시점에 생성
+            *(growth.row(vid) if growth is not None else [''] * len(VideoGrowth.COLUMNS)),
             ''                  # 비고
         ])
     return rows
 
-def write_sheet(gc: gspread.Client, sheet_name: str, headers: List[str], rows: List[List[Any]]):
-    sh = gc.open_by_key(SPREADSHEET_ID)
-    try:
-        ws = sh.worksheet(sheet_name)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=sheet_name, rows=1000, cols=len(headers))
+def rank_key(growth: VideoGrowth = None):
+    """TOP 선정 정렬 키 (성장 지표가 없는 영상은 뒤로, 같은 값이면 누적 조회수 순)"""
+    if RANK_METRIC == 'views' or growth is None:
+        return lambda v: v.views
+
+    def key(v: VideoRecord):
+        value = growth.value(v.id, RANK_METRIC)
+        return (value == value, value if value == value else 0.0, v.views)  # NaN 판별
+    return key
 
-    # 전체 지우고 헤더+데이터 한번에 업데이트 (빠름)
-    ws.clear()
-    values = [headers] + rows
-    ws.update('A1', values, value_input_option='RAW')
+def catalogue_rows(videos: List[VideoRecord], growth: VideoGrowth = None):
+    """카탈로그 전체 표 행 (제너레이터 → sink가 청크 단위로 스트리밍 기록)"""
+    for v in videos:
+        yield [v.id, v.title, v.upload_date, v.views, v.likes, v.comments, v.duration_seconds, int(v.is_short),
+               *(growth.row(v.id) if growth is not None else [''] * len(VideoGrowth.COLUMNS))]
 
 # ========================
 # 메인
 # ========================
-def main():
+def main(youtube=None, gc: gspread.Client = None, yt_analytics=None):
+    """
+    클라이언트를 주면 재사용 (worker_daemon), 없으면 새로 인증/생성
+    - 클라이언트를 받은 경우 오류를 로그 후 다시 던짐 (데몬이 실패를 기록하고 warm 클라이언트를 버리도록)
+    """
+    deadline = Deadline()
+    reraise = any(client is not None for client in (youtube, gc, yt_analytics))
+
+    def sheets_client() -> gspread.Client:
+        nonlocal gc
+        if gc is None:
+            print("📊 Google Sheets 인증 중...")
+            gc = get_sheets_client()
+        return gc
     print("🎬 YouTube 영상별 분석 시작")
     print(f"📊 채널 ID: {CHANNEL_ID}")
     print(f"📝 스프레드시트 ID: {SPREADSHEET_ID}")
+    with VideoCatalogue(video_catalogue_path(CHANNEL_ID)) as index:
+        print(f"🗂️ {index.summary()}")
 
     try:
-        # 클라이언트 준비
-        print("🔐 YouTube 인증 중...")
-        youtube, yt_creds = get_youtube_client()
+        # sink 설정 오류는 API 호출 전에
+        sinks = build_sinks(parse_sink_names(VIDEO_ANALYSIS_SINKS), 'yt_video_analysis',
+                            sheets_client=sheets_client, spreadsheet_id=SPREADSHEET_ID)
+        print(f"🗃️ 출력 sink: {', '.join(sinks.names) or '없음'}")
 
-        print("📹 업로드 재생목록 조회...")
-        uploads_pid = fetch_uploads_playlist_id(youtube, CHANNEL_ID)
-
-        print("📹 영상 ID 수집 중... (최신 100개)")
-        video_ids = fetch_all_playlist_video_ids(youtube, uploads_pid, max_videos=100)
-        if not video_ids:
+        # 클라이언트 준비
+        if youtube is None:
+            print("🔐 YouTube 인증 중...")
+            youtube, _ = get_youtube_client()
+
+        # 업로드 재생목록 ID/첫 페이지 etag를 저장해 두고 변경이 있을 때만 새 업로드 구간 조회
+        print(f"📹 영상 ID 수집 중... (최신 {CATALOGUE_MAX_VIDEOS}개)")
+        catalogue = fetch_upload_catalogue(youtube, CHANNEL_ID, CATALOGUE_MAX_VIDEOS,
+                                           UploadCatalogueCache(upload_catalogue_cache_path(CHANNEL_ID)))
+        if not catalogue:
             print("❌ 업로드된 영상을 찾을 수 없습니다.")
             return
+        video_ids = [vid for vid, _ in catalogue]
         print(f"✅ 총 {len(video_ids)}개 영상 ID 수집")
 
-        print("📦 메타/통계 배치 조회 중...")
-        videos = fetch_videos_meta(youtube, video_ids)
+        # 업로드 경과/조회수 속도별 갱신 주기가 지난 영상만 조회 (나머지는 마지막 조회값 사용)
+        now = datetime.utcnow()
+        schedule = RefreshSchedule(CHANNEL_ID)
+        published = {vid: parse_published(published) for vid, published in catalogue}
+        due_ids = schedule.plan(published, now)
+        plan = schedule.last_plan
+        print(f"📦 메타/통계 배치 조회 중... ({len(due_ids)}개 = 필수 {plan['forced']} / "
+              f"주기 도래 {plan['due']} / 최신 상태 {plan['fresh']})")
+        requested_ids, refreshed = fetch_videos_meta_within(youtube, due_ids, deadline)
+        if len(requested_ids) < len(due_ids):
+            print(f"⏰ 시간 예산 부족: {len(due_ids) - len(requested_ids)}개 영상 갱신을 다음 실행으로 미룸")
+        schedule.update(requested_ids, refreshed, now)
+        try:
+            with record_catalogue(CHANNEL_ID, refreshed, published, now) as index:
+                print(f"🗂️ {index.summary()}")
+        except Exception as e:
+            print(f"⚠️ 영상 카탈로그 인덱스 갱신 실패: {e}")
+
+        # 이번에 조회한 값 + 나머지 영상의 마지막 조회값 = 카탈로그 전체 상태
+        videos = schedule.records(video_ids, VideoRecord)
+
+        # 일간 스냅샷 저장 + 1/7/30일 성장 지표 (카탈로그 전체 기준, 추가 API 호출 없음)
+        # 매일 같은 영상 집합을 남겨야 기간 증가/순위 변화가 같은 기준으로 비교됨
+        # 마지막 조회값을 다시 남기는 영상은 조회 시각(stats_at) 차이로 증가를 나눠 며칠 0 뒤 급증처럼 보이지 않게 함
+        growth = None
+        try:
+            growth = record_and_compute_growth(CHANNEL_ID, [v.id for v in videos], {
+                'views': [v.views for v in videos],
+                'likes': [v.likes for v in videos],
+                'comments': [v.comments for v in videos],
+                'stats_at': [to_epoch(schedule.refreshed_at(v.id)) for v in videos],
+            })
+            # 다시 조회하지 않아 속도를 알 수 없는 영상(NaN)은 이전 속도 유지
+            schedule.update_velocity({v.id: growth.value(v.id, 'velocity_7d') for v in videos})
+        except Exception as e:
+            print(f"⚠️ 스냅샷 저장/성장 지표 계산 실패 (누적 조회수만 기록): {e}")
+        schedule.save(video_ids)
 
         # 롱폼/숏폼 분리 후 TOP 20개씩만 선택
-        long_videos  = [v for v in videos if not v['is_short']]
-        short_videos = [v for v in videos if v['is_short']]
+        long_videos  = [v for v in videos if not v.is_short]
+        short_videos = [v for v in videos if v.is_short]
         
-        # 조회수 기준으로 정렬하여 TOP 20개 선택
-        long_videos.sort(key=lambda x: x['views'], reverse=True)
-        short_videos.sort(key=lambda x: x['views'], reverse=True)
+        # 정렬 기준(RANK_METRIC, 기본 누적 조회수)으로 TOP 20개 선택
+        long_videos.sort(key=rank_key(growth), reverse=True)
+        short_videos.sort(key=rank_key(growth), reverse=True)
         
-        long_videos = long_videos[:20]
-        short_videos = short_videos[:20]
+        long_videos = long_videos[:TOP_K]
+        short_videos = short_videos[:TOP_K]
         
         print(f"📏 롱폼 TOP {len(long_videos)}개, 숏폼 TOP {len(short_videos)}개")
 
         # (선택) YouTube Analytics
+        # 선택 보강이므로 시간 예산이 남았을 때만, 마감까지 끝나지 않으면 버리고 시트부터 기록
         analytics_map = None
         if USE_YT_ANALYTICS:
             print("📈 YouTube Analytics 인증/조회 중...")
-            yt_analytics = get_yt_analytics_client()
             # TOP 20개 영상만 Analytics 조회
-            top_video_ids = [v['id'] for v in long_videos + short_videos]
-            analytics_map = fetch_yt_analytics_for_videos(yt_analytics, top_video_ids)
-
-        # 시트 기록
-        print("📊 Google Sheets 인증 중...")
-        gc = get_sheets_client()
-
-        print("📝 시트에 쓰는 중 (일괄 업데이트)...")
-        long_rows  = build_sheet_rows(long_videos, analytics_map)
-        short_rows = build_sheet_rows(short_videos, analytics_map)
-
-        write_sheet(gc, LONGFORM_SHEET_NAME,  LONG_HEADERS, long_rows)
-        write_sheet(gc, SHORTFORM_SHEET_NAME, LONG_HEADERS, short_rows)
+            top_video_ids = [v.id for v in long_videos + short_videos]
+            done, _, _ = run_prioritized([WorkItem(
+                key='yt_analytics', priority=0,
+                run=lambda: fetch_yt_analytics_for_videos(yt_analytics or get_yt_analytics_client(), top_video_ids),
+            )], deadline, max_workers=1)
+            analytics_map = done.get('yt_analytics')
+            if analytics_map is None:
+                print("⏰ YouTube Analytics 보강 생략 (시간 예산 부족 또는 실패)")
+
+        # 결과 기록 (Sheets는 TOP 요약만, 로컬 sink에는 카탈로그 전체 표도)
+        print("📝 결과 기록 중 (표마다 일괄 기록)...")
+        sinks.write_table(LONGFORM_TABLE,  build_sheet_rows(long_videos, analytics_map, growth))
+        sinks.write_table(SHORTFORM_TABLE, build_sheet_rows(short_videos, analytics_map, growth))
+        sinks.write_table(CATALOGUE_TABLE, catalogue_rows(videos, growth))
 
         print("🎉 영상별 분석 완료!")
+        for line in API_STATS.summary_lines():
+            print(f"📦 {line}")
 
     except HttpError as e:
         print(f"❌ YouTube API 오류: {e}")
+        if reraise:
+            raise
     except Exception as e:
         print(f"❌ 일반 오류: {e}")
+        if reraise:
+            raise
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    run_profiled(main, 'yt_video_analysis_fixed')
\ No newline at end of file